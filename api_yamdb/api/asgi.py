@@ -0,0 +1,60 @@
+"""
+Обработчик ASGI с чтением потоковых ответов вне цикла событий.
+
+Django 3.2 перебирает StreamingHttpResponse прямо в цикле событий, а
+генераторы потоковой выгрузки читают строки из БД по мере отдачи ответа:
+ORM в цикле событий падает с SynchronousOnlyOperation. Здесь каждая часть
+потокового ответа берётся через sync_to_async(thread_sensitive=True) — в
+том же потоке, где выполнялось синхронное представление и где закроется
+его соединение с БД.
+"""
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+
+_next_part = sync_to_async(next, thread_sensitive=True)
+
+
+class ASGIHandler(asgi.ASGIHandler):
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            await super().send_response(response, send)
+            return
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': self.get_headers(response),
+        })
+        parts = iter(response)
+        while True:
+            part = await _next_part(parts, None)
+            if part is None:
+                break
+            for chunk, _ in self.chunk_bytes(part):
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+    @staticmethod
+    def get_headers(response):
+        """Заголовки и cookies ответа в формате ASGI, как в Django."""
+        headers = [
+            (header.encode('ascii'), value.encode('latin1'))
+            for header, value in response.items()
+        ]
+        headers.extend(
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values()
+        )
+        return headers
+
+
+def get_asgi_application():
+    """Как django.core.asgi.get_asgi_application, с ASGIHandler выше."""
+    django.setup(set_prefix=False)
+    return ASGIHandler()
@@ -0,0 +1,411 @@
+"""
+Нагрузочный прогон API в процессе.
+
+Запросы идут в WSGI-приложение Django без сети: в замер попадают
+middleware, вьюсеты, сериализация и БД. Смесь маршрутов api/v1/urls.py
+воспроизводится по seed, итог — JSON с пропускной способностью,
+перцентилями задержки и числом SQL-запросов (из заголовка Server-Timing)
+по каждому маршруту. compare() сравнивает его с сохранённым базовым
+замером.
+"""
+import asyncio
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from secrets import token_hex
+
+from django.core.cache import cache
+from django.core.wsgi import get_wsgi_application
+from django.test import RequestFactory
+from rest_framework.settings import api_settings
+from reviews.models import ConfirmationCode, Review, Title, User
+
+from .asgi import get_asgi_application
+from .v1.authentication import UserRefreshToken
+
+# Сколько отзывов и пользователей выбирается для запросов прогона.
+SAMPLE_SIZE = 1000
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+# Маршрут: вес в смеси и ожидаемый статус ответа.
+ROUTES = {
+    'titles': (15, 200),
+    'titles_filter': (15, 200),
+    'title': (10, 200),
+    'categories': (4, 200),
+    'genres': (4, 200),
+    'reviews': (12, 200),
+    'review': (6, 200),
+    'comments': (8, 200),
+    'users_me': (4, 200),
+    'signup': (4, 200),
+    'token': (4, 200),
+    'review_create': (6, 201),
+    'comment_create': (6, 201),
+    'title_update': (2, 200),
+}
+# Маршруты без записи: их запрашивают одновременные медленные клиенты.
+READ_ROUTES = ('titles', 'titles_filter', 'title', 'categories', 'genres',
+               'reviews', 'review', 'comments', 'users_me')
+
+
+def percentile(values, percent):
+    """Перцентиль по рангу для отсортированного списка."""
+    return values[max(0, math.ceil(len(values) * percent / 100) - 1)]
+
+
+def summarize(samples):
+    """Статистика маршрута по списку (секунды, запросы, статус верен)."""
+    timings = sorted(sample[0] for sample in samples)
+    queries = [sample[1] for sample in samples if sample[1] is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(not sample[2] for sample in samples),
+        'latency_ms': {
+            f'p{percent}': round(percentile(timings, percent) * 1000, 2)
+            for percent in (50, 95, 99)
+        },
+        'queries': round(sum(queries) / len(queries), 2) if queries else None,
+        'queries_max': max(queries, default=None),
+    }
+
+
+def make_sample(name, elapsed, status, headers):
+    """Замер запроса: (секунды, SQL-запросы, статус верен)."""
+    match = QUERIES_RE.search(headers.get('Server-Timing', ''))
+    queries = int(match.group(1)) if match else None
+    return elapsed, queries, status == ROUTES[name][1]
+
+
+class Replay:
+    """Смесь запросов к API на данных, уже загруженных в БД."""
+
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+        self.factory = RequestFactory()
+        self.application = get_wsgi_application()
+        self.tokens = {}
+        self.title_ids = list(Title.objects.values_list('pk', flat=True))
+        self.reviews = self.sample(
+            Review.objects.values_list('pk', 'title_id')
+        )
+        self.users = self.sample(User.objects.filter(role=User.USER))
+        if not (self.title_ids and self.reviews and self.users):
+            raise ValueError('Для прогона нужны произведения, отзывы '
+                             'и пользователи')
+        self.admin, _ = User.objects.get_or_create(
+            username='benchmark_admin',
+            defaults={'email': 'benchmark_admin@yamdb.fake',
+                      'role': User.ADMIN},
+        )
+        self.writers = self.iter_writers()
+
+    def sample(self, queryset):
+        pks = list(queryset.values_list('pk', flat=True).order_by('pk'))
+        pks = self.random.sample(pks, min(SAMPLE_SIZE, len(pks)))
+        return list(queryset.filter(pk__in=pks).order_by('pk'))
+
+    def iter_writers(self):
+        # Новый автор пишет по отзыву на каждое произведение по порядку,
+        # так пара произведение — автор не повторяется.
+        for number in itertools.count():
+            writer = User.objects.create(
+                username=f'benchmark_{token_hex(4)}_{number}',
+                email=f'benchmark_{token_hex(4)}_{number}@yamdb.fake',
+            )
+            for title_id in self.title_ids:
+                yield writer, title_id
+
+    def token(self, user):
+        if user.pk not in self.tokens:
+            self.tokens[user.pk] = str(
+                UserRefreshToken.for_user(user).access_token
+            )
+        return self.tokens[user.pk]
+
+    def run(self, requests, warmup=0, routes=None):
+        """
+        Выполняет warmup + requests запросов, отчёт по последним.
+        routes ограничивает смесь указанными маршрутами.
+        """
+        cache.clear()
+        samples = defaultdict(list)
+        for number, name in enumerate(self.choose(warmup + requests, routes)):
+            sample = self.request(name)
+            if number >= warmup:
+                samples[name].append(sample)
+        return self.report(samples)
+
+    def choose(self, requests, routes=None):
+        """Маршруты requests запросов смеси."""
+        names = list(routes or ROUTES)
+        weights = [ROUTES[name][0] for name in names]
+        for _ in range(requests):
+            yield self.random.choices(names, weights)[0]
+
+    def prepare(self, name):
+        """WSGIRequest очередного запроса маршрута name."""
+        method, path, data, user = getattr(self, f'route_{name}')()
+        extra = {}
+        if user is not None:
+            extra['HTTP_AUTHORIZATION'] = f'Bearer {self.token(user)}'
+        if data is None:
+            return self.factory.generic(method, path, **extra)
+        return self.factory.generic(
+            method, path, json.dumps(data), 'application/json', **extra
+        )
+
+    def request(self, name):
+        """Запрос маршрута name: (секунды, SQL-запросы, статус верен)."""
+        request = self.prepare(name)
+        result = {}
+
+        def start_response(status, headers):
+            result['status'] = int(status.split()[0])
+            result['headers'] = dict(headers)
+
+        started = time.perf_counter()
+        response = self.application(request.environ, start_response)
+        try:
+            b''.join(response)
+        finally:
+            response.close()
+        elapsed = time.perf_counter() - started
+        return make_sample(name, elapsed, result['status'], result['headers'])
+
+    def report(self, samples, duration=None):
+        """
+        Отчёт по замерам маршрутов. duration — время всего прогона;
+        по умолчанию сумма задержек, как при последовательных запросах.
+        """
+        everything = [sample for route in samples.values() for sample in route]
+        total = summarize(everything)
+        if duration is None:
+            duration = sum(sample[0] for sample in everything)
+        return {
+            'requests': total['requests'],
+            'errors': total['errors'],
+            'duration_s': round(duration, 3),
+            'throughput_rps': round(len(everything) / duration, 1),
+            'latency_ms': total['latency_ms'],
+            'queries': total['queries'],
+            'routes': {
+                name: summarize(samples[name]) for name in sorted(samples)
+            },
+        }
+
+    def route_titles(self):
+        pages = math.ceil(len(self.title_ids) / api_settings.PAGE_SIZE)
+        page = self.random.randint(1, min(pages, 10))
+        return 'GET', f'/api/v1/titles/?page={page}', None, None
+
+    def route_titles_filter(self):
+        params = self.random.choice((
+            'genre=genre-{}'.format(self.random.randint(1, 20)),
+            'category=category-{}'.format(self.random.randint(1, 10)),
+            'year={}'.format(self.random.randint(1950, 2019)),
+            'name={}'.format(self.random.choice(('ве', 'до', 'сон'))),
+        ))
+        return 'GET', f'/api/v1/titles/?{params}', None, None
+
+    def route_title(self):
+        title_id = self.random.choice(self.title_ids)
+        return 'GET', f'/api/v1/titles/{title_id}/', None, None
+
+    def route_categories(self):
+        return 'GET', '/api/v1/categories/', None, None
+
+    def route_genres(self):
+        return 'GET', '/api/v1/genres/', None, None
+
+    def route_reviews(self):
+        _, title_id = self.random.choice(self.reviews)
+        return 'GET', f'/api/v1/titles/{title_id}/reviews/', None, None
+
+    def route_review(self):
+        review_id, title_id = self.random.choice(self.reviews)
+        path = f'/api/v1/titles/{title_id}/reviews/{review_id}/'
+        return 'GET', path, None, None
+
+    def route_comments(self):
+        review_id, title_id = self.random.choice(self.reviews)
+        path = f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        return 'GET', path, None, None
+
+    def route_users_me(self):
+        return 'GET', '/api/v1/users/me/', None, self.random.choice(self.users)
+
+    def route_signup(self):
+        username = f'signup_{token_hex(6)}'
+        data = {'username': username, 'email': f'{username}@yamdb.fake'}
+        return 'POST', '/api/v1/auth/signup/', data, None
+
+    def route_token(self):
+        # Код подтверждения заводится вне замера, как после регистрации.
+        user = User.objects.create(username=f'token_{token_hex(6)}')
+        code = ConfirmationCode.objects.create(user=user, token=token_hex(16))
+        data = {'username': user.username, 'confirmation_code': code.token}
+        return 'POST', '/api/v1/auth/token/', data, None
+
+    def route_review_create(self):
+        writer, title_id = next(self.writers)
+        data = {'text': 'Отзыв нагрузочного прогона',
+                'score': self.random.randint(1, 10)}
+        path = f'/api/v1/titles/{title_id}/reviews/'
+        return 'POST', path, data, writer
+
+    def route_comment_create(self):
+        review_id, title_id = self.random.choice(self.reviews)
+        path = f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        data = {'text': 'Комментарий нагрузочного прогона'}
+        return 'POST', path, data, self.random.choice(self.users)
+
+    def route_title_update(self):
+        title_id = self.random.choice(self.title_ids)
+        data = {'year': self.random.randint(1950, 2019)}
+        return 'PATCH', f'/api/v1/titles/{title_id}/', data, self.admin
+
+
+class SlowClients:
+    """
+    Маршруты на чтение для clients одновременных медленных клиентов:
+    чтение каждой части ответа занимает delay секунд. WSGI обслуживают
+    workers потоков, как синхронные воркеры gunicorn, ASGI — цикл
+    событий, как uvicorn-воркер.
+    """
+
+    def __init__(self, replay, clients, delay):
+        self.replay = replay
+        self.clients = clients
+        self.delay = delay
+
+    def run(self, requests, warmup=0, routes=None, server='wsgi', workers=3):
+        """Прогрев последовательными запросами, затем замер."""
+        cache.clear()
+        for name in self.replay.choose(warmup, routes):
+            self.replay.request(name)
+        plan = deque(
+            (name, self.replay.prepare(name))
+            for name in self.replay.choose(requests, routes)
+        )
+        samples = defaultdict(list)
+        started = time.perf_counter()
+        if server == 'asgi':
+            asyncio.run(self.run_asgi(plan, samples))
+        else:
+            self.run_wsgi(plan, samples, workers)
+        return self.replay.report(samples, time.perf_counter() - started)
+
+    def run_wsgi(self, plan, samples, workers):
+        application = get_wsgi_application()
+
+        def worker():
+            while True:
+                try:
+                    name, request = plan.popleft()
+                except IndexError:
+                    return
+                result = {}
+
+                def start_response(status, headers):
+                    result['status'] = int(status.split()[0])
+                    result['headers'] = dict(headers)
+
+                started = time.perf_counter()
+                response = application(request.environ, start_response)
+                try:
+                    for _ in response:
+                        time.sleep(self.delay)
+                finally:
+                    response.close()
+                samples[name].append(make_sample(
+                    name, time.perf_counter() - started, result['status'],
+                    result['headers']
+                ))
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    async def run_asgi(self, plan, samples):
+        application = get_asgi_application()
+
+        async def client():
+            while plan:
+                name, request = plan.popleft()
+                started = time.perf_counter()
+                status, headers = await self.asgi_request(
+                    application, request.environ
+                )
+                samples[name].append(make_sample(
+                    name, time.perf_counter() - started, status, headers
+                ))
+
+        await asyncio.gather(*(client() for _ in range(self.clients)))
+
+    async def asgi_request(self, application, environ):
+        """GET-запрос к ASGI-приложению: (статус, заголовки)."""
+        headers = [(b'host', b'testserver')]
+        if 'HTTP_AUTHORIZATION' in environ:
+            headers.append(
+                (b'authorization', environ['HTTP_AUTHORIZATION'].encode())
+            )
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'},
+            'http_version': '1.1', 'method': environ['REQUEST_METHOD'],
+            'scheme': 'http', 'path': environ['PATH_INFO'],
+            'query_string': environ['QUERY_STRING'].encode(),
+            'headers': headers, 'server': ('testserver', 80),
+            'client': ('127.0.0.1', 1),
+        }
+        result = {}
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                result['status'] = message['status']
+                result['headers'] = {
+                    name.decode(): value.decode()
+                    for name, value in message['headers']
+                }
+            else:
+                await asyncio.sleep(self.delay)
+
+        await application(scope, receive, send)
+        return result['status'], result['headers']
+
+
+def compare(report, baseline, tolerance):
+    """
+    Регрессии отчёта относительно базового замера: рост числа
+    SQL-запросов и ошибок, рост p95 и падение пропускной способности
+    больше чем на долю tolerance.
+    """
+    problems = []
+    for name, base in baseline['routes'].items():
+        current = report['routes'].get(name)
+        if current is None:
+            continue
+        if (current['queries_max'] or 0) > (base['queries_max'] or 0):
+            problems.append(f'{name}: SQL-запросов {current["queries_max"]} '
+                            f'вместо {base["queries_max"]}')
+        if current['errors'] > base['errors']:
+            problems.append(f'{name}: ошибок {current["errors"]} '
+                            f'вместо {base["errors"]}')
+        p95, base_p95 = current['latency_ms']['p95'], base['latency_ms']['p95']
+        if p95 > base_p95 * (1 + tolerance):
+            problems.append(f'{name}: p95 {p95} мс вместо {base_p95} мс')
+    throughput = report['throughput_rps']
+    if throughput * (1 + tolerance) < baseline['throughput_rps']:
+        problems.append(f'Пропускная способность {throughput} запросов/с '
+                        f'вместо {baseline["throughput_rps"]}')
+    return problems
@@ -0,0 +1,149 @@
+"""
+Учёт SQL-запросов каждого запроса к API.
+
+Middleware считает запросы к БД, их суммарное время и повторяющиеся
+SQL (признак N+1), отдаёт результат в заголовке Server-Timing и в логе
+api.sql. Вьюсеты с QueryBudgetMixin задают бюджет запросов: при его
+превышении в режиме QUERY_BUDGET_STRICT запрос падает с ошибкой
+(так работают тесты), иначе в лог пишется предупреждение.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('api.sql')
+
+# Списки параметров разной длины в IN (...) дают один отпечаток.
+PARAMS_LIST_RE = re.compile(r'%s(?:\s*,\s*%s)+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Запрос к API выполнил больше SQL-запросов, чем разрешено."""
+
+
+def fingerprint(sql):
+    """SQL без значений параметров: одинаков для запросов в цикле."""
+    return PARAMS_LIST_RE.sub('%s, ...', sql)
+
+
+class QueryStats:
+    """Обёртка выполнения SQL, собирающая статистику запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Повторяющиеся запросы: отпечаток -> количество выполнений."""
+        return {
+            sql: count for sql, count in self.fingerprints.items()
+            if count > 1
+        }
+
+
+@contextmanager
+def collect_queries(stats):
+    """Подключает stats к соединениям с БД текущего потока."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            if stats not in connection.execute_wrappers:
+                stack.enter_context(connection.execute_wrapper(stats))
+        yield
+
+
+class SqlInstrumentationMiddleware:
+    # Под ASGI middleware работает в цикле событий. Соединения Django
+    # привязаны к потоку, поэтому запросы считает async-представление
+    # в своём потоке по request.query_stats (api/v1/async_views.py).
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        stats = request.query_stats = QueryStats()
+        with collect_queries(stats):
+            response = self.get_response(request)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = request.query_stats = QueryStats()
+        response = await self.get_response(request)
+        return self.finish(request, response, stats)
+
+    def finish(self, request, response, stats):
+        duration_ms = stats.duration * 1000
+        response['Server-Timing'] = (
+            f'db;dur={duration_ms:.1f};desc="{stats.count} queries"'
+        )
+        self.report(request, response, stats, duration_ms)
+        return response
+
+    def report(self, request, response, stats, duration_ms):
+        budget = getattr(request, 'query_budget', None)
+        over_budget = budget is not None and stats.count > budget
+        duplicates = stats.duplicates
+        level = logging.WARNING if over_budget or duplicates else logging.INFO
+        if logger.isEnabledFor(level):
+            record = {
+                'method': request.method,
+                'path': request.path,
+                'view': getattr(request, 'query_budget_view', None),
+                'status': response.status_code,
+                'queries': stats.count,
+                'db_time_ms': round(duration_ms, 1),
+                'budget': budget,
+                'duplicates': duplicates,
+            }
+            logger.log(level, json.dumps(record, ensure_ascii=False))
+
+        if over_budget and settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(
+                f'{request.method} {request.path}: {stats.count} SQL-запросов '
+                f'при бюджете {budget}'
+            )
+
+
+class QueryBudgetMixin:
+    """
+    Бюджет SQL-запросов вьюсета: число или словарь по action.
+    Для action без бюджета действует QUERY_BUDGET_DEFAULT.
+    """
+    query_budget = None
+
+    def get_query_budget(self):
+        budget = self.query_budget
+        if isinstance(budget, dict):
+            budget = budget.get(getattr(self, 'action', None))
+        if budget is None:
+            return settings.QUERY_BUDGET_DEFAULT
+        return budget
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        django_request = request._request
+        django_request.query_budget = self.get_query_budget()
+        django_request.query_budget_view = type(self).__name__
+        return super().finalize_response(request, response, *args, **kwargs)
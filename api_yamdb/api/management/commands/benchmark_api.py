@@ -0,0 +1,132 @@
+import json
+
+from django.core.management import BaseCommand, CommandError, call_command
+from django.test.utils import override_settings
+
+from ...benchmark import READ_ROUTES, ROUTES, Replay, SlowClients, compare
+
+DATASET_OPTIONS = ('titles', 'reviews', 'users', 'seed', 'skew')
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон API на синтетическом каталоге: '
+        'JSON с пропускной способностью, задержками и SQL-запросами'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1000,
+                            help='Количество произведений')
+        parser.add_argument('--reviews', type=int, default=10000,
+                            help='Количество отзывов (и комментариев)')
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Количество пользователей')
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Количество запросов в замере')
+        parser.add_argument('--warmup', type=int, default=200,
+                            help='Запросы до начала замера')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed данных и смеси запросов')
+        parser.add_argument('--routes', nargs='+', choices=list(ROUTES),
+                            help='Маршруты смеси, по умолчанию все')
+        parser.add_argument('--no-fastpath', action='store_false',
+                            dest='fastpath',
+                            help='Отдавать списки сериализаторами DRF '
+                                 '(VALUES_FASTPATH=False)')
+        parser.add_argument('--clients', type=int, default=0,
+                            help='Одновременные медленные клиенты; '
+                                 'запрашивают только маршруты на чтение')
+        parser.add_argument('--client-delay', type=float, default=0.05,
+                            help='Секунд на чтение каждой части ответа '
+                                 'клиентом')
+        parser.add_argument('--server', choices=('wsgi', 'asgi'),
+                            default='wsgi',
+                            help='Обработчик для --clients: потоки WSGI '
+                                 'или цикл событий ASGI')
+        parser.add_argument('--workers', type=int, default=3,
+                            help='Потоков WSGI для --clients')
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='Перекос популярности произведений '
+                                 '(см. generate_fake_data)')
+        parser.add_argument(
+            '--no-seed-data',
+            action='store_true',
+            help='Не загружать синтетический каталог, '
+                 'использовать данные из БД'
+        )
+        parser.add_argument('--output',
+                            help='Файл для JSON-отчёта, по умолчанию stdout')
+        parser.add_argument('--baseline',
+                            help='JSON-отчёт предыдущего прогона для '
+                                 'сравнения: регрессии завершают команду '
+                                 'с ошибкой')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Допустимое ухудшение задержки и '
+                                 'пропускной способности, доля')
+        parser.add_argument('--noinput', '--no-input', action='store_false',
+                            dest='interactive',
+                            help='Не спрашивать подтверждения')
+
+    def handle(self, *args, **options):
+        if not options['no_seed_data']:
+            self.seed_data(options)
+        try:
+            replay = Replay(options['seed'])
+        except ValueError as error:
+            raise CommandError(error)
+        with override_settings(VALUES_FASTPATH=options['fastpath']):
+            report = self.run(replay, options)
+        report['dataset'] = {key: options[key] for key in DATASET_OPTIONS}
+        report['fastpath'] = options['fastpath']
+        if options['clients']:
+            report['clients'] = {
+                key: options[key]
+                for key in ('clients', 'client_delay', 'server', 'workers')
+            }
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(text + '\n')
+        else:
+            self.stdout.write(text)
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+            problems = compare(report, baseline, options['tolerance'])
+            if problems:
+                raise CommandError(
+                    'Регрессии относительно базового замера:\n'
+                    + '\n'.join(problems)
+                )
+            self.stderr.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run(self, replay, options):
+        if not options['clients']:
+            return replay.run(
+                options['requests'], options['warmup'], options['routes']
+            )
+        routes = options['routes'] or READ_ROUTES
+        writes = set(routes) - set(READ_ROUTES)
+        if writes:
+            raise CommandError(
+                'С --clients доступны только маршруты на чтение: '
+                f'{", ".join(sorted(writes))}'
+            )
+        return SlowClients(
+            replay, options['clients'], options['client_delay']
+        ).run(
+            options['requests'], options['warmup'], routes,
+            options['server'], options['workers']
+        )
+
+    def seed_data(self, options):
+        if options['interactive'] and input(
+            'Данные в БД будут заменены синтетическим каталогом. '
+            "Введите 'yes' для продолжения: "
+        ) != 'yes':
+            raise CommandError('Прогон отменён')
+        call_command(
+            'generate_fake_data', '--insert', interactive=False,
+            **{key: options[key] for key in DATASET_OPTIONS}
+        )
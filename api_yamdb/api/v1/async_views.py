@@ -0,0 +1,81 @@
+"""
+async-представления для ASGI.
+
+Django 3.2 выполняет ORM только синхронно, а синхронные представления
+под ASGI запускает через sync_to_async(thread_sensitive=True) в одном
+общем потоке на процесс: запросы к БД всех клиентов идут по очереди.
+async-представление открывает для запроса ThreadSensitiveContext, и
+представление DRF выполняется в собственном потоке запроса — запросы к
+БД разных клиентов идут параллельно, а все обращения одного запроса
+остаются в одном потоке. Цикл событий тем временем принимает соединения
+и отдаёт ответы медленным клиентам.
+
+Соединения с БД в Django привязаны к потоку, а поток запроса
+завершается вместе с ним, поэтому соединения закрываются (с пулом
+api_yamdb.db.postgresql — возвращаются в пул) в конце представления.
+Число одновременно выполняемых представлений ограничено
+ASYNC_VIEWS_CONCURRENCY на процесс.
+"""
+import asyncio
+import weakref
+from contextlib import nullcontext
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.urls import URLPattern
+
+from ..instrumentation import collect_queries
+
+_limits = weakref.WeakKeyDictionary()
+
+
+def get_limit():
+    """Семафор одновременно выполняемых представлений цикла событий."""
+    loop = asyncio.get_event_loop()
+    if loop not in _limits:
+        _limits[loop] = asyncio.Semaphore(settings.ASYNC_VIEWS_CONCURRENCY)
+    return _limits[loop]
+
+
+def thread_view(view):
+    """
+    Представление в потоке запроса: учёт SQL-запросов и рендеринг ответа
+    DRF в том же потоке, затем закрытие соединений потока.
+    """
+    def run(request, *args, **kwargs):
+        stats = getattr(request, 'query_stats', None)
+        try:
+            with nullcontext() if stats is None else collect_queries(stats):
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+        finally:
+            connections.close_all()
+        return response
+
+    return run
+
+
+def async_view(view):
+    """async-обёртка синхронного представления DRF."""
+    run = sync_to_async(thread_view(view), thread_sensitive=True)
+
+    async def wrapped_view(request, *args, **kwargs):
+        async with get_limit():
+            async with ThreadSensitiveContext():
+                return await run(request, *args, **kwargs)
+
+    for attr in ('csrf_exempt', 'cls', 'initkwargs', 'actions'):
+        if hasattr(view, attr):
+            setattr(wrapped_view, attr, getattr(view, attr))
+    return wrapped_view
+
+
+def async_urlpatterns(patterns):
+    """Маршруты с async-представлениями вместо синхронных."""
+    return [
+        URLPattern(pattern.pattern, async_view(pattern.callback),
+                   pattern.default_args, pattern.name)
+        for pattern in patterns
+    ]
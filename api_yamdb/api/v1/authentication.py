@@ -0,0 +1,180 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from reviews.models import User
+
+# Поля пользователя, которые передаются в токене. Изменение любого
+# из них отзывает выданные пользователю токены.
+USER_CLAIMS = ('username', 'role', 'is_superuser', 'is_staff')
+REVOKED_USER_KEY = 'auth:revoked:user:{}'
+REVOKED_TOKEN_KEY = 'auth:revoked:token:{}'
+USER_STATE_KEY = 'auth:state:user:{}'
+USER_KEY = 'auth:user:{}'
+
+
+def get_cached_user(user_id):
+    """
+    Пользователь из кеша Django с коротким временем жизни.
+    Нужен там, где мало данных из токена: автор новой записи, профиль.
+    """
+    key = USER_KEY.format(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+            remember_token_state(user_id, user.get_token_state())
+    return user
+
+
+def forget_cached_user(user_id):
+    cache.delete(USER_KEY.format(user_id))
+
+
+def remember_token_state(user_id, state):
+    """
+    Запоминает значения User.TOKEN_FIELDS пользователя; пустой кортеж —
+    пользователь удалён.
+    """
+    cache.set(USER_STATE_KEY.format(user_id), state,
+              settings.USER_CACHE_TIMEOUT)
+
+
+def load_token_state(user_id):
+    """Значения User.TOKEN_FIELDS из БД, если их нет в кеше."""
+    state = User.objects.filter(pk=user_id).values_list(
+        *User.TOKEN_FIELDS
+    ).first() or ()
+    remember_token_state(user_id, state)
+    return state
+
+
+def get_full_user(user):
+    """Строка User для пользователя запроса."""
+    if isinstance(user, User):
+        return user
+    full_user = get_cached_user(user.id)
+    if full_user is None:
+        raise AuthenticationFailed('Пользователь не найден',
+                                   code='user_not_found')
+    return full_user
+
+
+def revoke_user_tokens(user_id, state=()):
+    """
+    Отзывает все токены пользователя, выданные до текущего момента.
+    state — новые значения User.TOKEN_FIELDS, пустой кортеж для
+    удалённого пользователя.
+    """
+    cache.set(REVOKED_USER_KEY.format(user_id), time.time(),
+              _token_lifetime())
+    remember_token_state(user_id, state)
+    forget_cached_user(user_id)
+
+
+def revoke_token(token):
+    """Отзывает один токен по его jti до истечения срока действия."""
+    cache.set(REVOKED_TOKEN_KEY.format(token[api_settings.JTI_CLAIM]), True,
+              _token_lifetime())
+
+
+def _token_lifetime():
+    return int(max(
+        api_settings.ACCESS_TOKEN_LIFETIME,
+        api_settings.REFRESH_TOKEN_LIFETIME,
+    ).total_seconds())
+
+
+class UserRefreshToken(RefreshToken):
+    """Токен с ролью пользователя и временем выдачи в claims."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['iat'] = time.time()
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        remember_token_state(user.pk, user.get_token_state())
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """
+    Пользователь, собранный из claims токена без запроса к БД.
+    Повторяет свойства модели User, которые проверяют разрешения.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+    @property
+    def is_admin(self):
+        return self.is_superuser or self.role == User.ADMIN
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без чтения пользователя из БД: права проверяются
+    по claims токена, отзыв токенов — по отметкам в кеше и по текущим
+    значениям User.TOKEN_FIELDS. Эти значения кешируются на
+    USER_CACHE_TIMEOUT и при промахе читаются из БД, поэтому
+    блокировка, смена роли или удаление действуют во всех процессах
+    и после вытеснения отметок из кеша.
+    Токены, выданные без claims роли, обрабатываются через кеш строк.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        self.check_revoked(validated_token, user_id)
+        if 'role' in validated_token:
+            return ClaimsUser(validated_token)
+        user = get_cached_user(user_id)
+        if user is None or not user.is_active:
+            raise AuthenticationFailed('Пользователь не найден',
+                                       code='user_not_found')
+        return user
+
+    def check_revoked(self, validated_token, user_id):
+        user_key = REVOKED_USER_KEY.format(user_id)
+        token_key = REVOKED_TOKEN_KEY.format(
+            validated_token.get(api_settings.JTI_CLAIM)
+        )
+        state_key = USER_STATE_KEY.format(user_id)
+        cached = cache.get_many([user_key, token_key, state_key])
+        issued_at = validated_token.get('iat', 0)
+        if token_key in cached or (
+            user_key in cached and issued_at < cached[user_key]
+        ):
+            raise AuthenticationFailed('Токен отозван',
+                                       code='token_revoked')
+        state = cached.get(state_key)
+        if state is None:
+            state = load_token_state(user_id)
+        if not self.matches_state(validated_token, state):
+            raise AuthenticationFailed('Токен отозван',
+                                       code='token_revoked')
+
+    @staticmethod
+    def matches_state(validated_token, state):
+        """Пользователь существует, активен и claims токена актуальны."""
+        if not state:
+            return False
+        state = dict(zip(User.TOKEN_FIELDS, state))
+        return state['is_active'] and all(
+            validated_token[claim] == state[claim]
+            for claim in USER_CLAIMS if claim in validated_token
+        )
@@ -0,0 +1,86 @@
+import time
+from functools import wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_MODIFIED_KEY = 'catalog:modified'
+
+
+def get_catalog_state():
+    """
+    Версия каталога и время его последнего изменения в секундах.
+    Версия входит в ключи кеша и ETag, поэтому её смена делает старые
+    записи недоступными без перебора ключей; время изменения отдаётся
+    в Last-Modified и не обгоняет часы.
+    """
+    state = cache.get_many([CATALOG_VERSION_KEY, CATALOG_MODIFIED_KEY])
+    if len(state) < 2:
+        _init_catalog_state()
+        state = cache.get_many([CATALOG_VERSION_KEY, CATALOG_MODIFIED_KEY])
+    return state[CATALOG_VERSION_KEY], state[CATALOG_MODIFIED_KEY]
+
+
+def _init_catalog_state():
+    # После очистки или вытеснения ключей версия начинается с текущего
+    # времени в миллисекундах, чтобы не совпасть с прежними версиями.
+    now = time.time()
+    cache.add(CATALOG_VERSION_KEY, int(now * 1000), None)
+    cache.add(CATALOG_MODIFIED_KEY, int(now), None)
+
+
+def _bump_catalog_version():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        _init_catalog_state()
+        cache.incr(CATALOG_VERSION_KEY)
+    cache.set(CATALOG_MODIFIED_KEY, int(time.time()), None)
+
+
+def invalidate_catalog_cache():
+    """
+    Сбрасывает кеш каталога сразу и ещё раз после коммита транзакции:
+    ответы, закешированные параллельными запросами до коммита,
+    иначе остались бы доступны по новой версии.
+    """
+    _bump_catalog_version()
+    transaction.on_commit(_bump_catalog_version)
+
+
+def catalog_cache(view_func):
+    """
+    Кеширует данные ответа по полному URL с query-параметрами
+    и отвечает 304 на условные запросы с ETag/Last-Modified.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        version, modified = get_catalog_state()
+        path = request.get_full_path()
+        digest = md5(f'{version}:{path}'.encode('utf-8')).hexdigest()
+        etag = f'"{digest}"'
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=modified
+        )
+        if response is None:
+            key = f'catalog:{digest}'
+            data = cache.get(key)
+            if data is None:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+            else:
+                response = Response(data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified)
+        return response
+
+    return wrapper
@@ -0,0 +1,178 @@
+"""
+Сериализация списков по строкам .values() без полей DRF.
+
+ValuesSerializer выводит то же, что и его сериализатор DRF, но читает
+словари .values() вместо моделей. Для каждого набора ?fields=/?expand=
+один раз строится план: пути .values() и колонки, которые достают
+значение поля из строки. Если у поля нет колонки, список отдаёт
+обычный сериализатор.
+"""
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from rest_framework.response import Response
+
+DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+class Column:
+    """Поле ответа — значение одного пути .values()."""
+
+    def __init__(self, path):
+        self.path = path
+        self.paths = (path,)
+
+    def prefetch(self, rows):
+        """Дозагружает данные колонки для всей страницы."""
+
+    def get(self, row):
+        return row[self.path]
+
+
+class DateTimeColumn(Column):
+
+    def get(self, row):
+        return row[self.path].strftime(DATETIME_FORMAT)
+
+
+class AverageColumn(Column):
+    """Среднее sum / count или None, если count равен нулю."""
+
+    def __init__(self, sum_path, count_path):
+        self.sum_path, self.count_path = sum_path, count_path
+        self.paths = (sum_path, count_path)
+
+    def get(self, row):
+        count = row[self.count_path]
+        if not count:
+            return None
+        return row[self.sum_path] / count
+
+
+class NestedColumn(Column):
+    """
+    Вложенный объект из полей связанной модели; None, если
+    внешний ключ null_path пуст.
+    """
+
+    def __init__(self, null_path, **fields):
+        self.null_path = null_path
+        self.fields = tuple(fields.items())
+        self.paths = (null_path, *fields.values())
+
+    def get(self, row):
+        if row[self.null_path] is None:
+            return None
+        return {name: row[path] for name, path in self.fields}
+
+
+class RelatedListColumn(Column):
+    """
+    Список связанных объектов: один запрос к queryset на страницу,
+    как при prefetch_related. key — поле queryset со ссылкой
+    на первичный ключ строки pk_path.
+    """
+
+    def __init__(self, queryset, key, pk_path='id', **fields):
+        self.queryset = queryset
+        self.key = key
+        self.pk_path = pk_path
+        self.fields = tuple(fields.items())
+        self.paths = (pk_path,)
+
+    def prefetch(self, rows):
+        if not rows:
+            return
+        related = defaultdict(list)
+        items = self.queryset.filter(
+            **{f'{self.key}__in': [row[self.pk_path] for row in rows]}
+        ).values(self.key, *(path for _, path in self.fields))
+        for item in items:
+            related[item[self.key]].append(
+                {name: item[path] for name, path in self.fields}
+            )
+        # Ключ — сама колонка: он не совпадёт с путями .values().
+        for row in rows:
+            row[self] = related[row[self.pk_path]]
+
+    def get(self, row):
+        return row[self]
+
+
+class ValuesSerializer:
+    """
+    Сериализатор только для чтения по строкам .values().
+    serializer_class — сериализатор DRF, чей вывод повторяется,
+    columns — колонки его полей.
+    """
+    serializer_class = None
+    columns = {}
+
+    def __init__(self, columns, required_paths):
+        self.fields = tuple(
+            (name, column.get) for name, column in columns
+        )
+        self.prefetches = tuple(column.prefetch for _, column in columns)
+        paths = dict.fromkeys(required_paths)
+        for _, column in columns:
+            paths.update(dict.fromkeys(column.paths))
+        self.paths = tuple(paths)
+
+    @classmethod
+    def compile(cls, fields, expand, required_paths):
+        """План для набора полей или None, если поле без колонки."""
+        return cls._compile(
+            frozenset(fields or ()), frozenset(expand),
+            tuple(required_paths)
+        )
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def _compile(cls, fields, expand, required_paths):
+        names = [
+            name for name in cls.serializer_class.Meta.fields
+            if cls.serializer_class.is_selected(name, fields, expand)
+        ]
+        if any(name not in cls.columns for name in names):
+            return None
+        return cls(
+            [(name, cls.columns[name]) for name in names], required_paths
+        )
+
+    def serialize(self, rows):
+        rows = list(rows)
+        for prefetch in self.prefetches:
+            prefetch(rows)
+        fields = self.fields
+        return [{name: get(row) for name, get in fields} for row in rows]
+
+
+class ValuesListViewMixin:
+    """
+    Список вьюсета через values_serializer_class. Нужен вместе
+    с SparseFieldsetViewMixin: набор полей берётся из запроса.
+    При VALUES_FASTPATH=False списки отдают сериализаторы DRF.
+    """
+    values_serializer_class = None
+
+    def get_values_serializer(self):
+        values_serializer_class = self.values_serializer_class
+        if values_serializer_class is None or not settings.VALUES_FASTPATH:
+            return None
+        fields, expand = self.get_fieldset()
+        model = values_serializer_class.serializer_class.Meta.model
+        return values_serializer_class.compile(
+            fields, expand, self.get_required_paths(model)
+        )
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        if serializer is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.prefetch_related(None).values(*serializer.paths)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(serializer.serialize(queryset))
+        return self.get_paginated_response(serializer.serialize(page))
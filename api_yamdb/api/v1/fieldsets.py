@@ -0,0 +1,141 @@
+"""
+Выбор полей ответа параметрами ?fields= и ?expand=.
+
+?fields= оставляет в ответе только перечисленные поля, ?expand=
+добавляет необязательные поля сериализатора. Запрос к БД строится
+по тем же полям: ненужные столбцы откладываются через .only(),
+ненужные JOIN и prefetch не выполняются.
+"""
+from django.db.models import Prefetch
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_list_param(request, name):
+    """Значение параметра запроса вида a,b,c как множество."""
+    value = request.query_params.get(name, '')
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Сериализатор с выбором полей. Поля из expandable_fields выводятся
+    только по ?expand=. field_sources задаёт поля модели, которые нужны
+    полю сериализатора; по умолчанию это поле модели с тем же именем.
+    """
+    expandable_fields = ()
+    field_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        expand = self.context.get('expand', set())
+        for name in list(self.fields):
+            if not self.is_selected(name, fields, expand):
+                self.fields.pop(name)
+
+    @classmethod
+    def is_selected(cls, name, fields, expand):
+        if name in cls.expandable_fields:
+            return name in expand
+        return not fields or name in fields
+
+    @classmethod
+    def get_model_paths(cls, names):
+        paths = []
+        for name in names:
+            paths.extend(cls.field_sources.get(name, (name,)))
+        return paths
+
+
+class SparseFieldsetViewMixin:
+    """
+    Вьюсет с параметрами ?fields= и ?expand= для безопасных запросов.
+    Поля первичного ключа и курсорной пагинации загружаются всегда.
+    """
+
+    def get_fieldset(self):
+        """Запрошенные поля и расширения или (None, пустое множество)."""
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = self.parse_fieldset()
+        return self._fieldset
+
+    def parse_fieldset(self):
+        if self.request.method not in permissions.SAFE_METHODS:
+            return None, set()
+        fields = parse_list_param(self.request, FIELDS_PARAM) or None
+        expand = parse_list_param(self.request, EXPAND_PARAM)
+        if fields is None and not expand:
+            return fields, expand
+        serializer_class = self.get_serializer_class()
+        known = set(serializer_class().get_fields())
+        unknown = (fields or set()) - known
+        unknown |= expand - set(serializer_class.expandable_fields)
+        if unknown:
+            raise ValidationError({
+                FIELDS_PARAM: [
+                    f'Неизвестные поля: {", ".join(sorted(unknown))}'
+                ]
+            })
+        return fields, expand
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields, expand = self.get_fieldset()
+        context.update(fields=fields, expand=expand)
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields, expand = self.get_fieldset()
+        if fields is None and not expand:
+            return queryset
+        serializer_class = self.get_serializer_class()
+        if fields is None:
+            fields = set(serializer_class().get_fields()) - set(
+                serializer_class.expandable_fields
+            )
+        paths = serializer_class.get_model_paths(fields | expand)
+        return self.project(queryset, paths)
+
+    def get_required_paths(self, model):
+        paths = [model._meta.pk.name]
+        ordering = getattr(self.pagination_class, 'keyset_ordering', None)
+        paths.extend(field.lstrip('-') for field in ordering or ())
+        return paths
+
+    def project(self, queryset, paths):
+        """
+        Ограничивает выборку полями paths: связи «многие» подгружаются
+        через prefetch, остальные связи — через JOIN.
+        """
+        model = queryset.model
+        only = self.get_required_paths(model)
+        select, prefetch = [], {}
+        for path in paths:
+            name, _, rest = path.partition('__')
+            field = model._meta.get_field(name)
+            if field.many_to_many or field.one_to_many:
+                prefetch.setdefault(name, [])
+                if rest:
+                    prefetch[name].append(rest)
+                continue
+            if field.is_relation:
+                select.append(name)
+                if not field.concrete and not rest:
+                    continue
+            only.append(path)
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        for name, related_paths in prefetch.items():
+            related_model = model._meta.get_field(name).related_model
+            related = related_model.objects.all()
+            if related_paths:
+                related = related.only(*related_paths)
+            queryset = queryset.prefetch_related(Prefetch(name, related))
+        return queryset.only(*only)
@@ -1,5 +1,7 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
 from reviews.models import Title
+from reviews.search import search
 
 
 class TitleFilter(filters.FilterSet):
@@ -14,3 +16,26 @@ class TitleFilter(filters.FilterSet):
     class Meta:
         model = Title
         fields = ('genre', 'category', 'name', 'year',)
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск по параметру ?search= с сортировкой
+    по релевантности.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search(queryset, query)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Поисковый запрос',
+            'schema': {'type': 'string'},
+        }]
@@ -0,0 +1,206 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная пагинация по паре полей (значение, id).
+
+    Курсор хранит значения полей последней записи страницы, поэтому
+    следующая страница выбирается условием по составному индексу,
+    без OFFSET и без подсчёта общего количества записей. Порядок
+    курсора заменяет любую другую сортировку, в том числе
+    по релевантности поиска ?search=.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Некорректный курсор.'
+    page_size = api_settings.PAGE_SIZE
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.reverse, position = self.decode_cursor(request, queryset.model)
+        self.has_cursor = position is not None
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self.invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.page:
+            return None
+        if self.reverse:
+            if not self.has_cursor:
+                return None
+        elif not self.has_more:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.page:
+            return None
+        if self.reverse:
+            if not self.has_more:
+                return None
+        elif not self.has_cursor:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def keyset_filter(ordering, position):
+        """
+        Условие «строго после позиции» для упорядочивания по двум полям.
+        Нестрогое условие по первому полю задаёт начало диапазона
+        в составном индексе.
+        """
+        (first, second), (first_value, second_value) = ordering, position
+        first_op = 'lt' if first.startswith('-') else 'gt'
+        second_op = 'lt' if second.startswith('-') else 'gt'
+        first, second = first.lstrip('-'), second.lstrip('-')
+        return Q(**{f'{first}__{first_op}e': first_value}) & (
+            Q(**{f'{first}__{first_op}': first_value})
+            | Q(**{first: first_value, f'{second}__{second_op}': second_value})
+        )
+
+    def get_position(self, item):
+        values = []
+        for field in self.ordering:
+            field = field.lstrip('-')
+            value = (item[field] if isinstance(item, dict)
+                     else getattr(item, field))
+            values.append(value.isoformat() if hasattr(value, 'isoformat')
+                          else str(value))
+        return values
+
+    def encode_cursor(self, item, reverse):
+        first_value, second_value = self.get_position(item)
+        query = parse.urlencode(
+            {'r': int(reverse), 'p': first_value, 'i': second_value}
+        )
+        cursor = b64encode(query.encode('utf-8')).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor
+        )
+
+    def decode_cursor(self, request, model):
+        """
+        Направление и позиция из курсора. Значения позиции приводятся
+        к типам полей модели: подделанный курсор даёт 404, а не ошибку
+        в запросе к БД.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        fields = [
+            model._meta.get_field(field.lstrip('-'))
+            for field in self.ordering
+        ]
+        try:
+            query = parse.parse_qs(
+                b64decode(encoded.encode('ascii')).decode('utf-8'),
+                keep_blank_values=True
+            )
+            reverse = bool(int(query['r'][0]))
+            position = tuple(
+                field.to_python(query[key][0])
+                for field, key in zip(fields, ('p', 'i'))
+            )
+        except (TypeError, ValueError, KeyError, UnicodeError,
+                ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+
+class PageOrKeysetPagination(PageNumberPagination):
+    """
+    Пагинация по номеру страницы с опциональным курсорным режимом.
+
+    Курсорный режим включается параметром ``?pagination=cursor``
+    или наличием параметра ``cursor`` в запросе.
+    """
+    mode_query_param = 'pagination'
+    keyset_ordering = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.is_keyset_mode(request):
+            self.keyset = KeysetPagination(self.keyset_ordering)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def is_keyset_mode(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.keyset is not None:
+            return {
+                'previous_url': self.keyset.get_previous_link(),
+                'next_url': self.keyset.get_next_link(),
+            }
+        return super().get_html_context()
+
+    def to_html(self):
+        if self.keyset is not None:
+            self.template = 'rest_framework/pagination/previous_and_next.html'
+        return super().to_html()
+
+
+class TitlePagination(PageOrKeysetPagination):
+    """Пагинация произведений; курсор по (name, id)."""
+    keyset_ordering = ('name', 'id')
+
+
+class PubDatePagination(PageOrKeysetPagination):
+    """Пагинация отзывов и комментариев; курсор по (pub_date, id)."""
+    keyset_ordering = ('-pub_date', '-id')
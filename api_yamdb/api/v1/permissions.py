@@ -27,4 +27,4 @@ class ReviewCommentPermission(permissions.BasePermission):
         return (request.method in permissions.SAFE_METHODS
                 or request.user.is_admin
                 or request.user.is_moderator
-                or request.user.username == obj.author.username)
+                or obj.author_id == request.user.id)
@@ -1,10 +1,19 @@
 import datetime as dt
 
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, connection, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import exceptions, serializers
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueValidator
 from reviews.models import (Category, Comment, ConfirmationCode, Genre, Review,
-                            Title, User)
+                            Title, TitleGenre, TitleStats, User)
+
+from .cache import invalidate_catalog_cache
+from .fastpath import (AverageColumn, Column, DateTimeColumn, NestedColumn,
+                       RelatedListColumn, ValuesSerializer)
+from .fieldsets import SparseFieldsetMixin
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -59,18 +68,26 @@ class ConfirmationCodeSerializer(serializers.ModelSerializer):
         fields = ('username', 'confirmation_code')
 
     def validate(self, attrs):
-        user = get_object_or_404(User, username=attrs['username'])
+        user = get_object_or_404(
+            User.objects.select_related('confirmationcode'),
+            username=attrs['username']
+        )
         try:
-            code = ConfirmationCode.objects.get(user=user)
+            code = user.confirmationcode
         except ConfirmationCode.DoesNotExist:
             raise exceptions.ValidationError(
                 'Отсутствует confirmation code'
             )
-        if code.token != attrs['confirmation_code']:
+        # Код удаляется только при совпадении: из двух одновременных
+        # запросов с одним кодом токен получит только один.
+        deleted, _ = ConfirmationCode.objects.filter(
+            pk=code.pk, token=attrs['confirmation_code']
+        ).delete()
+        if not deleted:
             raise exceptions.ValidationError(
                 'Некорректный confirmation code'
             )
-        code.delete()
+        attrs['user'] = user
         return attrs
 
 
@@ -90,11 +107,48 @@ class GenreSerializer(serializers.ModelSerializer):
         model = Genre
 
 
-class TitleSerializer(serializers.ModelSerializer):
-    """Сериализатор модели Title."""
+class TitleStatsSerializer(serializers.ModelSerializer):
+    """Сериализатор статистики отзывов произведения."""
+    scores = serializers.SerializerMethodField()
+    latest_review_date = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TitleStats
+        fields = ('review_count', 'scores', 'latest_review_date')
+
+    def get_scores(self, obj):
+        return {str(score): count for score, count in obj.scores.items()}
+
+    def get_latest_review_date(self, obj):
+        if obj.latest_review_date is None:
+            return None
+        return obj.latest_review_date.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class TitleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Сериализатор модели Title. Поле stats выводится только
+    по запросу ?expand=stats.
+    """
     rating = serializers.FloatField()
     category = CategorySerializer()
     genre = GenreSerializer(many=True)
+    stats = serializers.SerializerMethodField()
+
+    expandable_fields = ('stats',)
+    field_sources = {
+        'category': ('category__name', 'category__slug'),
+        'genre': ('genre__name', 'genre__slug'),
+        'rating': ('rating_sum', 'rating_count'),
+    }
+
+    def get_stats(self, obj):
+        try:
+            stats = obj.stats
+        except ObjectDoesNotExist:
+            # У произведения ещё не было отзывов.
+            stats = TitleStats(title=obj)
+        return TitleStatsSerializer(stats).data
 
     class Meta:
         fields = (
@@ -105,6 +159,7 @@ class TitleSerializer(serializers.ModelSerializer):
             'category',
             'genre',
             'rating',
+            'stats',
         )
         read_only_fields = (
             'id',
@@ -149,47 +204,266 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         return year
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class TitleBulkListSerializer(serializers.ListSerializer):
+    """
+    Пакетная запись произведений. Слаги категорий и жанров и id
+    обновляемых произведений проверяются одним запросом на каждый вид,
+    произведения и связи с жанрами записываются через bulk_create
+    в одной транзакции. Ошибки возвращаются списком по элементам.
+    """
+    does_not_exist = serializers.SlugRelatedField.default_error_messages[
+        'does_not_exist'
+    ]
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Ожидается список произведений.'
+                ]
+            })
+        if len(data) > settings.TITLES_BULK_MAX_ITEMS:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Не больше {} произведений за запрос.'.format(
+                        settings.TITLES_BULK_MAX_ITEMS
+                    )
+                ]
+            })
+        items, errors = [], []
+        for item in data:
+            try:
+                items.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                items.append(None)
+                errors.append(exc.detail)
+        self.resolve_relations(items, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def resolve_relations(self, items, errors):
+        valid = [item for item in items if item is not None]
+        categories = dict(Category.objects.filter(
+            slug__in={item['category'] for item in valid}
+        ).values_list('slug', 'id'))
+        genres = dict(Genre.objects.filter(
+            slug__in={slug for item in valid for slug in item['genre']}
+        ).values_list('slug', 'id'))
+        ids = [item['id'] for item in valid if 'id' in item]
+        existing = set(Title.objects.filter(
+            id__in=ids
+        ).values_list('id', flat=True)) if ids else set()
+
+        seen = set()
+        for item, item_errors in zip(items, errors):
+            if item is None:
+                continue
+            if item['category'] not in categories:
+                item_errors['category'] = [self.does_not_exist.format(
+                    slug_name='slug', value=item['category']
+                )]
+            missing = [slug for slug in item['genre'] if slug not in genres]
+            if missing:
+                item_errors['genre'] = [
+                    self.does_not_exist.format(slug_name='slug', value=slug)
+                    for slug in missing
+                ]
+            if 'id' in item:
+                if item['id'] not in existing:
+                    item_errors['id'] = ['Произведение не найдено.']
+                elif item['id'] in seen:
+                    item_errors['id'] = ['Произведение указано дважды.']
+                seen.add(item['id'])
+            if not item_errors:
+                item['category_id'] = categories[item['category']]
+                item['genre_ids'] = list(dict.fromkeys(
+                    genres[slug] for slug in item['genre']
+                ))
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            titles = [self.make_title(item) for item in validated_data]
+            self.insert_titles(
+                [title for title in titles if title.pk is None]
+            )
+            updated = {item['id'] for item in validated_data if 'id' in item}
+            if updated:
+                Title.objects.update_rows(
+                    [title for title in titles if title.pk in updated],
+                    ['name', 'description', 'year', 'category']
+                )
+                # Одним DELETE без post_delete на каждую связь, поэтому
+                # кеш каталога сбрасывается здесь же явно.
+                TitleGenre.objects.delete_for_titles(updated)
+            TitleGenre.objects.bulk_create(
+                TitleGenre(title_id_id=title.pk, genre_id_id=genre_id)
+                for title, item in zip(titles, validated_data)
+                for genre_id in item['genre_ids']
+            )
+            invalidate_catalog_cache()
+        for title, item in zip(titles, validated_data):
+            item['id'] = title.pk
+            item.setdefault('description', None)
+        return validated_data
+
+    @staticmethod
+    def make_title(item):
+        return Title(
+            id=item.get('id'),
+            name=item['name'],
+            description=item.get('description'),
+            year=item['year'],
+            category_id=item['category_id'],
+        )
+
+    @staticmethod
+    def insert_titles(titles):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # SQLite не возвращает id из bulk_create: сохраняем
+            # по одному, статистику заводит сигнал post_save.
+            for title in titles:
+                title.save()
+            return
+        Title.objects.bulk_create(titles)
+        TitleStats.objects.bulk_create(
+            TitleStats(title=title) for title in titles
+        )
+
+
+class TitleBulkSerializer(TitleWriteSerializer):
+    """
+    Элемент пакетной записи: произведение с id обновляется целиком,
+    как при PUT, без id — создаётся.
+    """
+    id = serializers.IntegerField(required=False)
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField())
+
+    class Meta(TitleWriteSerializer.Meta):
+        list_serializer_class = TitleBulkListSerializer
+
+
+class TitleBriefSerializer(serializers.ModelSerializer):
+    """Краткое представление произведения для ?expand=title."""
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name')
+
+
+class ReviewBriefSerializer(serializers.ModelSerializer):
+    """Краткое представление отзыва для ?expand=review."""
+
+    class Meta:
+        model = Review
+        fields = ('id', 'text', 'score')
+
+
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Сериализатор для комментариев."""
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
     )
     pub_date = serializers.SerializerMethodField(read_only=True)
+    review = ReviewBriefSerializer(read_only=True)
+
+    expandable_fields = ('review',)
+    field_sources = {
+        'author': ('author__username',),
+        'review': ('review__text', 'review__score'),
+    }
 
     class Meta:
         model = Comment
-        fields = ('id', 'text', 'author', 'pub_date')
+        fields = ('id', 'text', 'author', 'pub_date', 'review')
 
     def get_pub_date(self, obj):
         return obj.pub_date.strftime('%Y-%m-%dT%H:%M:%SZ')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Сериализатор для ревью."""
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
     )
     pub_date = serializers.SerializerMethodField(read_only=True)
+    title = TitleBriefSerializer(read_only=True)
+
+    expandable_fields = ('title',)
+    field_sources = {
+        'author': ('author__username',),
+        'title': ('title__name',),
+    }
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
+        fields = ('id', 'text', 'author', 'score', 'pub_date', 'title')
 
     def get_pub_date(self, obj):
         return obj.pub_date.strftime('%Y-%m-%dT%H:%M:%SZ')
 
-    def validate(self, data):
-        title_id = (
-            self.context['request'].parser_context['kwargs']['title_id']
-        )
-        title = get_object_or_404(Title, id=title_id)
-        if (
-                Review.objects.filter(
-                    title=title, author=self.context['request'].user
-                ).exists()
-                and self.context['request'].method != 'PATCH'
-        ):
-            raise serializers.ValidationError('Вы уже оставляли отзыв!')
-        return data
+    def create(self, validated_data):
+        # Повторный отзыв отсекает ограничение unique_review в БД,
+        # без отдельной проверки перед вставкой. Прочие нарушения
+        # целостности — не ошибка клиента и пробрасываются дальше.
+        try:
+            return super().create(validated_data)
+        except IntegrityError as error:
+            diag = getattr(error.__cause__, 'diag', None)
+            if getattr(diag, 'constraint_name', None) != 'unique_review':
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: ['Вы уже оставляли отзыв!']
+            })
+
+
+class TitleValuesSerializer(ValuesSerializer):
+    """Список произведений по строкам .values(); stats — через DRF."""
+    serializer_class = TitleSerializer
+    columns = {
+        'id': Column('id'),
+        'name': Column('name'),
+        'description': Column('description'),
+        'year': Column('year'),
+        'category': NestedColumn(
+            'category_id', name='category__name', slug='category__slug'
+        ),
+        # Порядок жанров тот же, что у prefetch: Genre.Meta.ordering.
+        'genre': RelatedListColumn(
+            TitleGenre.objects.order_by('genre_id__name'), 'title_id',
+            name='genre_id__name', slug='genre_id__slug'
+        ),
+        'rating': AverageColumn('rating_sum', 'rating_count'),
+    }
+
+
+class ReviewValuesSerializer(ValuesSerializer):
+    """Список отзывов по строкам .values()."""
+    serializer_class = ReviewSerializer
+    columns = {
+        'id': Column('id'),
+        'text': Column('text'),
+        'author': Column('author__username'),
+        'score': Column('score'),
+        'pub_date': DateTimeColumn('pub_date'),
+        'title': NestedColumn('title_id', id='title_id', name='title__name'),
+    }
+
+
+class CommentValuesSerializer(ValuesSerializer):
+    """Список комментариев по строкам .values()."""
+    serializer_class = CommentSerializer
+    columns = {
+        'id': Column('id'),
+        'text': Column('text'),
+        'author': Column('author__username'),
+        'pub_date': DateTimeColumn('pub_date'),
+        'review': NestedColumn(
+            'review_id', id='review_id', text='review__text',
+            score='review__score'
+        ),
+    }
@@ -0,0 +1,50 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Genre, Review, Title, TitleGenre, User
+from reviews.signals import catalog_changed
+
+# Обработчики подключаются при запуске любого процесса Django, включая
+# команды manage.py. Модули с simplejwt и DRF импортируются при первом
+# срабатывании, а не при старте.
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=TitleGenre)
+@receiver(post_delete, sender=TitleGenre)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(m2m_changed, sender=Title.genre.through)
+@receiver(catalog_changed)
+def invalidate_catalog(sender, **kwargs):
+    """Сбрасывает кеш каталога при изменении влияющих на него моделей."""
+    from .cache import invalidate_catalog_cache
+
+    invalidate_catalog_cache()
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_user_tokens(sender, instance, created, **kwargs):
+    """
+    Отзывает токены, claims которых больше не совпадают с пользователем.
+    """
+    if created:
+        return
+    from .authentication import forget_cached_user, revoke_user_tokens
+
+    if getattr(instance, '_token_state', None) != instance.get_token_state():
+        revoke_user_tokens(instance.pk, instance.get_token_state())
+        instance._token_state = instance.get_token_state()
+    else:
+        forget_cached_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    from .authentication import revoke_user_tokens
+
+    revoke_user_tokens(instance.pk)
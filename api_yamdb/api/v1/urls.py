@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
+from .async_views import async_urlpatterns
+from .views import (CategoryViewSet, CommentViewSet, ExportView, GenreViewSet,
                     ReviewViewSet, SignUpView, TitleViewSet,
                     TokenObtainPairView, UserViewSet)
 
@@ -26,7 +28,20 @@ auth_patterns = [
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
 ]
 
+export_patterns = [
+    path('', ExportView.as_view(), name='export'),
+    path('<slug:table>/', ExportView.as_view(), name='export_table'),
+]
+
+router_patterns = v1_router.urls
+if settings.ASGI_MODE:
+    # Потоковая выгрузка остаётся синхронной: строки читаются из БД
+    # уже при отдаче ответа, в потоке представления (api/asgi.py).
+    router_patterns = async_urlpatterns(router_patterns)
+    auth_patterns = async_urlpatterns(auth_patterns)
+
 urlpatterns = [
-    path('', include(v1_router.urls)),
+    path('', include(router_patterns)),
     path('auth/', include(auth_patterns)),
+    path('export/', include(export_patterns)),
 ]
@@ -1,8 +1,9 @@
 from secrets import token_hex
 
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status, viewsets
 from rest_framework.decorators import action
@@ -11,53 +12,72 @@ from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import (Category, ConfirmationCode, Genre, Review, Title,
-                            User)
+from reviews.export import (NDJSON_FILENAME, get_table, iter_csv, iter_ndjson,
+                            join_lines)
+from reviews.models import (Category, Comment, ConfirmationCode, Genre,
+                            OutgoingEmail, Review, Title, User)
 
 from api_yamdb import settings
 
-from .filters import TitleFilter
+from ..instrumentation import QueryBudgetMixin
+from .authentication import UserRefreshToken, get_full_user
+from .cache import catalog_cache
+from .fastpath import ValuesListViewMixin
+from .fieldsets import SparseFieldsetViewMixin
+from .filters import FullTextSearchFilter, TitleFilter
+from .pagination import PubDatePagination, TitlePagination
 from .permissions import IsAdminOrReadOnly, ReviewCommentPermission
 from .serializers import (CategorySerializer, CommentSerializer,
-                          ConfirmationCodeSerializer, GenreSerializer,
-                          ReviewSerializer, SignUpSerializer, TitleSerializer,
-                          TitleWriteSerializer, UserMeSerializer,
-                          UserSerializer)
+                          CommentValuesSerializer, ConfirmationCodeSerializer,
+                          GenreSerializer, ReviewSerializer,
+                          ReviewValuesSerializer, SignUpSerializer,
+                          TitleBulkSerializer, TitleSerializer,
+                          TitleValuesSerializer, TitleWriteSerializer,
+                          UserMeSerializer, UserSerializer)
 
 
-class SignUpView(APIView):
+class SignUpView(QueryBudgetMixin, APIView):
     """Класс для регистрации."""
     permission_classes = (AllowAny,)
+    query_budget = 7
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            user = User.objects.get(username=request.data.get('username'))
-            subject = 'Confirmation code'
-            message = token_hex(16)
-            ConfirmationCode.objects.create(
-                user=user,
-                token=message
-            )
-            send_mail(subject, message, settings.EMAIL_HOST_USER,
-                      [request.data.get('email')])
+            # Письмо только ставится в очередь в той же транзакции,
+            # отправляет его команда send_emails.
+            with transaction.atomic():
+                user = serializer.save()
+                subject = 'Confirmation code'
+                message = token_hex(16)
+                ConfirmationCode.objects.create(
+                    user=user,
+                    token=message
+                )
+                OutgoingEmail.objects.create(
+                    subject=subject,
+                    body=message,
+                    from_email=settings.EMAIL_HOST_USER,
+                    recipient=user.email,
+                )
 
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TokenObtainPairView(APIView):
+class TokenObtainPairView(QueryBudgetMixin, APIView):
     """Класс для получения токена."""
     permission_classes = (AllowAny,)
+    query_budget = 4
 
     def post(self, request):
         serializer = ConfirmationCodeSerializer(data=request.data)
-        if serializer.is_valid():
-            user = get_object_or_404(User,
-                                     username=request.data.get('username'))
-            refresh = RefreshToken.for_user(user)
+        with transaction.atomic():
+            is_valid = serializer.is_valid()
+        if is_valid:
+            refresh = UserRefreshToken.for_user(
+                serializer.validated_data['user']
+            )
             data = {
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -69,7 +89,33 @@ class TokenObtainPairView(APIView):
                         status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserViewSet(ModelViewSet):
+class ExportView(QueryBudgetMixin, APIView):
+    """
+    Потоковая выгрузка данных: NDJSON по всем таблицам или CSV одной
+    таблицы в формате load_data_from_csv.
+    """
+    permission_classes = (IsAdminUser,)
+    # Строки читаются уже при отдаче ответа, после подсчёта запросов.
+    query_budget = 1
+
+    def get(self, request, table=None):
+        if table is None:
+            lines = iter_ndjson()
+            content_type, filename = 'application/x-ndjson', NDJSON_FILENAME
+        else:
+            csv_table = get_table(table)
+            if csv_table is None:
+                raise Http404
+            lines = iter_csv(csv_table)
+            content_type, filename = 'text/csv', csv_table.filename
+        response = StreamingHttpResponse(
+            join_lines(lines), content_type=f'{content_type}; charset=utf-8'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class UserViewSet(QueryBudgetMixin, ModelViewSet):
     """Вьюсет для User."""
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -77,10 +123,13 @@ class UserViewSet(ModelViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('username',)
     lookup_field = 'username'
+    query_budget = {'list': 2, 'retrieve': 1, 'me': 2}
 
     @action(detail=False, methods=['get', 'patch'],
             permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
+        if request.method == 'GET':
+            return Response(UserMeSerializer(get_full_user(request.user)).data)
         user = get_object_or_404(User, pk=request.user.id)
         serializer = UserMeSerializer(data=request.data, instance=user,
                                       partial=True)
@@ -90,6 +139,7 @@ class UserViewSet(ModelViewSet):
 
 
 class CategoryGenreViewSet(
+    QueryBudgetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
@@ -101,64 +151,137 @@ class CategoryGenreViewSet(
     search_fields = ('name', 'slug',)
     pagination_class = LimitOffsetPagination
     lookup_field = 'slug'
+    query_budget = {'list': 2}
 
 
+@method_decorator(catalog_cache, name='list')
 class CategoryViewSet(CategoryGenreViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
 
+@method_decorator(catalog_cache, name='list')
 class GenreViewSet(CategoryGenreViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+@method_decorator(catalog_cache, name='list')
+@method_decorator(catalog_cache, name='retrieve')
+class TitleViewSet(QueryBudgetMixin, ValuesListViewMixin,
+                   SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """Класс для модели Title."""
     review = Review.objects.all()
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('name')
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').order_by('name')
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, FullTextSearchFilter)
     filterset_class = TitleFilter
+    pagination_class = TitlePagination
     ordering_fields = ('name', 'year',)
     ordering = ('year',)
+    query_budget = {'list': 3, 'retrieve': 2, 'bulk': 10}
+    values_serializer_class = TitleValuesSerializer
 
     def get_serializer_class(self):
+        if self.action == 'bulk':
+            return TitleBulkSerializer
         if self.request.method in ('POST', 'PATCH', 'PUT',):
             return TitleWriteSerializer
         return TitleSerializer
 
-
-class CommentViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Пакетное создание и обновление произведений."""
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class NestedResourceMixin:
+    """
+    Родительский объект вложенного маршрута (произведение для отзывов,
+    отзыв для комментариев) загружается не больше одного раза за запрос
+    и только там, где он нужен. Списки и отдельные объекты выбираются
+    фильтром по id родителя; существование родителя проверяется,
+    только если выборка оказалась пустой.
+
+    Вьюсет задаёт parent_model и parent_lookup: поля родителя
+    и соответствующие им аргументы маршрута.
+    """
+
+    def get_parent_filter(self):
+        return {
+            field: self.kwargs.get(kwarg)
+            for field, kwarg in self.parent_lookup.items()
+        }
+
+    def get_parent(self):
+        if not hasattr(self, '_parent'):
+            self._parent = get_object_or_404(
+                self.parent_model, **self.get_parent_filter()
+            )
+        return self._parent
+
+    def check_parent_exists(self):
+        if hasattr(self, '_parent'):
+            return
+        if not self.parent_model.objects.filter(
+            **self.get_parent_filter()
+        ).exists():
+            raise Http404
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            self.check_parent_exists()
+        return page
+
+
+class CommentViewSet(QueryBudgetMixin, NestedResourceMixin,
+                     ValuesListViewMixin, SparseFieldsetViewMixin,
+                     viewsets.ModelViewSet):
     """Получение и изменение комментариев."""
     serializer_class = CommentSerializer
+    values_serializer_class = CommentValuesSerializer
     permission_classes = [ReviewCommentPermission]
+    pagination_class = PubDatePagination
+    filter_backends = (FullTextSearchFilter,)
+    parent_model = Review
+    parent_lookup = {'pk': 'review_id', 'title_id': 'title_id'}
+    query_budget = {'list': 2, 'retrieve': 1}
 
     def get_queryset(self, *args, **kwargs):
-        title_id = self.kwargs.get('title_id')
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id, title__id=title_id)
-        return review.comments.all()
+        return Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id'),
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id, title__id=title_id)
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=get_full_user(self.request.user),
+                        review=self.get_parent())
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(QueryBudgetMixin, NestedResourceMixin,
+                    ValuesListViewMixin, SparseFieldsetViewMixin,
+                    viewsets.ModelViewSet):
     """Получение и изменение публикаций."""
     serializer_class = ReviewSerializer
+    values_serializer_class = ReviewValuesSerializer
     permission_classes = [ReviewCommentPermission]
+    pagination_class = PubDatePagination
+    filter_backends = (FullTextSearchFilter,)
+    parent_model = Title
+    parent_lookup = {'pk': 'title_id'}
+    query_budget = {'list': 2, 'retrieve': 1, 'create': 7}
 
     def get_queryset(self, *args, **kwargs):
-        title_id = int(self.kwargs.get('title_id'))
-        title = get_object_or_404(Title, id=title_id)
-        return title.reviews.all()
+        return Review.objects.filter(
+            title_id=self.kwargs.get('title_id')
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=get_full_user(self.request.user),
+                        title=self.get_parent())
@@ -0,0 +1,48 @@
+"""
+Прогрев процесса до форка воркеров gunicorn (preload_app).
+
+Всё, что Django и DRF строят лениво при первом запросе, строится один
+раз в мастер-процессе и достаётся воркерам через copy-on-write: регулярные
+выражения URL-резолвера, кеши метаданных моделей и планы быстрых списков
+для набора полей по умолчанию. Поля сериализаторов DRF создаются заново
+для каждого экземпляра, поэтому не прогреваются. К базе данных прогрев
+не обращается.
+"""
+from django.apps import apps
+from django.urls import URLResolver, get_resolver
+
+
+def iter_views(patterns):
+    """Классы представлений DRF из маршрутов."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_views(pattern.url_patterns)
+            continue
+        view_class = getattr(pattern.callback, 'cls', None)
+        if view_class is not None:
+            yield view_class
+
+
+def warm_up():
+    """Прогревает резолвер, метаданные моделей и планы быстрых списков."""
+    resolver = get_resolver()
+    # Заполнение обратного словаря компилирует регулярные выражения
+    # всех маршрутов.
+    resolver.reverse_dict
+    # Списки полей и обратных связей, по которым сериализаторы DRF
+    # строят поля на каждый запрос.
+    for model in apps.get_models():
+        opts = model._meta
+        opts.get_fields()
+        opts.related_objects
+        opts.fields_map
+    for view_class in set(iter_views(resolver.url_patterns)):
+        values_serializer_class = getattr(
+            view_class, 'values_serializer_class', None
+        )
+        if values_serializer_class is None:
+            continue
+        model = values_serializer_class.serializer_class.Meta.model
+        values_serializer_class.compile(
+            None, set(), view_class().get_required_paths(model)
+        )
@@ -0,0 +1,6 @@
+"""Маршруты воркера только для API (API_ONLY)."""
+from django.urls import include, path
+
+urlpatterns = [
+    path('api/', include('api.urls')),
+]
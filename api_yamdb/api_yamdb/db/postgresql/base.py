@@ -0,0 +1,164 @@
+"""
+Бэкенд PostgreSQL с проверкой постоянных соединений и пулом процесса.
+
+CONN_HEALTH_CHECKS: соединение, пережившее HTTP-запрос (CONN_MAX_AGE > 0),
+перед первым обращением к базе в следующем запросе проверяется через
+SELECT 1 и при обрыве открывается заново — вместо ошибки у клиента.
+
+POOL_SIZE > 0 включает пул: соединение берётся из пула при первом
+обращении к базе и возвращается в него, когда Django закрывает
+соединение в конце запроса. Потоки gthread-воркера делят POOL_SIZE
+соединений, а не держат по соединению на поток. POOL_TIMEOUT — сколько
+секунд ждать свободного соединения.
+"""
+import queue
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+Database = base.Database
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Соединения psycopg2, не больше size одновременно выданных."""
+
+    def __init__(self, size, timeout):
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self, connect, check=None):
+        """
+        Свободное соединение из пула или новое через connect().
+        Соединения, не прошедшие check, закрываются.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise Database.OperationalError(
+                'Нет свободных соединений в пуле'
+            )
+        try:
+            while True:
+                try:
+                    connection = self._idle.get_nowait()
+                except queue.Empty:
+                    return connect()
+                if check is None or check(connection):
+                    return connection
+                connection.close()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, discard=False):
+        """Возвращает соединение в пул; сломанное закрывает."""
+        try:
+            if not discard and self.reset(connection):
+                self._idle.put(connection)
+            else:
+                connection.close()
+        finally:
+            self._slots.release()
+
+    def reset(self, connection):
+        # Незавершённая транзакция не должна достаться следующему запросу.
+        if connection.closed:
+            return False
+        try:
+            if (connection.get_transaction_status()
+                    != extensions.TRANSACTION_STATUS_IDLE):
+                connection.rollback()
+        except Database.Error:
+            return False
+        return True
+
+    def close(self):
+        """Закрывает свободные соединения."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def get_pool(conn_params, size, timeout):
+    """Пул процесса для набора параметров подключения."""
+    key = (size, timeout, tuple(sorted(conn_params.items())))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(size, timeout)
+        return _pools[key]
+
+
+def close_pools():
+    """Закрывает свободные соединения всех пулов процесса."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+
+
+def is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+    except Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_done = False
+    pool = None
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def get_new_connection(self, conn_params):
+        size = self.settings_dict.get('POOL_SIZE')
+        if not size:
+            return super().get_new_connection(conn_params)
+        self.pool = get_pool(
+            conn_params, size, self.settings_dict.get('POOL_TIMEOUT', 10)
+        )
+        connection = self.pool.acquire(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            ),
+            is_usable if self.health_check_enabled else None
+        )
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def connect(self):
+        # Свежее соединение проверять незачем.
+        self.health_check_done = True
+        super().connect()
+
+    def ensure_connection(self):
+        if (self.connection is not None and self.health_check_enabled
+                and not self.health_check_done
+                and not self.in_atomic_block):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Соединение переживает запрос: проверить перед следующим.
+        self.health_check_done = False
+
+    def _close(self):
+        if self.pool is None:
+            return super()._close()
+        pool, self.pool = self.pool, None
+        with self.wrap_database_errors:
+            return pool.release(self.connection, self.errors_occurred)
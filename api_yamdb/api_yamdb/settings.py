@@ -26,12 +26,13 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'django_filters',
-    'api',
-    'reviews',
+    'api.apps.ApiConfig',
+    'reviews.apps.ReviewsConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.instrumentation.SqlInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -42,6 +43,28 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'api_yamdb.urls'
 
+# Воркер только для API (API_ONLY=True). API аутентифицирует по JWT,
+# поэтому админка, сессии, сообщения и CSRF ему не нужны: их приложения
+# и middleware не загружаются, маршруты — только /api/
+API_ONLY = os.getenv('API_ONLY', default='False') == 'True'
+if API_ONLY:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS if app not in (
+            'django.contrib.admin',
+            'django.contrib.sessions',
+            'django.contrib.messages',
+        )
+    ]
+    MIDDLEWARE = [
+        middleware for middleware in MIDDLEWARE if middleware not in (
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.middleware.csrf.CsrfViewMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'django.contrib.messages.middleware.MessageMiddleware',
+        )
+    ]
+    ROOT_URLCONF = 'api_yamdb.api_urls'
+
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 TEMPLATES = [
     {
@@ -53,16 +76,26 @@ TEMPLATES = [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
+            ] + ([] if API_ONLY else [
                 'django.contrib.messages.context_processors.messages',
-            ],
+            ]),
         },
     },
 ]
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# Запуск через api_yamdb.asgi: маршруты API, кроме выгрузки, обслуживают
+# async-представления (api/v1/async_views.py)
+ASGI_MODE = os.getenv('ASGI_MODE', default='False') == 'True'
+# Сколько async-представлений процесса выполняется одновременно
+ASYNC_VIEWS_CONCURRENCY = int(os.getenv('ASYNC_VIEWS_CONCURRENCY', default=32))
+
 # Database
 
+# Размер пула соединений процесса, 0 — без пула (см. api_yamdb.db.postgresql)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', default=0))
+
 DATABASES = {
     'default': {
         'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
@@ -70,10 +103,34 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default=5432)
+        'PORT': os.getenv('DB_PORT', default=5432),
+        # Сколько секунд соединение живёт между запросами; с пулом
+        # соединение возвращается в пул после каждого запроса. Под ASGI
+        # у каждого запроса свой поток и соединения не переиспользуются,
+        # поэтому там нужен пул
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=0 if DB_POOL_SIZE or ASGI_MODE else 60)),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', default='True') == 'True',
+        'POOL_SIZE': DB_POOL_SIZE,
+        'POOL_TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
     }
 }
 
+# Первичные ключи существующих таблиц — integer, миграция на bigint
+# переписала бы таблицы целиком
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+
+# Время жизни закешированных ответов каталога, в секундах
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', default=300))
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -116,11 +173,15 @@ AUTH_USER_MODEL = 'reviews.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication'
+        'api.v1.authentication.ClaimsJWTAuthentication'
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.'
                                 'PageNumberPagination',
     'PAGE_SIZE': 5,
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.v1.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 SIMPLE_JWT = {
@@ -128,6 +189,37 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Бюджет SQL-запросов на запрос к API: в строгом режиме превышение
+# приводит к ошибке, иначе только к предупреждению в логе api.sql.
+QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', default=20))
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', default='') == 'True'
+
+# Списки по строкам .values() без полей DRF (api/v1/fastpath.py).
+VALUES_FASTPATH = os.getenv('VALUES_FASTPATH', default='True') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.sql': {
+            'handlers': ['console'],
+            'level': os.getenv('SQL_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+# Время жизни строк пользователей и их полей из токена в кеше Django.
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', default=30))
+
+# Наибольшее число произведений в одном запросе к titles/bulk/.
+TITLES_BULK_MAX_ITEMS = int(os.getenv('TITLES_BULK_MAX_ITEMS', default=10000))
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 EMAIL_HOST_USER = ''
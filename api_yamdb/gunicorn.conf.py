@@ -0,0 +1,119 @@
+"""
+Настройки gunicorn. Файл читается автоматически при запуске из каталога
+проекта; любой параметр переопределяется переменной окружения GUNICORN_*.
+
+Число воркеров считается от доступных процессору ядер (с учётом квоты
+cgroup в контейнере) и ограничивается памятью: на воркер отводится
+GUNICORN_WORKER_MEMORY_MB. Если памяти на 2 * ядра + 1 воркеров не
+хватает, недостающую параллельность добирают потоки.
+"""
+import math
+import os
+
+CGROUP_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+CGROUP_CPU_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+CGROUP_CPU_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+CGROUP_MEMORY_MAX = '/sys/fs/cgroup/memory.max'
+CGROUP_MEMORY_LIMIT = '/sys/fs/cgroup/memory/memory.limit_in_bytes'
+MAX_THREADS = 8
+
+
+def read_file(path):
+    try:
+        with open(path) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_quota():
+    """Квота процессора cgroup v2 или v1 в ядрах или None."""
+    value = read_file(CGROUP_CPU_MAX)
+    if value:
+        quota, period = value.split()
+    else:
+        quota = read_file(CGROUP_CPU_QUOTA) or 'max'
+        period = read_file(CGROUP_CPU_PERIOD) or '0'
+    if quota in ('max', '-1') or int(period) <= 0:
+        return None
+    return max(1, math.ceil(int(quota) / int(period)))
+
+
+def cpu_count():
+    """Ядра, доступные процессу."""
+    cpus = len(os.sched_getaffinity(0))
+    quota = cpu_quota()
+    if quota is None:
+        return cpus
+    return min(cpus, quota)
+
+
+def memory_limit():
+    """Доступная память в байтах: лимит cgroup или MemTotal."""
+    for path in (CGROUP_MEMORY_MAX, CGROUP_MEMORY_LIMIT):
+        value = read_file(path)
+        if value and value.isdigit() and int(value) < 2 ** 60:
+            return int(value)
+    for line in (read_file('/proc/meminfo') or '').splitlines():
+        if line.startswith('MemTotal:'):
+            return int(line.split()[1]) * 1024
+    return None
+
+
+def size_workers(cpus, memory, worker_memory):
+    """Число воркеров и потоков на воркер."""
+    target = 2 * cpus + 1
+    workers = target
+    if memory:
+        workers = max(1, min(target, memory // worker_memory))
+    threads = min(MAX_THREADS, math.ceil(target / workers))
+    return workers, threads
+
+
+def env_int(name, default):
+    """Целое из окружения; пустое значение — default."""
+    return int(os.getenv(name) or default)
+
+
+auto_workers, auto_threads = size_workers(
+    cpu_count(), memory_limit(),
+    env_int('GUNICORN_WORKER_MEMORY_MB', 150) * 1024 * 1024
+)
+
+bind = os.getenv('GUNICORN_BIND', '0:8000')
+workers = env_int('GUNICORN_WORKERS', auto_workers)
+threads = env_int('GUNICORN_THREADS', auto_threads)
+# gthread и при одном потоке: sync-воркер не поддерживает keepalive
+# и закрывает соединение после каждого ответа, а nginx держит
+# постоянные соединения с upstream.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+# Дольше keepalive_timeout upstream в nginx: соединение закрывает nginx,
+# а не воркер посреди следующего запроса.
+keepalive = env_int('GUNICORN_KEEPALIVE', 75)
+# Перезапуск воркера после N запросов ограничивает рост памяти;
+# разброс не даёт всем воркерам перезапуститься одновременно.
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
+
+
+def when_ready(server):
+    """
+    Мастер загрузил приложение: прогрев до форка воркеров. Соединения
+    с БД, открытые при загрузке, закрываются, чтобы воркеры не делили
+    сокеты мастера.
+    """
+    if not server.cfg.preload_app:
+        return
+    from api.warmup import warm_up
+    from django.db import connections
+
+    from api_yamdb.db.postgresql.base import close_pools
+
+    warm_up()
+    connections.close_all()
+    close_pools()
+    server.log.info('Приложение прогрето до форка воркеров')
@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, Review, Title, TitleGenre, User
+from .managers import SCORES
+from .models import (Category, Comment, Genre, OutgoingEmail, Review, Title,
+                     TitleGenre, TitleStats, User)
 
 
 @admin.register(Title)
@@ -10,11 +12,41 @@ class TitleAdmin(admin.ModelAdmin):
         'name',
         'year',
         'category',
+        'rating',
     )
     search_fields = ('name',)
     list_filter = ('year',)
 
 
+@admin.register(TitleStats)
+class TitleStatsAdmin(admin.ModelAdmin):
+    """
+    Админка статистики отзывов, только просмотр: статистику ведут
+    сигналы отзывов и команда rebuild_title_stats.
+    """
+    list_display = (
+        'title',
+        'review_count',
+        'latest_review_date',
+    )
+    search_fields = ('title__name',)
+    readonly_fields = (
+        'title',
+        'review_count',
+        *(f'score_{score}' for score in SCORES),
+        'latest_review_date',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     """Админка категроий."""
@@ -82,3 +114,19 @@ class UserAdmin(admin.ModelAdmin):
             )
         }),
     )
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """Админка очереди исходящих писем."""
+    list_display = (
+        'recipient',
+        'subject',
+        'created',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    search_fields = ('recipient',)
+    list_filter = ('status', 'sent_at')
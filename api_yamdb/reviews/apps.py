@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class ReviewsConfig(AppConfig):
     name = 'reviews'
-    default_auto_field = 'django.db.models.BigAutoField'
+    default_auto_field = 'django.db.models.AutoField'
+
+    def ready(self):
+        from . import signals  # noqa: F401
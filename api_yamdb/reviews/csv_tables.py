@@ -0,0 +1,96 @@
+"""
+Описание CSV-файлов из static/data и соответствующих им таблиц.
+
+Таблицы перечислены в порядке загрузки: родительские раньше дочерних.
+"""
+import os
+from collections import namedtuple
+
+from django.conf import settings
+
+from .models import Category, Comment, Genre, Review, Title, TitleGenre, User
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+# columns: заголовок столбца CSV -> attname поля модели.
+CsvTable = namedtuple('CsvTable', ('model', 'filename', 'columns'))
+
+CSV_TABLES = (
+    CsvTable(User, 'users.csv', {
+        'id': 'id',
+        'username': 'username',
+        'email': 'email',
+        'role': 'role',
+        'bio': 'bio',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+    }),
+    CsvTable(Genre, 'genre.csv', {
+        'id': 'id',
+        'name': 'name',
+        'slug': 'slug',
+    }),
+    CsvTable(Category, 'category.csv', {
+        'id': 'id',
+        'name': 'name',
+        'slug': 'slug',
+    }),
+    CsvTable(Title, 'titles.csv', {
+        'id': 'id',
+        'name': 'name',
+        'year': 'year',
+        'category': 'category_id',
+        'description': 'description',
+    }),
+    CsvTable(TitleGenre, 'genre_title.csv', {
+        'id': 'id',
+        'title_id': 'title_id_id',
+        'genre_id': 'genre_id_id',
+    }),
+    CsvTable(Review, 'review.csv', {
+        'id': 'id',
+        'title_id': 'title_id',
+        'text': 'text',
+        'author': 'author_id',
+        'score': 'score',
+        'pub_date': 'pub_date',
+    }),
+    CsvTable(Comment, 'comments.csv', {
+        'id': 'id',
+        'review_id': 'review_id',
+        'text': 'text',
+        'author': 'author_id',
+        'pub_date': 'pub_date',
+    }),
+)
+
+
+def is_optional(field):
+    """Столбец поля может отсутствовать в CSV, например в старых выгрузках."""
+    return field.null or field.blank or field.has_default()
+
+
+def get_converters(table):
+    """Поля модели, к типам которых приводятся значения столбцов CSV."""
+    return {
+        column: (attname, table.model._meta.get_field(attname))
+        for column, attname in table.columns.items()
+    }
+
+
+def convert_row(converters, row):
+    """
+    Преобразует строку CSV в словарь значений полей модели. Необязательных
+    столбцов, которых нет в файле, нет и в словаре.
+    """
+    values = {}
+    for column, (attname, field) in converters.items():
+        if column not in row and is_optional(field):
+            continue
+        value = row[column]
+        if value == '' and field.null:
+            value = None
+        else:
+            value = field.to_python(value)
+        values[attname] = value
+    return values
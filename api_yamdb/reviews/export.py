@@ -0,0 +1,89 @@
+"""
+Выгрузка таблиц CSV_TABLES в CSV и NDJSON.
+
+Строки читаются серверным курсором (.iterator(chunk_size)) и сразу
+превращаются в текст, поэтому память не зависит от размера таблиц.
+CSV совпадает по формату с файлами static/data и загружается обратно
+командой load_data_from_csv.
+"""
+import csv
+import datetime as dt
+import json
+import os
+
+from .csv_tables import CSV_TABLES
+
+CHUNK_SIZE = 2000
+NDJSON_FILENAME = 'catalog.ndjson'
+
+
+class Echo:
+    """Файлоподобный объект: csv.writer возвращает готовую строку."""
+
+    def write(self, value):
+        return value
+
+
+def table_name(table):
+    """Имя таблицы в выгрузке: имя CSV-файла без расширения."""
+    return os.path.splitext(table.filename)[0]
+
+
+def get_table(name):
+    """Таблица CSV_TABLES по имени или None."""
+    for table in CSV_TABLES:
+        if table_name(table) == name:
+            return table
+    return None
+
+
+def format_value(value):
+    # Полная точность и суффикс Z, как в исходных CSV.
+    if not isinstance(value, dt.datetime):
+        return value
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        return value[:-6] + 'Z'
+    return value
+
+
+def iter_rows(table, chunk_size=CHUNK_SIZE):
+    """Строки таблицы по возрастанию id: списки значений столбцов."""
+    for row in table.model.objects.order_by('pk').values_list(
+        *table.columns.values()
+    ).iterator(chunk_size=chunk_size):
+        yield [format_value(value) for value in row]
+
+
+def iter_csv(table, chunk_size=CHUNK_SIZE):
+    """Строки CSV таблицы, начиная с заголовка."""
+    writer = csv.writer(Echo(), lineterminator='\n')
+    yield writer.writerow(table.columns)
+    for row in iter_rows(table, chunk_size):
+        yield writer.writerow(row)
+
+
+def iter_ndjson(tables=CSV_TABLES, chunk_size=CHUNK_SIZE):
+    """
+    Строки NDJSON по всем таблицам: {"table": имя, "row": {столбец:
+    значение}}. Таблицы идут в порядке загрузки.
+    """
+    for table in tables:
+        name, columns = table_name(table), list(table.columns)
+        for row in iter_rows(table, chunk_size):
+            yield json.dumps(
+                {'table': name, 'row': dict(zip(columns, row))},
+                ensure_ascii=False
+            ) + '\n'
+
+
+def join_lines(lines, size=CHUNK_SIZE):
+    """Склеивает строки по size штук, чтобы не писать в сокет построчно."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
@@ -0,0 +1,185 @@
+"""
+Синтетический каталог в формате CSV-файлов static/data.
+
+Строки всех таблиц порождаются генераторами, поэтому память не зависит
+от размера каталога: каталог пишется в CSV для load_data_from_csv или
+вставляется в БД командой generate_fake_data. Содержимое определяется
+только параметрами и seed, поэтому замеры на одинаковых параметрах
+сравнимы между запусками.
+
+Популярность распределена по степенному закону с показателем skew:
+произведения с меньшим id собирают большую часть отзывов, отзывы с
+меньшим id — большую часть комментариев. skew=0 — равномерно.
+"""
+import csv
+import datetime as dt
+import os
+import random
+from array import array
+
+from .csv_tables import CSV_TABLES
+from .export import Echo, table_name
+
+CATEGORIES = 10
+GENRES = 20
+MAX_GENRES_PER_TITLE = 3
+FIRST_YEAR = 1950
+START_DATE = dt.datetime(2019, 1, 1, tzinfo=dt.timezone.utc)
+# Смещение первого автора отзывов произведения: простое число,
+# чтобы у разных произведений авторы не совпадали подряд.
+AUTHOR_STEP = 7919
+WORDS = (
+    'вечер', 'тень', 'город', 'море', 'история', 'сад', 'дорога', 'время',
+    'звезда', 'песня', 'ветер', 'дом', 'река', 'сон', 'огонь', 'зима',
+)
+
+
+def format_date(value):
+    # Как в static/data: миллисекунды и суффикс Z.
+    return value.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def power_law_index(rnd, size, skew):
+    """
+    Индекс от 0 до size - 1, вероятность убывает как 1 / (i + 1) ** skew.
+    Обратная функция непрерывного распределения, без таблиц весов.
+    """
+    if not skew:
+        return rnd.randrange(size)
+    u = rnd.random()
+    if skew == 1:
+        value = (size + 1) ** u
+    else:
+        power = 1 - skew
+        value = (1 + u * ((size + 1) ** power - 1)) ** (1 / power)
+    return min(int(value) - 1, size - 1)
+
+
+class LinesFile:
+    """Файлоподобный объект для COPY: читает текст из итератора строк."""
+
+    def __init__(self, lines):
+        self.lines = iter(lines)
+        self.buffer = ''
+
+    def read(self, size=-1):
+        chunks = [self.buffer]
+        length = len(self.buffer)
+        while size < 0 or length < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            chunks.append(line)
+            length += len(line)
+        text = ''.join(chunks)
+        if size < 0:
+            size = length
+        self.buffer = text[size:]
+        return text[:size]
+
+
+class FakeCatalog:
+    """Строки таблиц CSV_TABLES для каталога заданного размера."""
+
+    def __init__(self, titles, reviews, users, seed=0, comments=None,
+                 skew=1.0):
+        if reviews > titles * users:
+            raise ValueError(
+                'Отзывов больше, чем пар произведение — автор'
+            )
+        if comments and not reviews:
+            raise ValueError('Комментариям нужны отзывы')
+        self.titles = titles
+        self.reviews = reviews
+        self.users = users
+        self.seed = seed
+        self.comments = reviews if comments is None else comments
+        self.skew = skew
+
+    def random(self, name):
+        # Отдельный генератор на таблицу: строки таблицы не зависят
+        # от того, какие таблицы уже порождены.
+        return random.Random(f'{self.seed}:{name}')
+
+    def text(self, rnd, words):
+        return ' '.join(rnd.choice(WORDS) for _ in range(words)).capitalize()
+
+    def date(self, rnd):
+        return START_DATE + dt.timedelta(
+            seconds=rnd.randrange(10 ** 8), milliseconds=rnd.randrange(1000)
+        )
+
+    def users_rows(self):
+        for i in range(1, self.users + 1):
+            role = 'admin' if i == 1 else 'user'
+            yield (i, f'user{i}', f'user{i}@yamdb.fake', role, '', '', '')
+
+    def genre_rows(self):
+        for i in range(1, GENRES + 1):
+            yield (i, f'Жанр {i}', f'genre-{i}')
+
+    def category_rows(self):
+        for i in range(1, CATEGORIES + 1):
+            yield (i, f'Категория {i}', f'category-{i}')
+
+    def titles_rows(self):
+        rnd = self.random('titles')
+        for i in range(1, self.titles + 1):
+            yield (i, f'{self.text(rnd, 2)} {i}',
+                   FIRST_YEAR + rnd.randrange(70), rnd.randint(1, CATEGORIES),
+                   self.text(rnd, 12))
+
+    def genre_title_rows(self):
+        rnd = self.random('genre_title')
+        pk = 0
+        for title in range(1, self.titles + 1):
+            count = rnd.randint(1, MAX_GENRES_PER_TITLE)
+            for genre in rnd.sample(range(1, GENRES + 1), count):
+                pk += 1
+                yield (pk, title, genre)
+
+    def review_rows(self):
+        # k-й отзыв на произведение пишет k-й автор после смещения,
+        # поэтому пара произведение — автор не повторяется
+        # (unique_review). Если у произведения уже отзывы всех
+        # пользователей, отзыв достаётся следующему произведению.
+        rnd = self.random('review')
+        counts = array('l', [0]) * self.titles
+        for pk in range(1, self.reviews + 1):
+            title = power_law_index(rnd, self.titles, self.skew)
+            while counts[title] >= self.users:
+                title = (title + 1) % self.titles
+            author = (title * AUTHOR_STEP + counts[title]) % self.users + 1
+            counts[title] += 1
+            yield (pk, title + 1, self.text(rnd, 8), author,
+                   rnd.randint(1, 10), self.date(rnd))
+
+    def comments_rows(self):
+        rnd = self.random('comments')
+        for pk in range(1, self.comments + 1):
+            review = power_law_index(rnd, self.reviews, self.skew) + 1
+            yield (pk, review, self.text(rnd, 6),
+                   rnd.randint(1, self.users), self.date(rnd))
+
+    def rows(self, table):
+        """Строки таблицы: кортежи значений в порядке столбцов CSV."""
+        return getattr(self, f'{table_name(table)}_rows')()
+
+    def iter_csv(self, table):
+        """Строки CSV таблицы, начиная с заголовка."""
+        writer = csv.writer(Echo(), lineterminator='\n')
+        yield writer.writerow(table.columns)
+        for row in self.rows(table):
+            yield writer.writerow(
+                format_date(value) if isinstance(value, dt.datetime)
+                else value
+                for value in row
+            )
+
+    def write(self, path):
+        """Записывает CSV-файлы всех таблиц в каталог path."""
+        os.makedirs(path, exist_ok=True)
+        for table in CSV_TABLES:
+            with open(os.path.join(path, table.filename), 'w',
+                      encoding='utf-8', newline='') as file:
+                file.writelines(self.iter_csv(table))
@@ -0,0 +1,49 @@
+import os
+
+from django.core.management import BaseCommand
+
+from ...csv_tables import CSV_TABLES
+from ...export import CHUNK_SIZE, NDJSON_FILENAME, iter_csv, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгрузка данных из БД в CSV-файлы, которые читает '
+        'load_data_from_csv, или в один файл NDJSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            required=True,
+            help='Каталог для выгрузки, создаётся при необходимости'
+        )
+        parser.add_argument(
+            '--format',
+            choices=('csv', 'ndjson'),
+            default='csv',
+            help='csv — файл на таблицу, ndjson — все таблицы в '
+                 f'{NDJSON_FILENAME}'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Количество строк, читаемых из курсора за раз'
+        )
+
+    def handle(self, *args, **options):
+        path, chunk_size = options['path'], options['chunk_size']
+        os.makedirs(path, exist_ok=True)
+        if options['format'] == 'ndjson':
+            self.write(os.path.join(path, NDJSON_FILENAME),
+                       iter_ndjson(chunk_size=chunk_size))
+            return
+        for table in CSV_TABLES:
+            self.write(os.path.join(path, table.filename),
+                       iter_csv(table, chunk_size))
+
+    def write(self, filename, lines):
+        with open(filename, 'w', encoding='utf-8', newline='') as file:
+            file.writelines(lines)
+        self.stdout.write(f'Выгружено: {filename}')
@@ -0,0 +1,86 @@
+from itertools import islice
+
+from django.core.management import CommandError
+from django.db import connection
+
+from ...fake_data import FakeCatalog, LinesFile
+from .load_data_from_csv import BATCH_SIZE
+from .load_data_from_csv import Command as LoadDataCommand
+from .load_data_from_csv import logger
+
+
+def batches(rows, size):
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(LoadDataCommand):
+    help = (
+        'Синтетический каталог для нагрузочных замеров: CSV-файлы для '
+        'load_data_from_csv или вставка прямо в БД'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Количество пользователей')
+        parser.add_argument('--titles', type=int, default=1000,
+                            help='Количество произведений')
+        parser.add_argument('--reviews', type=int, default=10000,
+                            help='Количество отзывов')
+        parser.add_argument('--comments', type=int,
+                            help='Количество комментариев, по умолчанию '
+                                 'столько же, сколько отзывов')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed: одинаковые параметры дают '
+                                 'одинаковые данные')
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='Показатель степенного закона '
+                                 'популярности, 0 — равномерно')
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--path', help='Каталог для CSV-файлов')
+        target.add_argument('--insert', action='store_true',
+                            help='Заменить данные в БД сгенерированными')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Количество строк в одной вставке')
+        parser.add_argument('--noinput', '--no-input', action='store_false',
+                            dest='interactive',
+                            help='Не спрашивать подтверждения')
+
+    def handle(self, *args, **options):
+        try:
+            self.catalog = FakeCatalog(
+                options['titles'], options['reviews'], options['users'],
+                seed=options['seed'], comments=options['comments'],
+                skew=options['skew'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        if options['path']:
+            self.catalog.write(options['path'])
+            logger.info(f'CSV-файлы записаны в {options["path"]}')
+            return
+        if options['interactive'] and input(
+            'Данные в БД будут заменены синтетическим каталогом. '
+            "Введите 'yes' для продолжения: "
+        ) != 'yes':
+            raise CommandError('Генерация отменена')
+        # Загрузка идёт как в load_data_from_csv, только строки берутся
+        # из генераторов, а не из файлов.
+        super().handle(*args, **dict(
+            options, copy=connection.vendor == 'postgresql',
+            incremental=False
+        ))
+
+    def load_table(self, table, data_dir, batch_size):
+        logger.info(f'Вставка {table.filename} в БД')
+        attnames = list(table.columns.values())
+        rows = (dict(zip(attnames, row)) for row in self.catalog.rows(table))
+        self.insert_batches(table, batches(rows, batch_size), batch_size)
+
+    def copy_table(self, table, data_dir):
+        logger.info(f'Вставка {table.filename} в БД через COPY')
+        self.copy_stream(table, list(table.columns),
+                         LinesFile(self.catalog.iter_csv(table)))
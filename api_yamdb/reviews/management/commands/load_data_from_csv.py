@@ -1,11 +1,19 @@
 import logging
+import os
 import sys
-from csv import DictReader
-from datetime import datetime
+import time
+from csv import DictReader, reader
+from itertools import islice
 
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
 
-from ...models import Category, Comment, Genre, Review, Title, TitleGenre, User
+from ...csv_tables import (CSV_TABLES, DATA_DIR, convert_row, get_converters,
+                           is_optional)
+from ...models import Review, Title, TitleStats, User
+from ...signals import catalog_changed
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -16,131 +24,355 @@ formatter = logging.Formatter(
 )
 handler.setFormatter(formatter)
 
+BATCH_SIZE = 5000
+
+
+def read_batches(path, table, batch_size):
+    """Построчно читает CSV и отдаёт пачки готовых словарей значений."""
+    converters = get_converters(table)
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        csv_reader = DictReader(csv_file)
+        missing = [
+            column for column, (_, field) in converters.items()
+            if column not in (csv_reader.fieldnames or ())
+            and not is_optional(field)
+        ]
+        if missing:
+            raise CommandError(
+                f'{table.filename}: нет столбцов {", ".join(missing)}'
+            )
+        rows = (convert_row(converters, row) for row in csv_reader)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch
+
+
+def loaded_attnames(table, values):
+    """Поля таблицы, значения которых есть в строке CSV."""
+    return [
+        attname for attname in table.columns.values() if attname in values
+    ]
+
 
 class Command(BaseCommand):
     help = 'Загрузка данных в БД'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=DATA_DIR,
+            help='Каталог с CSV-файлами'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество строк в одной вставке'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Загрузка через COPY FROM STDIN (только PostgreSQL)'
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Обновить только изменившиеся строки, не очищая таблицы'
+        )
+
     def handle(self, *args, **options):
+        use_copy = options['copy']
+        if use_copy and options['incremental']:
+            raise CommandError('Режимы --copy и --incremental несовместимы')
+        if use_copy and connection.vendor != 'postgresql':
+            logger.warning(
+                'COPY поддерживается только PostgreSQL, '
+                'используется пакетная загрузка через ORM'
+            )
+            use_copy = False
+
+        with transaction.atomic():
+            self.defer_constraints()
+            if options['incremental']:
+                self.sync_tables(options['path'], options['batch_size'])
+            else:
+                self.clear_tables()
+                for table in CSV_TABLES:
+                    if use_copy:
+                        self.copy_table(table, options['path'])
+                    else:
+                        self.load_table(
+                            table, options['path'], options['batch_size']
+                        )
+                logger.info('Пересчёт рейтинга и статистики произведений')
+                Title.objects.rebuild_rating()
+                TitleStats.objects.rebuild_all(options['batch_size'])
+            self.reset_sequences()
+        catalog_changed.send(sender=self.__class__)
+        logger.info('Загрузка в БД завершена')
+
+    def defer_constraints(self):
+        # Внешние ключи проверяются при коммите, поэтому порядок строк
+        # внутри файлов и между файлами не важен.
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+
+    def clear_tables(self):
         logger.info('Удаление данных в БД')
-        Genre.objects.all().delete()
+        # Таблицы каталога очищаются напрямую, без загрузки объектов
+        # в память и сигналов на каждую строку.
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM {}'.format(
+                connection.ops.quote_name(TitleStats._meta.db_table)
+            ))
+            for table in reversed(CSV_TABLES):
+                if table.model is User:
+                    continue
+                cursor.execute('DELETE FROM {}'.format(
+                    connection.ops.quote_name(table.model._meta.db_table)
+                ))
+        # Удаление пользователей каскадно затрагивает связанные таблицы.
         User.objects.all().delete()
-        Title.objects.all().delete()
-        Category.objects.all().delete()
-        TitleGenre.objects.all().delete()
-        Review.objects.all().delete()
-        Comment.objects.all().delete()
-
-        logger.info('Загрузка пользователей в БД')
-        users = []
-        for row in DictReader(
-            open('./static/data/users.csv', encoding='utf-8')
-        ):
-            users.append(
-                User(
-                    id=row['id'],
-                    username=row['username'],
-                    email=row['email'],
-                    role=row['role'],
-                    bio=row['bio'],
-                    first_name=row['first_name'],
-                    last_name=row['last_name']
-                )
-            )
-        User.objects.bulk_create(users)
 
-        logger.info('Загрузка жанров в БД')
-        genres = []
-        for row in DictReader(
-            open('./static/data/genre.csv', encoding='utf-8')
-        ):
-            genres.append(
-                Genre(
-                    id=row['id'],
-                    name=row['name'],
-                    slug=row['slug']
-                )
-            )
-        Genre.objects.bulk_create(genres)
+    def load_table(self, table, data_dir, batch_size):
+        logger.info(f'Загрузка {table.filename} в БД')
+        self.insert_batches(table, read_batches(
+            os.path.join(data_dir, table.filename), table, batch_size
+        ), batch_size)
 
-        logger.info('Загрузка категорий в БД')
-        categories = []
-        for row in DictReader(
-            open('./static/data/category.csv', encoding='utf-8')
-        ):
-            categories.append(
-                Category(
-                    id=row['id'],
-                    name=row['name'],
-                    slug=row['slug']
-                )
-            )
-        Category.objects.bulk_create(categories)
+    def insert_batches(self, table, batches, batch_size):
+        """
+        Вставляет пачки словарей значений одним INSERT на пачку. Даты
+        из CSV записываются как есть, без auto_now_add моделей.
+        """
+        model = table.model
+        started = time.monotonic()
+        count = 0
+        for batch in batches:
+            self.insert_rows(table, batch)
+            count += len(batch)
+        self.log_speed(model, count, time.monotonic() - started)
 
-        logger.info('Загрузка произведений в БД')
-        titles = []
-        for row in DictReader(
-            open('./static/data/titles.csv', encoding='utf-8')
-        ):
-            titles.append(
-                Title(
-                    id=row['id'],
-                    name=row['name'],
-                    year=row['year'],
-                    category=Category.objects.get(id=row['category'])
-                )
-            )
-        Title.objects.bulk_create(titles)
+    def copy_table(self, table, data_dir):
+        path = os.path.join(data_dir, table.filename)
+        logger.info(f'Загрузка {table.filename} в БД через COPY')
+        with open(path, encoding='utf-8', newline='') as csv_file:
+            header = next(reader(csv_file))
+        with open(path, encoding='utf-8', newline='') as csv_file:
+            self.copy_stream(table, header, csv_file)
 
-        logger.info('Загрузка связей произведения и жанров в БД')
-        titles_genres = []
-        for row in DictReader(
-            open('./static/data/genre_title.csv', encoding='utf-8')
-        ):
-            titles_genres.append(
-                TitleGenre(
-                    id=row['id'],
-                    title_id=Title.objects.get(id=row['title_id']),
-                    genre_id=Genre.objects.get(id=row['genre_id'])
-                )
-            )
-        TitleGenre.objects.bulk_create(titles_genres)
+    def copy_stream(self, table, header, csv_file):
+        """
+        Передаёт CSV в таблицу командой COPY без разбора строк в Python.
+        Если у таблицы есть обязательные столбцы, которых нет в CSV,
+        данные сначала копируются во временную таблицу, а затем
+        переносятся одним INSERT ... SELECT со значениями по умолчанию.
+        """
+        model = table.model
+        started = time.monotonic()
+        fields = [
+            model._meta.get_field(table.columns[name]) for name in header
+        ]
+        defaults = self.get_missing_defaults(
+            table, [field.attname for field in fields]
+        )
+        quote = connection.ops.quote_name
+        db_table = quote(model._meta.db_table)
+        column_list = ', '.join(quote(field.column) for field in fields)
+        # Пустое значение в CSV для COPY означает NULL; для строковых
+        # NOT NULL полей оно должно остаться пустой строкой, как в ORM.
+        not_null = ', '.join(
+            quote(field.column) for field in fields
+            if not field.null and field.empty_strings_allowed
+        )
+        options = 'FORMAT csv, HEADER true'
+        if not_null:
+            options += f', FORCE_NOT_NULL ({not_null})'
 
-        logger.info('Загрузка ревью в БД')
-        reviews = []
-        for row in DictReader(
-            open('./static/data/review.csv', encoding='utf-8')
-        ):
-            reviews.append(
-                Review(
-                    id=row['id'],
-                    title=Title.objects.get(id=row['title_id']),
-                    text=row['text'],
-                    author=User.objects.get(id=row['author']),
-                    score=row['score'],
-                    pub_date=datetime.strptime(
-                        row['pub_date'],
-                        "%Y-%m-%dT%H:%M:%S.%fZ"
-                    )
+        with connection.cursor() as cursor:
+            target = db_table
+            if defaults:
+                target = quote(f'{model._meta.db_table}_copy')
+                cursor.execute(
+                    f'CREATE TEMP TABLE {target} ON COMMIT DROP AS '
+                    f'SELECT {column_list} FROM {db_table} WITH NO DATA'
                 )
+            cursor.copy_expert(
+                f'COPY {target} ({column_list}) '
+                f'FROM STDIN WITH ({options})',
+                csv_file
             )
-        Review.objects.bulk_create(reviews)
+            count = cursor.rowcount
+            if defaults:
+                extra_columns = ', '.join(quote(column) for column in defaults)
+                placeholders = ', '.join(['%s'] * len(defaults))
+                cursor.execute(
+                    f'INSERT INTO {db_table} ({column_list}, {extra_columns}) '
+                    f'SELECT {column_list}, {placeholders} FROM {target}',
+                    list(defaults.values())
+                )
+        self.log_speed(model, count, time.monotonic() - started)
 
-        logger.info('Загрузка комментариев к ревью в БД')
-        comments = []
-        for row in DictReader(
-            open('./static/data/comments.csv', encoding='utf-8')
+    def sync_tables(self, data_dir, batch_size):
+        """
+        Приводит таблицы к содержимому CSV без полной перезагрузки:
+        новые и изменённые строки записываются через INSERT ... ON
+        CONFLICT, отсутствующие в CSV строки удаляются. Неизменённые
+        строки не трогаются, поэтому API продолжает работать с данными.
+        """
+        self.affected_titles = set()
+        seen = [
+            self.sync_table(table, data_dir, batch_size)
+            for table in CSV_TABLES
+        ]
+        for table, ids in reversed(list(zip(CSV_TABLES, seen))):
+            self.delete_missing(table, ids, batch_size)
+
+        logger.info(
+            'Пересчёт рейтинга и статистики произведений: '
+            f'{len(self.affected_titles)}'
+        )
+        affected = sorted(self.affected_titles)
+        for start in range(0, len(affected), batch_size):
+            batch = affected[start:start + batch_size]
+            Title.objects.filter(pk__in=batch).rebuild_rating()
+            TitleStats.objects.rebuild(batch)
+
+    def sync_table(self, table, data_dir, batch_size):
+        model = table.model
+        logger.info(f'Сверка {table.filename} с БД')
+        started = time.monotonic()
+        seen = set()
+        inserted = updated = 0
+        for batch in read_batches(
+            os.path.join(data_dir, table.filename), table, batch_size
         ):
-            comments.append(
-                Comment(
-                    id=row['id'],
-                    review=Review.objects.get(id=row['review_id']),
-                    text=row['text'],
-                    author=User.objects.get(id=row['author']),
-                    pub_date=datetime.strptime(
-                        row['pub_date'],
-                        "%Y-%m-%dT%H:%M:%S.%fZ"
+            ids = [values['id'] for values in batch]
+            attnames = loaded_attnames(table, batch[0])
+            existing = {
+                row[0]: row for row in
+                model.objects.filter(pk__in=ids).values_list(*attnames)
+            }
+            changed = []
+            for values in batch:
+                old = existing.get(values['id'])
+                if old == tuple(values[attname] for attname in attnames):
+                    continue
+                changed.append(values)
+                if old is None:
+                    inserted += 1
+                else:
+                    updated += 1
+                if model is Review:
+                    self.affected_titles.add(values['title_id'])
+                    if old is not None:
+                        self.affected_titles.add(
+                            old[attnames.index('title_id')]
+                        )
+            seen.update(ids)
+            self.insert_rows(table, changed, upsert=True)
+        logger.info(f'{model._meta.db_table}: добавлено {inserted}, '
+                    f'изменено {updated}')
+        self.log_speed(model, len(seen), time.monotonic() - started)
+        return seen
+
+    def insert_rows(self, table, rows, upsert=False):
+        """
+        INSERT строк со столбцами из CSV, с upsert — ON CONFLICT (id)
+        DO UPDATE только этих столбцов. Столбцы, которых нет в CSV,
+        получают значения по умолчанию только у новых строк.
+        """
+        if not rows:
+            return
+        model = table.model
+        quote = connection.ops.quote_name
+        attnames = loaded_attnames(table, rows[0])
+        fields = [model._meta.get_field(attname) for attname in attnames]
+        defaults = self.get_missing_defaults(table, attnames)
+        columns = [field.column for field in fields] + list(defaults)
+        sql = 'INSERT INTO {} ({}) VALUES {{}}'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(column) for column in columns),
+        )
+        if upsert:
+            sql += ' ON CONFLICT ({}) DO UPDATE SET {}'.format(
+                quote(model._meta.pk.column),
+                ', '.join(
+                    f'{quote(field.column)} = EXCLUDED.{quote(field.column)}'
+                    for field in fields if not field.primary_key
+                ),
+            )
+        placeholders = '({})'.format(', '.join(['%s'] * len(columns)))
+        chunk_size = connection.ops.bulk_batch_size(columns, rows)
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                params = []
+                for values in chunk:
+                    params.extend(
+                        field.get_db_prep_save(values[field.attname],
+                                               connection)
+                        for field in fields
                     )
+                    params.extend(defaults.values())
+                cursor.execute(
+                    sql.format(', '.join([placeholders] * len(chunk))),
+                    params
                 )
+
+    def delete_missing(self, table, seen, batch_size):
+        """
+        Удаляет строки, которых больше нет в CSV. Удаление идёт через ORM:
+        при небольшой разнице это дёшево, а каскады и сигналы
+        (рейтинг, кеш каталога) отрабатывают как при обычном удалении.
+        """
+        model = table.model
+        stale = [
+            pk for pk in model.objects.values_list('pk', flat=True).iterator()
+            if pk not in seen
+        ]
+        for start in range(0, len(stale), batch_size):
+            model.objects.filter(
+                pk__in=stale[start:start + batch_size]
+            ).delete()
+        logger.info(f'{model._meta.db_table}: удалено {len(stale)}')
+
+    @staticmethod
+    def get_missing_defaults(table, attnames):
+        """
+        Значения по умолчанию для NOT NULL столбцов, которых нет в CSV;
+        полям с auto_now и auto_now_add — время загрузки.
+        """
+        loaded = set(attnames)
+        now = timezone.now()
+        return {
+            field.column: field.get_db_prep_save(
+                now if getattr(field, 'auto_now', False)
+                or getattr(field, 'auto_now_add', False)
+                else field.get_default(),
+                connection
             )
-        Comment.objects.bulk_create(comments)
-        logger.info('Загрузка в БД завершена')
+            for field in table.model._meta.concrete_fields
+            if not field.primary_key
+            and not field.null
+            and field.attname not in loaded
+        }
+
+    def log_speed(self, model, count, elapsed):
+        logger.info(
+            f'{model._meta.db_table}: {count} строк за {elapsed:.2f} с '
+            f'({count / max(elapsed, 1e-6):.0f} строк/с)'
+        )
+
+    def reset_sequences(self):
+        # Строки вставлены с явными id: сдвигаем последовательности,
+        # чтобы новые объекты не получили уже занятые id.
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [table.model for table in CSV_TABLES]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,13 @@
+from django.core.management import BaseCommand
+
+from ...models import Title
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт хранимого рейтинга произведений по отзывам'
+
+    def handle(self, *args, **options):
+        updated = Title.objects.rebuild_rating()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитан рейтинг произведений: {updated}')
+        )
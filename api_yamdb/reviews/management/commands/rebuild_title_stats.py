@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from ...models import TitleStats
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт статистики отзывов произведений'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество произведений в одном пересчёте'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = TitleStats.objects.rebuild_all(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитана статистика произведений: '
+                               f'{updated}')
+        )
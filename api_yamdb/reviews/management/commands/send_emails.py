@@ -0,0 +1,168 @@
+import logging
+import sys
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from ...models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+handler = logging.StreamHandler(stream=sys.stdout)
+logger.addHandler(handler)
+formatter = logging.Formatter(
+    '%(asctime)s, [%(levelname)s] %(message)s'
+)
+handler.setFormatter(formatter)
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+# Задержка перед повторной попыткой: 30 с, 1 мин, 2 мин... не больше часа.
+RETRY_DELAY = 30
+MAX_RETRY_DELAY = 3600
+# Срок, на который отправитель занимает пачку писем, с.
+LEASE = 600
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой отправки."""
+    return timedelta(
+        seconds=min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+    )
+
+
+class Command(BaseCommand):
+    help = 'Отправка писем из очереди исходящей почты'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество писем, отправляемых за одно соединение'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=MAX_ATTEMPTS,
+            help='Количество попыток отправки одного письма'
+        )
+        parser.add_argument(
+            '--lease',
+            type=int,
+            default=LEASE,
+            help='Через сколько секунд письма, взятые упавшим '
+                 'отправителем, вернутся в очередь'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать новые письма'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза между проверками очереди в режиме --loop, с'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.send_batch(
+                options['batch_size'], options['max_attempts'],
+                options['lease']
+            )
+            if processed == options['batch_size']:
+                continue
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def send_batch(self, batch_size, max_attempts, lease):
+        """
+        Отправляет одну пачку писем через одно соединение с почтовым
+        сервером. Блокировки строк держатся только на время короткой
+        транзакции, которая помечает пачку отправляемой; письма уходят
+        вне транзакции, а результат записывается второй транзакцией.
+        """
+        emails = self.claim(batch_size, max_attempts, lease)
+        if not emails:
+            return 0
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as error:
+            for email in emails:
+                self.fail(email, error)
+        else:
+            try:
+                for email in emails:
+                    self.send(connection, email)
+            finally:
+                connection.close()
+        with transaction.atomic():
+            OutgoingEmail.objects.bulk_update(
+                emails,
+                ['status', 'leased_until', 'next_attempt_at', 'sent_at',
+                 'last_error'],
+            )
+        sent = sum(email.sent_at is not None for email in emails)
+        logger.info(
+            f'Отправлено писем: {sent}, ошибок: {len(emails) - sent}'
+        )
+        return len(emails)
+
+    @staticmethod
+    def claim(batch_size, max_attempts, lease):
+        """
+        Занимает пачку писем на lease секунд. SKIP LOCKED не даёт двум
+        отправителям взять одно письмо; попытка засчитывается сразу,
+        поэтому письмо, на котором отправитель падает, не повторяется
+        бесконечно.
+        """
+        with transaction.atomic():
+            emails = list(
+                OutgoingEmail.objects.pending(max_attempts)
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            leased_until = timezone.now() + timedelta(seconds=lease)
+            for email in emails:
+                email.status = OutgoingEmail.SENDING
+                email.leased_until = leased_until
+                email.attempts += 1
+            OutgoingEmail.objects.bulk_update(
+                emails, ['status', 'leased_until', 'attempts']
+            )
+        return emails
+
+    def send(self, connection, email):
+        message = EmailMessage(
+            email.subject,
+            email.body,
+            email.from_email or None,
+            [email.recipient],
+            connection=connection,
+        )
+        try:
+            message.send()
+        except Exception as error:
+            self.fail(email, error)
+            return
+        email.status = OutgoingEmail.SENT
+        email.leased_until = None
+        email.sent_at = timezone.now()
+        email.last_error = ''
+
+    def fail(self, email, error):
+        email.status = OutgoingEmail.FAILED
+        email.leased_until = None
+        email.last_error = f'{type(error).__name__}: {error}'
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        logger.warning(
+            f'Письмо {email.pk} для {email.recipient} не отправлено '
+            f'(попытка {email.attempts}): {email.last_error}'
+        )
@@ -1,4 +1,12 @@
 from django.contrib.auth.models import UserManager
+from django.db import connection, models
+from django.db.models import (Count, DateTimeField, F, Max, OuterRef, Subquery,
+                              Sum, Value)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+# допустимые оценки произведения
+SCORES = range(1, 11)
 
 
 class CustomUserManager(UserManager):
@@ -19,3 +27,210 @@ class CustomUserManager(UserManager):
             raise ValueError('Superuser must have is_superuser=True.')
 
         return self._create_user(username, email, password, **extra_fields)
+
+
+class TitleQuerySet(models.QuerySet):
+    """Кверисет произведений с поддержкой хранимого рейтинга."""
+
+    def change_rating(self, title_id, score_delta, count_delta=0):
+        """Атомарно сдвигает сумму и количество оценок произведения."""
+        return self.filter(pk=title_id).update(
+            rating_sum=F('rating_sum') + score_delta,
+            rating_count=F('rating_count') + count_delta,
+        )
+
+    def rebuild_rating(self):
+        """Пересчитывает сумму и количество оценок по отзывам."""
+        review_model = self.model._meta.get_field('reviews').related_model
+        reviews = review_model.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0
+            ),
+        )
+
+    def update_rows(self, titles, field_names):
+        """
+        Записывает поля field_names произведений по первичному ключу:
+        один UPDATE ... FROM (VALUES ...) на пачку. В отличие
+        от bulk_update не строит CASE по каждому объекту.
+        """
+        if not titles:
+            return
+        quote = connection.ops.quote_name
+        meta = self.model._meta
+        fields = [meta.pk, *(meta.get_field(name) for name in field_names)]
+        table, pk = quote(meta.db_table), quote(meta.pk.column)
+        columns = ', '.join(quote(field.column) for field in fields)
+        assignments = ', '.join(
+            f'{quote(field.column)} = CAST(v.{quote(field.column)} '
+            f'AS {field.cast_db_type(connection)})'
+            for field in fields[1:]
+        )
+        row = '({})'.format(', '.join(['%s'] * len(fields)))
+        batch_size = connection.ops.bulk_batch_size(fields, titles)
+        with connection.cursor() as cursor:
+            for start in range(0, len(titles), batch_size):
+                batch = titles[start:start + batch_size]
+                cursor.execute(
+                    f'WITH v ({columns}) AS '
+                    f'(VALUES {", ".join([row] * len(batch))}) '
+                    f'UPDATE {table} SET {assignments} '
+                    f'FROM v WHERE {table}.{pk} = v.{pk}',
+                    [
+                        field.get_db_prep_save(
+                            getattr(title, field.attname), connection
+                        )
+                        for title in batch for field in fields
+                    ]
+                )
+
+
+class TitleGenreQuerySet(models.QuerySet):
+    """Кверисет связей произведений с жанрами."""
+
+    def delete_for_titles(self, title_ids):
+        """
+        Удаляет жанры указанных произведений одним DELETE, без
+        загрузки связей и сигналов удаления. Возвращает число строк.
+        """
+        if not title_ids:
+            return 0
+        quote = connection.ops.quote_name
+        meta = self.model._meta
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {quote(meta.db_table)} '
+                f'WHERE {quote(meta.get_field("title_id").column)} '
+                f'= ANY(%s)',
+                [list(title_ids)]
+            )
+            return cursor.rowcount
+
+
+class TitleStatsQuerySet(models.QuerySet):
+    """
+    Кверисет статистики отзывов. Изменения применяются атомарными
+    UPDATE со сдвигом счётчиков, без чтения строки статистики.
+    """
+
+    def add_review(self, title_id, score, pub_date):
+        """Учитывает новый отзыв в статистике произведения."""
+        pub_date = Value(pub_date, output_field=DateTimeField())
+        self._change(
+            title_id,
+            review_count=F('review_count') + 1,
+            latest_review_date=Greatest(
+                Coalesce('latest_review_date', pub_date), pub_date
+            ),
+            **{f'score_{score}': F(f'score_{score}') + 1},
+        )
+
+    def remove_review(self, title_id, score):
+        """Исключает удалённый отзыв из статистики произведения."""
+        review_model = self._review_model()
+        latest = review_model.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title').annotate(
+            latest=Max('pub_date')
+        ).values('latest')
+        self.filter(pk=title_id).update(
+            review_count=F('review_count') - 1,
+            latest_review_date=Subquery(latest),
+            **{f'score_{score}': F(f'score_{score}') - 1},
+        )
+
+    def change_score(self, title_id, old_score, new_score):
+        """Переносит отзыв из одной оценки распределения в другую."""
+        self._change(title_id, **{
+            f'score_{old_score}': F(f'score_{old_score}') - 1,
+            f'score_{new_score}': F(f'score_{new_score}') + 1,
+        })
+
+    def rebuild(self, title_ids):
+        """
+        Пересчитывает статистику указанных произведений по отзывам
+        одним INSERT ... SELECT с группировкой.
+        """
+        if not title_ids:
+            return
+        quote = connection.ops.quote_name
+        meta = self.model._meta
+        title_meta = meta.get_field('title').related_model._meta
+        review_meta = self._review_model()._meta
+        score_columns = [f'score_{score}' for score in SCORES]
+        columns = ['title_id', 'review_count', *score_columns,
+                   'latest_review_date']
+        score_sums = ', '.join(
+            f'SUM(CASE WHEN r.score = {score} THEN 1 ELSE 0 END)'
+            for score in SCORES
+        )
+        placeholders = ', '.join(['%s'] * len(title_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {quote(meta.db_table)} '
+                f'WHERE title_id IN ({placeholders})',
+                title_ids
+            )
+            cursor.execute(
+                f'INSERT INTO {quote(meta.db_table)} '
+                f'({", ".join(quote(column) for column in columns)}) '
+                f'SELECT t.id, COUNT(r.id), {score_sums}, MAX(r.pub_date) '
+                f'FROM {quote(title_meta.db_table)} t '
+                f'LEFT JOIN {quote(review_meta.db_table)} r '
+                f'ON r.title_id = t.id '
+                f'WHERE t.id IN ({placeholders}) GROUP BY t.id',
+                title_ids
+            )
+
+    def rebuild_all(self, batch_size):
+        """Пересчитывает статистику всех произведений пачками по id."""
+        title_model = self.model._meta.get_field('title').related_model
+        title_ids = title_model.objects.order_by('pk').values_list(
+            'pk', flat=True
+        )
+        last_id, total = None, 0
+        while True:
+            batch = title_ids
+            if last_id is not None:
+                batch = batch.filter(pk__gt=last_id)
+            batch = list(batch[:batch_size])
+            if not batch:
+                return total
+            self.rebuild(batch)
+            last_id, total = batch[-1], total + len(batch)
+
+    def _change(self, title_id, **changes):
+        # Строка статистики создаётся при первом отзыве на произведение.
+        if not self.filter(pk=title_id).update(**changes):
+            self.get_or_create(title_id=title_id)
+            self.filter(pk=title_id).update(**changes)
+
+    def _review_model(self):
+        title_model = self.model._meta.get_field('title').related_model
+        return title_model._meta.get_field('reviews').related_model
+
+
+class OutgoingEmailQuerySet(models.QuerySet):
+    """Кверисет очереди исходящих писем."""
+
+    def pending(self, max_attempts):
+        """
+        Неотправленные письма, время попытки которых наступило и которые
+        не заняты другим отправителем.
+        """
+        now = timezone.now()
+        return self.filter(
+            models.Q(leased_until__isnull=True)
+            | models.Q(leased_until__lte=now),
+            sent_at__isnull=True,
+            next_attempt_at__lte=now,
+            attempts__lt=max_attempts,
+        ).order_by('next_attempt_at', 'id')
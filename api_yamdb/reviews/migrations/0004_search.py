@@ -0,0 +1,94 @@
+from django.db import migrations
+
+# Индексируемые поля и их веса: таблица -> ((поле, вес), ...).
+SEARCH_FIELDS = {
+    'reviews_title': (('name', 'A'), ('description', 'B')),
+    'reviews_review': (('text', 'A'),),
+    'reviews_comment': (('text', 'A'),),
+}
+SEARCH_CONFIGS = ('russian', 'english')
+
+
+def postgresql_forward():
+    for table, fields in SEARCH_FIELDS.items():
+        vector = ' || '.join(
+            f"setweight(to_tsvector('{config}', coalesce({field}, '')), "
+            f"'{weight}')"
+            for field, weight in fields
+            for config in SEARCH_CONFIGS
+        )
+        yield (
+            f'ALTER TABLE {table} ADD COLUMN search_vector tsvector '
+            f'GENERATED ALWAYS AS ({vector}) STORED'
+        )
+        yield (
+            f'CREATE INDEX {table}_search_idx ON {table} '
+            'USING gin (search_vector)'
+        )
+
+
+def postgresql_backward():
+    for table in SEARCH_FIELDS:
+        yield f'ALTER TABLE {table} DROP COLUMN search_vector'
+
+
+def sqlite_forward():
+    for table, fields in SEARCH_FIELDS.items():
+        columns = ', '.join(field for field, _ in fields)
+        new = ', '.join(f'new.{field}' for field, _ in fields)
+        old = ', '.join(f'old.{field}' for field, _ in fields)
+        fts = f'{table}_fts'
+        yield (
+            f'CREATE VIRTUAL TABLE {fts} USING fts5({columns}, '
+            f"content='{table}', content_rowid='id', tokenize='unicode61')"
+        )
+        yield (
+            f'CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN '
+            f'INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); '
+            'END'
+        )
+        yield (
+            f'CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN '
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old}); END"
+        )
+        yield (
+            f'CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN '
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old}); "
+            f'INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); '
+            'END'
+        )
+        yield f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"
+
+
+def sqlite_backward():
+    for table in SEARCH_FIELDS:
+        fts = f'{table}_fts'
+        for suffix in ('ai', 'ad', 'au'):
+            yield f'DROP TRIGGER IF EXISTS {fts}_{suffix}'
+        yield f'DROP TABLE IF EXISTS {fts}'
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, tuple)():
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'postgresql': postgresql_forward,
+                 'sqlite': sqlite_forward}),
+            run({'postgresql': postgresql_backward,
+                 'sqlite': sqlite_backward}),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SCORE_SUMS = ', '.join(
+    f'SUM(CASE WHEN r.score = {score} THEN 1 ELSE 0 END)'
+    for score in range(1, 11)
+)
+SCORE_COLUMNS = ', '.join(f'score_{score}' for score in range(1, 11))
+
+
+def fill_stats(apps, schema_editor):
+    schema_editor.execute(
+        f'INSERT INTO reviews_titlestats '
+        f'(title_id, review_count, {SCORE_COLUMNS}, latest_review_date) '
+        f'SELECT t.id, COUNT(r.id), {SCORE_SUMS}, MAX(r.pub_date) '
+        f'FROM reviews_title t LEFT JOIN reviews_review r '
+        f'ON r.title_id = t.id GROUP BY t.id'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleStats',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='reviews.Title', verbose_name='Произведение')),
+                ('review_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('score_1', models.PositiveIntegerField(default=0)),
+                ('score_2', models.PositiveIntegerField(default=0)),
+                ('score_3', models.PositiveIntegerField(default=0)),
+                ('score_4', models.PositiveIntegerField(default=0)),
+                ('score_5', models.PositiveIntegerField(default=0)),
+                ('score_6', models.PositiveIntegerField(default=0)),
+                ('score_7', models.PositiveIntegerField(default=0)),
+                ('score_8', models.PositiveIntegerField(default=0)),
+                ('score_9', models.PositiveIntegerField(default=0)),
+                ('score_10', models.PositiveIntegerField(default=0)),
+                ('latest_review_date', models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего отзыва')),
+            ],
+            options={
+                'verbose_name': 'Title Stats',
+                'verbose_name_plural': 'Title Stats',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['review', 'id'], name='comment_review_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', 'id'], name='review_title_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'name'], name='title_year_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlegenre',
+            index=models.Index(fields=['genre_id', 'title_id'], name='titlegenre_genre_title_idx'),
+        ),
+        # Одиночный индекс по жанру удаляется после создания составного.
+        migrations.AlterField(
+            model_name='titlegenre',
+            name='genre_id',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='reviews.Genre', verbose_name='Название жанра'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:51
+
+from django.db import migrations, models
+
+
+def fill_status(apps, schema_editor):
+    OutgoingEmail = apps.get_model('reviews', 'OutgoingEmail')
+    OutgoingEmail.objects.filter(sent_at__isnull=False).update(status='sent')
+    OutgoingEmail.objects.filter(
+        sent_at__isnull=True, attempts__gt=0
+    ).update(status='failed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='leased_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Занято отправителем до'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='status',
+            field=models.CharField(choices=[('pending', 'В очереди'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Не отправлено')], default='pending', max_length=16, verbose_name='Статус'),
+        ),
+        migrations.RunPython(fill_status, migrations.RunPython.noop),
+    ]
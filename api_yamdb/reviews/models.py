@@ -3,8 +3,11 @@ import datetime as dt
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from reviews.managers import CustomUserManager
+from django.db import models, transaction
+from django.utils import timezone
+from reviews.managers import (SCORES, CustomUserManager, OutgoingEmailQuerySet,
+                              TitleGenreQuerySet, TitleQuerySet,
+                              TitleStatsQuerySet)
 
 # длина вывода текстовой информации для моделей
 STRING_LENGHT: int = 20
@@ -52,17 +55,112 @@ class User(AbstractUser):
     def is_admin(self):
         return self.is_superuser or self.role == self.ADMIN
 
+    # Поля, от которых зависят выданные токены: при их изменении
+    # токены пользователя отзываются.
+    TOKEN_FIELDS = ('username', 'role', 'is_superuser', 'is_staff',
+                    'is_active')
+
     objects = CustomUserManager()
 
     class Meta:
         ordering = ['-id']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._token_state = instance.get_token_state()
+        return instance
+
+    def get_token_state(self):
+        return tuple(self.__dict__.get(field) for field in self.TOKEN_FIELDS)
+
+    def delete(self, *args, **kwargs):
+        # Рейтинг произведений с отзывами пользователя пересчитывается
+        # один раз после каскадного удаления отзывов.
+        from .signals import cascade_delete_reviews
+
+        with transaction.atomic(), cascade_delete_reviews(authors=[self.pk]):
+            return super().delete(*args, **kwargs)
+
 
 class ConfirmationCode(models.Model):
     user = models.OneToOneField('User', on_delete=models.CASCADE)
     token = models.CharField(max_length=255)
 
 
+class OutgoingEmail(models.Model):
+    """
+    Письмо в очереди на отправку. Запрос только сохраняет письмо,
+    отправляет его команда send_emails.
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS = (
+        (PENDING, 'В очереди'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст письма')
+    from_email = models.CharField(
+        max_length=254,
+        blank=True,
+        verbose_name='Отправитель'
+    )
+    recipient = models.EmailField(verbose_name='Получатель')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата постановки в очередь'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Количество попыток'
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Время следующей попытки'
+    )
+    sent_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Дата отправки'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    # Письмо взято отправителем; после этого времени его снова может
+    # взять другой отправитель, если первый не отчитался.
+    leased_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Занято отправителем до'
+    )
+
+    objects = OutgoingEmailQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('next_attempt_at', 'id')
+        verbose_name = 'Outgoing Email'
+        verbose_name_plural = 'Outgoing Emails'
+        indexes = [
+            models.Index(fields=['next_attempt_at', 'id'],
+                         name='outbox_pending_idx',
+                         condition=models.Q(sent_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
+
+
 class Category(models.Model):
     """Модель для категорий. Присваевается одна на произведение"""
     name = models.CharField(max_length=48, verbose_name='Название категории')
@@ -120,14 +218,46 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Жанр'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок'
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Title'
         verbose_name_plural = 'Titles'
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+            # Фильтр ?year= с сортировкой по названию.
+            models.Index(fields=['year', 'name'], name='title_year_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def delete(self, *args, **kwargs):
+        # Отзывы удаляются каскадно без пересчёта рейтинга
+        # удаляемого произведения на каждый отзыв.
+        from .signals import cascade_delete_reviews
+
+        with transaction.atomic(), cascade_delete_reviews(titles=[self.pk]):
+            return super().delete(*args, **kwargs)
+
+    @property
+    def rating(self):
+        """Средняя оценка произведения или None, если отзывов нет."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
 
 class TitleGenre(models.Model):
     """Модель связывающая произведение с жанрами"""
@@ -139,9 +269,13 @@ class TitleGenre(models.Model):
     genre_id = models.ForeignKey(
         Genre,
         on_delete=models.CASCADE,
+        # Индекс по жанру — первый столбец titlegenre_genre_title_idx.
+        db_index=False,
         verbose_name='Название жанра'
     )
 
+    objects = TitleGenreQuerySet.as_manager()
+
     class Meta:
         ordering = ('title_id',)
         verbose_name = 'Title Genre'
@@ -150,11 +284,66 @@ class TitleGenre(models.Model):
             models.UniqueConstraint(fields=['title_id', 'genre_id'],
                                     name=('unique genre')),
         ]
+        indexes = [
+            # Фильтр ?genre=: id произведений берутся из индекса
+            # без чтения таблицы.
+            models.Index(fields=['genre_id', 'title_id'],
+                         name='titlegenre_genre_title_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title_id} относится к жанру {self.genre_id}'
 
 
+class TitleStats(models.Model):
+    """
+    Статистика отзывов произведения: количество, распределение оценок
+    и дата последнего отзыва. Обновляется сигналами отзывов.
+    """
+    title = models.OneToOneField(
+        Title,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        verbose_name='Произведение'
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+    score_6 = models.PositiveIntegerField(default=0)
+    score_7 = models.PositiveIntegerField(default=0)
+    score_8 = models.PositiveIntegerField(default=0)
+    score_9 = models.PositiveIntegerField(default=0)
+    score_10 = models.PositiveIntegerField(default=0)
+    latest_review_date = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Дата последнего отзыва'
+    )
+
+    objects = TitleStatsQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Title Stats'
+        verbose_name_plural = 'Title Stats'
+
+    def __str__(self):
+        return f'{self.title_id}: {self.review_count}'
+
+    @property
+    def scores(self):
+        """Количество отзывов с каждой оценкой от 1 до 10."""
+        return {
+            score: getattr(self, f'score_{score}') for score in SCORES
+        }
+
+
 class Review(models.Model):
     """Модель текстовых отзывов к произведениям."""
     title = models.ForeignKey(
@@ -178,8 +367,8 @@ class Review(models.Model):
     score = models.PositiveIntegerField(
         default=1,
         validators=[
-            MaxValueValidator(10),
-            MinValueValidator(1)
+            MaxValueValidator(SCORES[-1]),
+            MinValueValidator(SCORES[0])
         ],
         verbose_name='Оценка произведения',
         help_text='Оценка произведения'
@@ -199,10 +388,31 @@ class Review(models.Model):
                 fields=['title', 'author'],
             )
         ]
+        indexes = [
+            models.Index(fields=['title', '-pub_date', '-id'],
+                         name='review_title_pub_date_idx'),
+            # Отзывы произведения в порядке по умолчанию (-id).
+            models.Index(fields=['title', 'id'], name='review_title_id_idx'),
+        ]
 
     def __str__(self):
         return self.text[:STRING_LENGHT]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._rating_state = (
+            instance.__dict__.get('title_id'),
+            instance.__dict__.get('score'),
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения обновляется в сигналах сохранения,
+        # поэтому отзыв и рейтинг записываются в одной транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Модель комментария к ревью."""
@@ -233,6 +443,13 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-id']
+        indexes = [
+            models.Index(fields=['review', '-pub_date', '-id'],
+                         name='comment_review_pub_date_idx'),
+            # Комментарии отзыва в порядке по умолчанию (-id).
+            models.Index(fields=['review', 'id'],
+                         name='comment_review_id_idx'),
+        ]
 
     def __str__(self):
         return self.text[:STRING_LENGHT]
@@ -0,0 +1,76 @@
+"""
+Полнотекстовый поиск по произведениям, отзывам и комментариям.
+
+На PostgreSQL у таблиц есть хранимые столбцы search_vector (tsvector
+в русской и английской конфигурациях) с GIN-индексами, на SQLite —
+внешние FTS5-таблицы, поддерживаемые триггерами. Столбцы, индексы
+и триггеры создаёт миграция 0004_search.
+"""
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Comment, Review, Title
+
+# Модель -> индексируемые поля (для поиска без специальных индексов).
+SEARCH_FIELDS = {
+    Title: ('name', 'description'),
+    Review: ('text',),
+    Comment: ('text',),
+}
+SEARCH_CONFIGS = ('russian', 'english')
+SEARCH_VECTOR_COLUMN = 'search_vector'
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def postgresql_query_sql():
+    return ' || '.join(
+        f"websearch_to_tsquery('{config}', %s)" for config in SEARCH_CONFIGS
+    )
+
+
+def sqlite_match_query(query):
+    """Слова запроса как фразы FTS5, чтобы спецсимволы не ломали MATCH."""
+    return ' '.join(
+        '"{}"'.format(word.replace('"', '""')) for word in query.split()
+    )
+
+
+def search(queryset, query):
+    """
+    Оставляет в queryset записи, подходящие под запрос, и упорядочивает
+    их по релевантности (аннотация search_rank).
+    """
+    model = queryset.model
+    table = connection.ops.quote_name(model._meta.db_table)
+    if connection.vendor == 'postgresql':
+        vector = f'{table}.{SEARCH_VECTOR_COLUMN}'
+        tsquery = postgresql_query_sql()
+        params = [query] * len(SEARCH_CONFIGS)
+        queryset = queryset.annotate(
+            search_match=RawSQL(f'{vector} @@ ({tsquery})', params,
+                                output_field=BooleanField()),
+            search_rank=RawSQL(f'ts_rank({vector}, {tsquery})', params,
+                               output_field=FloatField()),
+        ).filter(search_match=True)
+    elif connection.vendor == 'sqlite':
+        fts = fts_table(model)
+        match = sqlite_match_query(query)
+        queryset = queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [match]
+        )).annotate(search_rank=RawSQL(
+            f'(SELECT -bm25({fts}) FROM {fts} '
+            f'WHERE {fts} MATCH %s AND rowid = {table}.id)', [match],
+            output_field=FloatField()
+        ))
+    else:
+        condition = Q()
+        for field in SEARCH_FIELDS[model]:
+            condition |= Q(**{f'{field}__icontains': query})
+        queryset = queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+    return queryset.order_by('-search_rank', 'pk')
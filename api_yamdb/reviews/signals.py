@@ -0,0 +1,101 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import Review, Title, TitleStats
+
+# Отправляется после массовых изменений каталога в обход моделей.
+catalog_changed = Signal()
+
+
+class CascadeState(threading.local):
+    """Произведения и авторы, чьи отзывы сейчас удаляются каскадно."""
+    titles = frozenset()
+    authors = frozenset()
+
+
+_cascade = CascadeState()
+
+
+@contextmanager
+def cascade_delete_reviews(titles=(), authors=()):
+    """
+    Удаление произведений titles или пользователей authors вместе
+    с отзывами. Рейтинг и статистика не пересчитываются на каждый
+    удалённый отзыв: у удаляемых произведений они удаляются целиком,
+    а произведения с отзывами удаляемых авторов пересчитываются
+    по одному разу в конце.
+    """
+    affected = []
+    if authors:
+        affected = sorted(set(
+            Review.objects.filter(author__in=authors).exclude(
+                title__in=titles
+            ).values_list('title_id', flat=True)
+        ))
+    saved = _cascade.titles, _cascade.authors
+    _cascade.titles = saved[0] | frozenset(titles)
+    _cascade.authors = saved[1] | frozenset(authors)
+    try:
+        yield
+    finally:
+        _cascade.titles, _cascade.authors = saved
+    if affected:
+        Title.objects.filter(pk__in=affected).rebuild_rating()
+        TitleStats.objects.rebuild(affected)
+
+
+@receiver(post_save, sender=Title)
+def create_title_stats(sender, instance, created, **kwargs):
+    """Заводит пустую статистику, чтобы отзывы только сдвигали счётчики."""
+    if created:
+        TitleStats.objects.create(title=instance)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, **kwargs):
+    """
+    Учитывает новую или изменённую оценку в рейтинге
+    и статистике произведения.
+    """
+    old_title_id, old_score = getattr(
+        instance, '_rating_state', (None, None)
+    )
+    if created:
+        Title.objects.change_rating(instance.title_id, instance.score, 1)
+        TitleStats.objects.add_review(
+            instance.title_id, instance.score, instance.pub_date
+        )
+    elif old_title_id is None or old_score is None:
+        # Прежняя оценка неизвестна: пересчитываем рейтинг целиком.
+        Title.objects.filter(pk=instance.title_id).rebuild_rating()
+        TitleStats.objects.rebuild([instance.title_id])
+    elif old_title_id != instance.title_id:
+        Title.objects.change_rating(old_title_id, -old_score, -1)
+        Title.objects.change_rating(instance.title_id, instance.score, 1)
+        TitleStats.objects.remove_review(old_title_id, old_score)
+        TitleStats.objects.add_review(
+            instance.title_id, instance.score, instance.pub_date
+        )
+    elif old_score != instance.score:
+        Title.objects.change_rating(
+            instance.title_id, instance.score - old_score
+        )
+        TitleStats.objects.change_score(
+            instance.title_id, old_score, instance.score
+        )
+    instance._rating_state = (instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    """Исключает оценку удалённого отзыва из рейтинга и статистики."""
+    title_id, score = getattr(
+        instance, '_rating_state', (instance.title_id, instance.score)
+    )
+    if title_id in _cascade.titles or instance.author_id in _cascade.authors:
+        return
+    Title.objects.change_rating(title_id, -score, -1)
+    TitleStats.objects.remove_review(title_id, score)
@@ -6,4 +6,9 @@ sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
+    'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_data',
+    'tests.fixtures.fixture_cache',
+    'tests.fixtures.fixture_instrumentation',
+    'tests.fixtures.fixture_explain',
 ]
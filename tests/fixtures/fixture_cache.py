@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Изолирует тесты друг от друга по закешированным ответам."""
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
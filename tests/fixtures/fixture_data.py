@@ -0,0 +1,51 @@
+import pytest
+
+
+@pytest.fixture
+def make_catalog(django_user_model):
+    """
+    Фабрика тестового каталога: произведения с категорией и жанрами,
+    отзывы разных авторов и комментарии к ним.
+    """
+    from reviews.models import (Category, Comment, Genre, Review, Title,
+                                TitleGenre, TitleStats)
+
+    def make(size):
+        categories = Category.objects.bulk_create(
+            Category(name=f'Категория {i}', slug=f'category-{i}')
+            for i in range(size)
+        )
+        genres = Genre.objects.bulk_create(
+            Genre(name=f'Жанр {i}', slug=f'genre-{i}')
+            for i in range(size)
+        )
+        authors = django_user_model.objects.bulk_create(
+            django_user_model(username=f'author{i}',
+                              email=f'author{i}@yamdb.fake')
+            for i in range(size)
+        )
+        titles = Title.objects.bulk_create(
+            Title(name=f'Произведение {i}', year=2000 + i,
+                  category=categories[i])
+            for i in range(size)
+        )
+        # bulk_create не отправляет сигналы: статистику заводим сами,
+        # как это делает загрузка из CSV.
+        TitleStats.objects.rebuild([title.pk for title in titles])
+        TitleGenre.objects.bulk_create(
+            TitleGenre(title_id=title, genre_id=genre)
+            for title in titles
+            for genre in genres[:2]
+        )
+        for author in authors:
+            Review.objects.create(
+                title=titles[0], author=author, text='Отзыв', score=5
+            )
+        review = Review.objects.filter(title=titles[0]).first()
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text='Комментарий')
+            for author in authors
+        )
+        return titles[0], review
+
+    return make
@@ -0,0 +1,47 @@
+import pytest
+
+
+@pytest.fixture
+def explain():
+    """
+    План запроса в PostgreSQL: принимает queryset или готовый SQL.
+    Последовательное чтение и сортировка запрещены: на маленьких
+    тестовых таблицах планировщик иначе выбирает Seq Scan или любой
+    индекс с сортировкой после него, и выбор индекса, отдающего строки
+    страницы по порядку, не проверить.
+    """
+    from django.db import connection
+
+    if connection.vendor != 'postgresql':
+        pytest.skip('Планы запросов проверяются только на PostgreSQL')
+
+    def get_plan(query):
+        if isinstance(query, str):
+            sql, params = query, None
+        else:
+            sql, params = query.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            cursor.execute('SET enable_sort = off')
+            try:
+                cursor.execute(f'EXPLAIN {sql}', params)
+                return '\n'.join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.execute('RESET enable_seqscan')
+                cursor.execute('RESET enable_sort')
+
+    return get_plan
+
+
+@pytest.fixture
+def assert_uses_index(explain):
+    """Проверяет, что в плане запроса используется индекс index_name."""
+
+    def check(query, index_name):
+        plan = explain(query)
+        assert index_name in plan, (
+            f'Проверьте, что запрос использует индекс {index_name}:\n{plan}'
+        )
+        return plan
+
+    return check
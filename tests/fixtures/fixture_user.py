@@ -0,0 +1,66 @@
+import pytest
+
+
+def _api_client(user):
+    from api.v1.authentication import UserRefreshToken
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    token = UserRefreshToken.for_user(user)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+    return client
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestAdmin',
+        email='testadmin@yamdb.fake',
+        password='1234567',
+        role='admin',
+        bio='admin bio'
+    )
+
+
+@pytest.fixture
+def moderator(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestModerator',
+        email='testmoder@yamdb.fake',
+        password='1234567',
+        role='moderator',
+        bio='moder bio'
+    )
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUser',
+        email='testuser@yamdb.fake',
+        password='1234567',
+        role='user',
+        bio='user bio'
+    )
+
+
+@pytest.fixture
+def admin_client(admin):
+    return _api_client(admin)
+
+
+@pytest.fixture
+def moderator_client(moderator):
+    return _api_client(moderator)
+
+
+@pytest.fixture
+def user_client(user):
+    return _api_client(user)
+
+
+@pytest.fixture
+def guest_client():
+    from rest_framework.test import APIClient
+
+    return APIClient()
@@ -0,0 +1,173 @@
+import asyncio
+import importlib
+
+import pytest
+
+URLS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/?genre=genre-1&fields=id,name',
+    '/api/v1/titles/{title}/',
+    '/api/v1/titles/{title}/reviews/',
+    '/api/v1/titles/{title}/reviews/{review}/',
+    '/api/v1/titles/{title}/reviews/{review}/comments/',
+)
+
+
+def reload_urls():
+    from django.urls import clear_url_caches
+
+    for name in ('api.v1.urls', 'api.urls', 'api_yamdb.urls'):
+        importlib.reload(importlib.import_module(name))
+    clear_url_caches()
+
+
+@pytest.fixture
+def asgi_mode(settings, transactional_db, monkeypatch):
+    """
+    Маршруты как под api_yamdb.asgi. Соединения запросов ASGI живут
+    в своих потоках и закрываются в конце запроса.
+    """
+    from django.db import connections
+
+    monkeypatch.setitem(connections['default'].settings_dict,
+                        'CONN_MAX_AGE', 0)
+    settings.ASGI_MODE = True
+    reload_urls()
+    yield
+    settings.ASGI_MODE = False
+    reload_urls()
+
+
+async def asgi_get(application, path, read_body=None, headers=()):
+    """
+    GET-запрос к ASGI-приложению; read_body — корутина медленного чтения.
+    Запускается через asyncio.run, как в сервере: иначе сигналы запроса
+    выполнялись бы в потоке теста.
+    """
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path,
+        'query_string': query.encode(),
+        'headers': [(b'host', b'testserver'), *headers],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 1),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+        if (message['type'] == 'http.response.body' and read_body
+                and not message.get('more_body')):
+            await read_body()
+
+    await application(scope, receive, send)
+    headers = {
+        name.decode().lower(): value.decode()
+        for name, value in messages[0]['headers']
+    }
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return messages[0]['status'], headers, body
+
+
+class TestAsyncViews:
+
+    def test_routes(self, asgi_mode):
+        from django.urls import resolve
+
+        for path in ('/api/v1/titles/', '/api/v1/titles/1/reviews/1/',
+                     '/api/v1/titles/1/reviews/1/comments/',
+                     '/api/v1/categories/', '/api/v1/auth/token/'):
+            assert asyncio.iscoroutinefunction(resolve(path).func), (
+                f'Проверьте, что `{path}` под ASGI обслуживает '
+                'async-представление'
+            )
+
+    @pytest.mark.parametrize('url', ('/api/v1/export/',
+                                     '/api/v1/export/titles/'))
+    def test_streamed_export(self, url, admin, admin_client, make_catalog,
+                             asgi_mode):
+        from api.asgi import get_asgi_application
+        from api.v1.authentication import UserRefreshToken
+
+        make_catalog(3)
+        expected = b''.join(admin_client.get(url).streaming_content)
+        token = UserRefreshToken.for_user(admin).access_token
+        status, _, body = asyncio.run(asgi_get(
+            get_asgi_application(), url,
+            headers=[(b'authorization', f'Bearer {token}'.encode())]
+        ))
+        assert (status, body) == (200, expected), (
+            'Проверьте, что потоковая выгрузка читается под ASGI'
+        )
+
+    def test_same_responses(self, make_catalog, guest_client, asgi_mode):
+        from api.asgi import get_asgi_application
+        from django.core.cache import cache
+
+        title, review = make_catalog(4)
+        application = get_asgi_application()
+        for url in URLS:
+            url = url.format(title=title.id, review=review.id)
+            cache.clear()
+            expected = guest_client.get(url)
+            cache.clear()
+            status, headers, body = asyncio.run(asgi_get(application, url))
+            assert (status, body) == (200, expected.content), (
+                f'Проверьте, что `{url}` под ASGI отвечает так же, как WSGI'
+            )
+            assert 'queries' in headers['server-timing'], (
+                'Проверьте, что SQL-запросы учитываются под ASGI'
+            )
+
+    def test_writes(self, make_catalog, user_client, asgi_mode):
+        title, review = make_catalog(2)
+        response = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            data={'text': 'Комментарий'}
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что запись работает через async-представление'
+        )
+
+
+class TestSlowClients:
+
+    def test_views_not_blocked(self, make_catalog, asgi_mode, settings):
+        """
+        Медленные клиенты не занимают представления: при двух
+        одновременных представлениях все CLIENTS клиентов получают ответ,
+        пока ни один из них не дочитал свой. Пропускную способность
+        сравнивает benchmark_api --clients.
+        """
+        from api.asgi import get_asgi_application
+
+        clients = 8
+        settings.ASYNC_VIEWS_CONCURRENCY = 2
+        title, review = make_catalog(3)
+        paths = [url.format(title=title.id, review=review.id) for url in URLS]
+        application = get_asgi_application()
+
+        async def main():
+            reading = []
+            everyone = asyncio.Event()
+
+            async def read_body():
+                reading.append(1)
+                if len(reading) == clients:
+                    everyone.set()
+                await everyone.wait()
+
+            return await asyncio.wait_for(asyncio.gather(*(
+                asgi_get(application, paths[number % len(paths)], read_body)
+                for number in range(clients)
+            )), timeout=30)
+
+        try:
+            responses = asyncio.run(main())
+        except asyncio.TimeoutError:
+            pytest.fail('Проверьте, что под ASGI медленные клиенты '
+                        'не занимают представления')
+        assert [status for status, _, _ in responses] == [200] * clients
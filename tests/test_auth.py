@@ -0,0 +1,162 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestAuthToken:
+    url = '/api/v1/auth/token/'
+
+    def test_token(self, guest_client, user):
+        from reviews.models import ConfirmationCode
+
+        ConfirmationCode.objects.create(user=user, token='code')
+        data = {'username': user.username, 'confirmation_code': 'code'}
+        response = guest_client.post(self.url, data=data)
+        assert response.status_code == 200
+        assert 'access' in response.json()
+        assert not ConfirmationCode.objects.filter(user=user).exists(), (
+            'Проверьте, что использованный код подтверждения удаляется'
+        )
+
+        response = guest_client.post(self.url, data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что код подтверждения нельзя использовать повторно'
+        )
+
+    def test_token_wrong_code(self, guest_client, user):
+        from reviews.models import ConfirmationCode
+
+        ConfirmationCode.objects.create(user=user, token='code')
+        response = guest_client.post(self.url, data={
+            'username': user.username, 'confirmation_code': 'wrong'
+        })
+        assert response.status_code == 400
+        assert ConfirmationCode.objects.filter(user=user).exists(), (
+            'Проверьте, что неверный код не удаляет код подтверждения'
+        )
+
+    def test_token_unknown_user(self, guest_client):
+        response = guest_client.post(self.url, data={
+            'username': 'unknown', 'confirmation_code': 'code'
+        })
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_signup_then_token(guest_client):
+    from reviews.models import OutgoingEmail
+
+    data = {'username': 'newuser', 'email': 'newuser@yamdb.fake'}
+    response = guest_client.post('/api/v1/auth/signup/', data=data)
+    assert response.status_code == 200
+    assert response.json() == data
+
+    code = OutgoingEmail.objects.get(recipient=data['email']).body
+    response = guest_client.post('/api/v1/auth/token/', data={
+        'username': 'newuser', 'confirmation_code': code
+    })
+    assert response.status_code == 200, (
+        'Проверьте, что код из письма позволяет получить токен'
+    )
+
+
+@pytest.mark.django_db
+class TestStatelessAuth:
+
+    def test_token_claims(self, admin):
+        from api.v1.authentication import UserRefreshToken
+
+        token = UserRefreshToken.for_user(admin).access_token
+        assert token['username'] == admin.username
+        assert token['role'] == 'admin'
+        assert token['is_superuser'] is False
+        assert token['is_staff'] is True
+
+    def test_reads_without_user_queries(self, django_assert_num_queries,
+                                        user_client, make_catalog):
+        title, review = make_catalog(2)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        with django_assert_num_queries(1):
+            response = user_client.get(url)
+        assert response.status_code == 200
+        with django_assert_num_queries(1):
+            response = user_client.delete(url)
+        assert response.status_code == 403, (
+            'Проверьте, что права проверяются по роли из токена'
+        )
+
+    def test_legacy_token(self, user):
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        client = APIClient()
+        token = RefreshToken.for_user(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200, (
+            'Проверьте, что токены без claims роли продолжают работать'
+        )
+        assert response.json()['username'] == user.username
+
+    def test_role_change_revokes_tokens(self, user, user_client):
+        from api.v1.authentication import UserRefreshToken
+
+        assert user_client.get('/api/v1/users/').status_code == 403
+        user.role = 'admin'
+        user.is_staff = True
+        user.save()
+        assert user_client.get('/api/v1/users/').status_code == 401, (
+            'Проверьте, что смена роли отзывает выданные токены'
+        )
+        token = UserRefreshToken.for_user(user).access_token
+        user_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        assert user_client.get('/api/v1/users/').status_code == 200
+
+    def test_profile_change_keeps_tokens(self, user, user_client):
+        response = user_client.patch('/api/v1/users/me/',
+                                     data={'bio': 'new bio'})
+        assert response.status_code == 200
+        response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == 200
+        assert response.json()['bio'] == 'new bio'
+
+    def test_revoke_token(self, user):
+        from api.v1.authentication import UserRefreshToken, revoke_token
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        token = UserRefreshToken.for_user(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        assert client.get('/api/v1/users/me/').status_code == 200
+        revoke_token(token)
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    def test_deleted_user(self, admin_client, user, user_client):
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204
+        assert user_client.get('/api/v1/users/me/').status_code == 401
+
+    @pytest.mark.parametrize('changes', [
+        {'role': 'admin', 'is_staff': True},
+        {'is_active': False},
+    ])
+    def test_change_in_other_process(self, changes, user, user_client):
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        # Другой процесс меняет пользователя, а отметки об отзыве в кеше
+        # этого процесса нет: update() не шлёт сигналов, кеш очищен.
+        get_user_model().objects.filter(pk=user.pk).update(**changes)
+        cache.clear()
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что отзыв токенов не зависит от кеша процесса'
+        )
+
+    def test_create_review(self, user, user_client, make_catalog):
+        title, _ = make_catalog(2)
+        response = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Отзыв', 'score': 7}
+        )
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
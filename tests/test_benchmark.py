@@ -0,0 +1,161 @@
+import json
+import os
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBenchmarkApi:
+
+    def run(self, tmp_path, name='report.json', **options):
+        output = os.path.join(tmp_path, name)
+        call_command('benchmark_api', titles=30, reviews=90, users=10,
+                     requests=150, warmup=20, output=output,
+                     interactive=False, **options)
+        with open(output, encoding='utf-8') as file:
+            return json.load(file)
+
+    def test_report(self, tmp_path):
+        from api.benchmark import ROUTES
+        from reviews.models import Review, Title
+
+        report = self.run(tmp_path)
+        assert Title.objects.count() == 30
+        assert Review.objects.filter(author__username__startswith='user')
+        assert report['requests'] == 150
+        assert set(report['latency_ms']) == {'p50', 'p95', 'p99'}
+        assert report['throughput_rps'] > 0
+        assert set(report['routes']) <= set(ROUTES)
+        assert len(report['routes']) > len(ROUTES) // 2, (
+            'Проверьте, что прогон перебирает маршруты API'
+        )
+        errors = {
+            name: route['errors'] for name, route in report['routes'].items()
+            if route['errors']
+        }
+        assert not errors, (
+            f'Проверьте, что маршруты прогона отвечают без ошибок: {errors}'
+        )
+        assert report['routes']['titles']['queries_max'] is not None, (
+            'Проверьте, что в отчёт попадает число SQL-запросов'
+        )
+
+    def test_baseline(self, tmp_path):
+        report = self.run(tmp_path)
+        baseline = os.path.join(tmp_path, 'report.json')
+        self.run(tmp_path, 'same.json', baseline=baseline, tolerance=100)
+
+        report['routes']['titles']['queries_max'] = 0
+        with open(baseline, 'w', encoding='utf-8') as file:
+            json.dump(report, file)
+        with pytest.raises(CommandError, match='titles: SQL-запросов'):
+            self.run(tmp_path, 'worse.json', baseline=baseline,
+                     tolerance=100)
+
+    def test_auth_routes(self, tmp_path):
+        report = self.run(tmp_path, routes=['signup', 'token'])
+        routes = report['routes']
+        assert set(routes) == {'signup', 'token'}, (
+            'Проверьте, что --routes ограничивает смесь запросов'
+        )
+        assert (routes['signup']['queries_max'],
+                routes['token']['queries_max']) == (5, 2), (
+            'Проверьте число SQL-запросов регистрации и получения токена'
+        )
+        assert not routes['signup']['errors'] + routes['token']['errors']
+
+    def test_no_fastpath(self, tmp_path):
+        report = self.run(tmp_path, routes=['titles', 'reviews'],
+                          fastpath=False)
+        assert report['fastpath'] is False
+        assert not sum(route['errors'] for route in report['routes'].values())
+
+    @pytest.mark.parametrize('server', ('wsgi', 'asgi'))
+    def test_slow_clients(self, tmp_path, monkeypatch, server):
+        from django.db import connections
+
+        # Соединения потоков запросов закрываются в конце запроса.
+        monkeypatch.setitem(connections['default'].settings_dict,
+                            'CONN_MAX_AGE', 0)
+        report = self.run(tmp_path, clients=4, client_delay=0.001,
+                          server=server, workers=2)
+        assert report['requests'] == 150
+        assert report['clients']['server'] == server
+        assert not sum(route['errors'] for route in report['routes'].values())
+        with pytest.raises(CommandError, match='review_create'):
+            self.run(tmp_path, clients=4, routes=['titles', 'review_create'])
+
+    def test_fake_catalog(self, tmp_path):
+        from reviews.csv_tables import CSV_TABLES
+        from reviews.fake_data import FakeCatalog
+
+        FakeCatalog(5, 12, 3, seed=1).write(tmp_path / 'a')
+        FakeCatalog(5, 12, 3, seed=1).write(tmp_path / 'b')
+        for table in CSV_TABLES:
+            first = (tmp_path / 'a' / table.filename).read_text('utf-8')
+            assert first == (tmp_path / 'b' / table.filename).read_text(
+                'utf-8'
+            ), 'Проверьте, что данные определяются seed'
+        call_command('load_data_from_csv', path=str(tmp_path / 'a'))
+        with pytest.raises(ValueError):
+            FakeCatalog(2, 7, 3)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestGenerateFakeData:
+
+    def test_csv_and_insert_match(self, tmp_path):
+        from reviews.csv_tables import CSV_TABLES
+        from reviews.export import iter_csv
+
+        options = dict(titles=40, reviews=300, users=12, comments=50,
+                       seed=3, skew=1.5)
+        call_command('generate_fake_data', f'--path={tmp_path}', **options)
+        call_command('load_data_from_csv', path=str(tmp_path))
+        loaded = {
+            table.filename: ''.join(iter_csv(table)) for table in CSV_TABLES
+        }
+        call_command('generate_fake_data', '--insert', interactive=False,
+                     **options)
+        for table in CSV_TABLES:
+            assert ''.join(iter_csv(table)) == loaded[table.filename], (
+                'Проверьте, что вставка в БД и CSV дают одинаковые данные'
+            )
+
+    def test_skew(self):
+        from django.db.models import Count
+        from reviews.models import Comment, Review, Title, User
+
+        call_command('generate_fake_data', '--insert', interactive=False,
+                     titles=50, reviews=480, users=100, comments=200,
+                     batch_size=100)
+        assert User.objects.count() == 100
+        assert Title.objects.count() == 50
+        assert Comment.objects.count() == 200
+        counts = list(
+            Review.objects.values('title').annotate(count=Count('id'))
+            .order_by('-count').values_list('count', flat=True)
+        )
+        assert sum(counts) == 480
+        assert counts[0] > 3 * 480 / 50, (
+            'Проверьте, что у популярных произведений больше отзывов'
+        )
+        assert sum(counts[:10]) > 480 / 2
+
+    def test_deterministic_stream(self):
+        from reviews.csv_tables import CSV_TABLES
+        from reviews.fake_data import FakeCatalog, LinesFile
+
+        review = CSV_TABLES[5]
+        first = ''.join(FakeCatalog(1000, 5000, 100, seed=7).iter_csv(review))
+        stream = LinesFile(FakeCatalog(1000, 5000, 100, seed=7).iter_csv(
+            review
+        ))
+        chunks = iter(lambda: stream.read(100), '')
+        assert ''.join(chunks) == first, (
+            'Проверьте, что данные определяются seed'
+        )
+        assert first != ''.join(
+            FakeCatalog(1000, 5000, 100, seed=8).iter_csv(review)
+        )
@@ -0,0 +1,123 @@
+import pytest
+
+URL = '/api/v1/titles/bulk/'
+
+
+def make_items(size, category='movie', genres=('drama', 'comedy')):
+    return [
+        {'name': f'Пакет {i}', 'year': 1990 + i % 30, 'category': category,
+         'genre': list(genres)}
+        for i in range(size)
+    ]
+
+
+@pytest.mark.django_db
+class TestTitlesBulk:
+
+    @pytest.fixture(autouse=True)
+    def catalog(self):
+        from reviews.models import Category, Genre
+
+        Category.objects.create(name='Фильм', slug='movie')
+        Category.objects.create(name='Книга', slug='book')
+        Genre.objects.create(name='Драма', slug='drama')
+        Genre.objects.create(name='Комедия', slug='comedy')
+
+    def post(self, client, items):
+        return client.post(URL, data=items, format='json')
+
+    def test_create(self, admin_client):
+        from reviews.models import Title, TitleStats
+
+        response = self.post(admin_client, make_items(3))
+        assert response.status_code == 200, (
+            f'Проверьте, что POST-запрос к `{URL}` создаёт произведения'
+        )
+        data = response.json()
+        assert [item['name'] for item in data] == [
+            'Пакет 0', 'Пакет 1', 'Пакет 2'
+        ]
+        title = Title.objects.get(pk=data[0]['id'])
+        assert title.category.slug == 'movie'
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama'
+        ], 'Проверьте, что произведения связываются с жанрами'
+        assert TitleStats.objects.filter(title=title).exists(), (
+            'Проверьте, что у новых произведений заводится статистика'
+        )
+
+    def test_queries_do_not_depend_on_size(self, admin_client,
+                                           django_assert_max_num_queries):
+        for size in (2, 50):
+            with django_assert_max_num_queries(10):
+                response = self.post(admin_client, make_items(size))
+            assert response.status_code == 200
+
+    def test_update(self, admin_client):
+        from reviews.models import Title
+
+        created = self.post(admin_client, make_items(2)).json()
+        items = [
+            {'id': created[0]['id'], 'name': 'Новое имя', 'year': 2001,
+             'category': 'book', 'genre': ['comedy']},
+            {'name': 'Новое', 'year': 2002, 'category': 'movie',
+             'genre': []},
+        ]
+        response = self.post(admin_client, items)
+        assert response.status_code == 200
+        title = Title.objects.get(pk=created[0]['id'])
+        assert (title.name, title.category.slug) == ('Новое имя', 'book'), (
+            'Проверьте, что произведение с id обновляется'
+        )
+        assert list(title.genre.values_list('slug', flat=True)) == [
+            'comedy'
+        ], 'Проверьте, что жанры обновлённого произведения заменяются'
+        assert Title.objects.count() == 3
+
+    def test_item_errors(self, admin_client):
+        from reviews.models import Title
+
+        items = make_items(4)
+        items[1]['category'] = 'unknown'
+        items[2]['year'] = 3000
+        items[3].update(id=100500, genre=['drama', 'missing'])
+        response = self.post(admin_client, items)
+        assert response.status_code == 400
+        errors = response.json()
+        assert len(errors) == 4, (
+            'Проверьте, что ошибки возвращаются списком по элементам'
+        )
+        assert errors[0] == {}
+        assert list(errors[1]) == ['category']
+        assert list(errors[2]) == ['year']
+        assert set(errors[3]) == {'id', 'genre'}
+        assert not Title.objects.exists(), (
+            'Проверьте, что при ошибках ничего не записывается'
+        )
+
+    def test_limits_and_permissions(self, admin_client, user_client,
+                                    settings):
+        settings.TITLES_BULK_MAX_ITEMS = 2
+        assert self.post(admin_client, make_items(3)).status_code == 400
+        assert self.post(admin_client, {'name': 'x'}).status_code == 400
+        assert self.post(user_client, make_items(1)).status_code == 403, (
+            'Проверьте, что пакетная запись доступна только администратору'
+        )
+
+    def test_catalog_cache_invalidated(self, admin_client, guest_client):
+        assert guest_client.get('/api/v1/titles/').json()['count'] == 0
+        self.post(admin_client, make_items(2))
+        assert guest_client.get('/api/v1/titles/').json()['count'] == 2, (
+            'Проверьте, что пакетная запись сбрасывает кеш каталога'
+        )
+
+    def test_genres_update_invalidates_cache(self, admin_client,
+                                             guest_client):
+        item = self.post(admin_client, make_items(1)).json()[0]
+        url = f'/api/v1/titles/{item["id"]}/'
+        assert len(guest_client.get(url).json()['genre']) == 2
+        item['genre'] = ['drama']
+        self.post(admin_client, [item])
+        assert len(guest_client.get(url).json()['genre']) == 1, (
+            'Проверьте, что замена жанров сбрасывает кеш каталога'
+        )
@@ -0,0 +1,102 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+
+    def test_repeated_request_is_cached(self, django_assert_num_queries,
+                                        guest_client, make_catalog):
+        make_catalog(3)
+        first = guest_client.get('/api/v1/titles/')
+        with django_assert_num_queries(0):
+            second = guest_client.get('/api/v1/titles/')
+        assert second.json() == first.json(), (
+            'Проверьте, что повторный запрос возвращает закешированный ответ'
+        )
+        assert second['ETag'] == first['ETag']
+        assert 'Last-Modified' in second
+
+    def test_query_string_is_part_of_key(self, guest_client, make_catalog):
+        make_catalog(3)
+        guest_client.get('/api/v1/titles/')
+        response = guest_client.get('/api/v1/titles/?year=2001')
+        assert [title['year'] for title in response.json()['results']] == [
+            2001
+        ], 'Проверьте, что кеш учитывает query-параметры запроса'
+
+    def test_etag_not_modified(self, guest_client, make_catalog):
+        make_catalog(2)
+        etag = guest_client.get('/api/v1/genres/')['ETag']
+        response = guest_client.get(
+            '/api/v1/genres/', HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 304, (
+            'Проверьте, что на запрос с актуальным ETag возвращается 304'
+        )
+
+    def test_last_modified_not_modified(self, guest_client, make_catalog):
+        make_catalog(2)
+        last_modified = guest_client.get('/api/v1/categories/')[
+            'Last-Modified'
+        ]
+        response = guest_client.get(
+            '/api/v1/categories/', HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        assert response.status_code == 304
+
+    @pytest.mark.parametrize('change', (
+        'category', 'genre', 'title', 'title_genre', 'review',
+    ))
+    def test_invalidation_on_change(self, guest_client, make_catalog,
+                                    admin, change):
+        from reviews.models import Category, Genre, Review, TitleGenre
+
+        title, review = make_catalog(2)
+        url = f'/api/v1/titles/{title.id}/'
+        before = guest_client.get(url)
+        if change == 'category':
+            Category.objects.filter(pk=title.category_id).get().delete()
+        elif change == 'genre':
+            genre = Genre.objects.create(name='Новый', slug='new')
+            TitleGenre.objects.create(title_id=title, genre_id=genre)
+        elif change == 'title':
+            title.name = 'Новое название'
+            title.save()
+        elif change == 'title_genre':
+            TitleGenre.objects.filter(title_id=title).first().delete()
+        else:
+            Review.objects.create(
+                title=title, author=admin, text='Отзыв', score=1
+            )
+        after = guest_client.get(url)
+        assert after['ETag'] != before['ETag']
+        assert after.json() != before.json(), (
+            f'Проверьте, что изменение {change} сбрасывает кеш каталога'
+        )
+
+    def test_admin_write_invalidates_list(self, admin_client, guest_client):
+        assert guest_client.get('/api/v1/genres/').json()['count'] == 0
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'}
+        )
+        assert guest_client.get('/api/v1/genres/').json()['count'] == 1
+
+    def test_last_modified_not_in_future(self, guest_client, make_catalog):
+        import time
+
+        from api.v1.cache import invalidate_catalog_cache
+        from django.utils.http import parse_http_date
+
+        make_catalog(1)
+        etags = set()
+        for _ in range(50):
+            invalidate_catalog_cache()
+            response = guest_client.get('/api/v1/genres/')
+            etags.add(response['ETag'])
+            assert parse_http_date(response['Last-Modified']) <= time.time(), (
+                'Проверьте, что Last-Modified не обгоняет часы при частых '
+                'изменениях каталога'
+            )
+        assert len(etags) == 50, (
+            'Проверьте, что каждое изменение каталога меняет ETag'
+        )
@@ -0,0 +1,204 @@
+import threading
+
+import pytest
+
+ENGINE = 'api_yamdb.db.postgresql'
+URL = '/api/v1/titles/'
+
+
+@pytest.fixture
+def pooled_db(transactional_db, monkeypatch):
+    """
+    Переключает соединение default на бэкенд api_yamdb.db.postgresql
+    с заданными настройками, в том числе для новых потоков.
+    """
+    from django.db import connections
+    from django.db.utils import load_backend
+
+    from api_yamdb.db.postgresql.base import close_pools
+
+    original = connections['default']
+    if original.vendor != 'postgresql':
+        pytest.skip('Пул соединений работает только с PostgreSQL')
+    settings_dict = original.settings_dict
+    monkeypatch.setitem(settings_dict, 'ENGINE', ENGINE)
+
+    def configure(**options):
+        for key, value in options.items():
+            monkeypatch.setitem(settings_dict, key, value)
+        connections['default'].close()
+        connections['default'] = load_backend(ENGINE).DatabaseWrapper(
+            settings_dict, 'default'
+        )
+        return connections['default']
+
+    yield configure
+    connections['default'].close()
+    close_pools()
+    connections['default'] = original
+
+
+def wsgi_get(path):
+    """
+    GET-запрос через WSGIHandler: в отличие от тестового клиента,
+    в конце запроса Django закрывает соединения как в gunicorn.
+    """
+    from django.core.cache import cache
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+
+    cache.clear()
+    statuses = []
+    response = WSGIHandler()(
+        RequestFactory().get(path).environ,
+        lambda status, headers: statuses.append(status)
+    )
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return int(statuses[0].split()[0])
+
+
+def backend_pid(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_backend_pid()')
+        return cursor.fetchone()[0]
+
+
+class TestConnectionPool:
+
+    def test_connection_reused(self, pooled_db):
+        connection = pooled_db(POOL_SIZE=2, CONN_MAX_AGE=0)
+        pid = backend_pid(connection)
+        connection.close()
+        assert backend_pid(connection) == pid, (
+            'Проверьте, что закрытое соединение возвращается в пул'
+        )
+        connection.errors_occurred = True
+        connection.close()
+        assert backend_pid(connection) != pid, (
+            'Проверьте, что соединение после ошибки не возвращается в пул'
+        )
+
+    def test_transaction_rolled_back(self, pooled_db):
+        from reviews.models import Category
+
+        connection = pooled_db(POOL_SIZE=1, CONN_MAX_AGE=0)
+        connection.set_autocommit(False)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {Category._meta.db_table} (name, slug) '
+                "VALUES ('Фильм', 'movie')"
+            )
+        connection.close()
+        assert not Category.objects.exists(), (
+            'Проверьте, что незавершённая транзакция откатывается '
+            'при возврате соединения в пул'
+        )
+
+    def test_exhausted(self, pooled_db):
+        from django.db import OperationalError
+        from django.db.utils import load_backend
+
+        connection = pooled_db(POOL_SIZE=1, CONN_MAX_AGE=0, POOL_TIMEOUT=0.01)
+        connection.ensure_connection()
+        other = load_backend(ENGINE).DatabaseWrapper(
+            connection.settings_dict, 'other'
+        )
+        with pytest.raises(OperationalError):
+            other.ensure_connection()
+        connection.close()
+        other.ensure_connection()
+        other.close()
+
+    def test_threaded_workers(self, pooled_db, make_catalog):
+        from api_yamdb.db.postgresql.base import get_pool
+
+        make_catalog(3)
+        connection = pooled_db(POOL_SIZE=2, CONN_MAX_AGE=0)
+        statuses = []
+
+        def worker():
+            for _ in range(5):
+                statuses.append(wsgi_get(URL))
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert statuses == [200] * 30, (
+            'Проверьте, что потоки воркера делят пул соединений'
+        )
+        pool = get_pool(connection.get_connection_params(), 2, 10)
+        assert pool._idle.qsize() <= 2
+
+
+class TestHealthChecks:
+
+    def terminate(self, pid):
+        from django.db import connections
+        from django.db.utils import load_backend
+
+        killer = load_backend(ENGINE).DatabaseWrapper(
+            dict(connections['default'].settings_dict, POOL_SIZE=0), 'killer'
+        )
+        with killer.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+        killer.close()
+
+    @pytest.mark.parametrize('pool_size', (0, 2))
+    def test_broken_connection_replaced(self, pooled_db, make_catalog,
+                                        pool_size):
+        make_catalog(1)
+        connection = pooled_db(POOL_SIZE=pool_size,
+                               CONN_MAX_AGE=0 if pool_size else 60,
+                               CONN_HEALTH_CHECKS=True)
+        assert wsgi_get(URL) == 200
+        self.terminate(backend_pid(connection))
+        connection.close_if_unusable_or_obsolete()
+        assert wsgi_get(URL) == 200, (
+            'Проверьте, что оборванное соединение открывается заново'
+        )
+
+    def test_checked_once_per_request(self, pooled_db,
+                                      django_assert_num_queries):
+        connection = pooled_db(POOL_SIZE=0, CONN_MAX_AGE=60,
+                               CONN_HEALTH_CHECKS=True)
+        connection.ensure_connection()
+        connection.close_if_unusable_or_obsolete()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        assert connection.health_check_done
+        connection.close_if_unusable_or_obsolete()
+        assert not connection.health_check_done
+
+
+@pytest.mark.parametrize('options, connects', (
+    ({'POOL_SIZE': 0, 'CONN_MAX_AGE': 0}, 10),
+    ({'POOL_SIZE': 0, 'CONN_MAX_AGE': 60}, 1),
+    ({'POOL_SIZE': 4, 'CONN_MAX_AGE': 0}, 1),
+))
+def test_connects_per_request(pooled_db, make_catalog, monkeypatch,
+                              options, connects):
+    """
+    Сколько раз десять запросов подключаются к PostgreSQL: без
+    переиспользования — на каждый запрос, с постоянным соединением
+    и с пулом — один раз. Задержки сравнивает benchmark_api.
+    """
+    from django.db.backends.postgresql import base
+
+    make_catalog(3)
+    pooled_db(CONN_HEALTH_CHECKS=True, **options)
+    calls = []
+    connect = base.Database.connect
+    monkeypatch.setattr(
+        base.Database, 'connect',
+        lambda *args, **kwargs: calls.append(1) or connect(*args, **kwargs)
+    )
+    for _ in range(10):
+        assert wsgi_get(URL) == 200
+    assert len(calls) == connects, (
+        'Проверьте, что соединения переиспользуются между запросами'
+    )
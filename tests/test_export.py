@@ -0,0 +1,100 @@
+import json
+import os
+from collections import Counter
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDumpDataToCsv:
+
+    def test_round_trip(self, tmp_path):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews.csv_tables import CSV_TABLES
+        from reviews.models import Title
+
+        call_command('load_data_from_csv')
+        Title.objects.filter(pk=1).update(description='Описание, "цитата"')
+        call_command('dump_data_to_csv', path=str(tmp_path), chunk_size=7)
+        for table in CSV_TABLES:
+            assert os.path.exists(os.path.join(tmp_path, table.filename)), (
+                f'Проверьте, что выгружается {table.filename}'
+            )
+
+        with CaptureQueriesContext(connection) as context:
+            call_command('load_data_from_csv', path=str(tmp_path),
+                         incremental=True)
+        writes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        assert writes == [], (
+            'Проверьте, что выгрузка загружается обратно без изменений'
+        )
+
+        Title.objects.update(description=None)
+        call_command('load_data_from_csv', path=str(tmp_path),
+                     incremental=True)
+        assert Title.objects.get(pk=1).description == 'Описание, "цитата"', (
+            'Проверьте, что описание произведения попадает в выгрузку'
+        )
+
+    def test_ndjson(self, tmp_path):
+        from reviews.csv_tables import CSV_TABLES
+        from reviews.export import NDJSON_FILENAME, table_name
+
+        call_command('load_data_from_csv')
+        call_command('dump_data_to_csv', path=str(tmp_path), format='ndjson')
+        with open(os.path.join(tmp_path, NDJSON_FILENAME),
+                  encoding='utf-8') as file:
+            lines = [json.loads(line) for line in file]
+        counts = Counter(line['table'] for line in lines)
+        for table in CSV_TABLES:
+            assert counts[table_name(table)] == table.model.objects.count()
+        assert set(lines[0]['row']) == set(CSV_TABLES[0].columns)
+
+
+@pytest.mark.django_db
+class TestExportView:
+
+    def test_csv(self, admin_client, make_catalog):
+        from reviews.models import Title
+
+        make_catalog(3)
+        response = admin_client.get('/api/v1/export/titles/')
+        assert response.status_code == 200
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся потоковым ответом'
+        )
+        assert response['Content-Type'] == 'text/csv; charset=utf-8'
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert lines[0] == 'id,name,year,category,description'
+        first = Title.objects.order_by('pk').first()
+        assert lines[1] == (
+            f'{first.id},{first.name},{first.year},{first.category_id},'
+            f'{first.description or ""}'
+        )
+        assert len(lines) == 4
+
+    def test_ndjson(self, admin_client, make_catalog):
+        make_catalog(2)
+        response = admin_client.get('/api/v1/export/')
+        assert response.status_code == 200
+        lines = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()
+        ]
+        reviews = [line['row'] for line in lines if line['table'] == 'review']
+        assert len(reviews) == 2
+        assert reviews[0]['pub_date'].endswith('Z')
+
+    def test_permissions(self, guest_client, user_client, admin_client):
+        assert guest_client.get('/api/v1/export/').status_code == 401
+        assert user_client.get('/api/v1/export/').status_code == 403, (
+            'Проверьте, что выгрузка доступна только администратору'
+        )
+        assert admin_client.get(
+            '/api/v1/export/unknown/'
+        ).status_code == 404
@@ -0,0 +1,181 @@
+import datetime as dt
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+
+import pytest
+
+# Строка с символами, которые JSON-кодировщики могут экранировать по-разному.
+TRICKY_TEXT = 'Кавычки " \\ / \n\t\x01\x7f \u2028\u2029 — ё 𝄞 <b>&'
+
+
+def render(renderer_class, data, media_type=None, context=None):
+    return renderer_class().render(data, media_type, context)
+
+
+class TestFastJSONRenderer:
+
+    def test_same_bytes_as_json_renderer(self):
+        from api.v1.renderers import FastJSONRenderer
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+
+        data = OrderedDict(
+            text=TRICKY_TEXT,
+            lazy=gettext_lazy('Отзыв'),
+            numbers=[0, -1, 2 ** 40, 1.0, 6.333333333333333, 0.1, None],
+            flags={True: False, 2: 'int key'},
+            created=dt.datetime(2022, 1, 2, 3, 4, 5, 678901,
+                                tzinfo=dt.timezone.utc),
+            day=dt.date(2022, 1, 2),
+            decimal=Decimal('1.50'),
+            uid=uuid.UUID(int=1),
+            nested=[OrderedDict(b=1, a=2), (1, 2)],
+        )
+        assert render(FastJSONRenderer, data) == render(JSONRenderer, data), (
+            'Проверьте, что FastJSONRenderer выдаёт те же байты, '
+            'что и JSONRenderer'
+        )
+
+    def test_fallbacks(self):
+        from api.v1.renderers import FastJSONRenderer
+        from rest_framework.renderers import JSONRenderer
+
+        for data, media_type in (
+            ({'big': 2 ** 70}, None),
+            ({'a': [1, 2]}, 'application/json; indent=4'),
+            (None, None),
+        ):
+            assert render(FastJSONRenderer, data, media_type) == (
+                render(JSONRenderer, data, media_type)
+            )
+
+
+URLS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/?page=2',
+    '/api/v1/titles/?fields=id,genre,rating',
+    '/api/v1/titles/?pagination=cursor',
+    '/api/v1/titles/?genre=genre-1&search=Произведение',
+    '/api/v1/titles/?expand=stats',
+    '/api/v1/titles/{title}/reviews/',
+    '/api/v1/titles/{title}/reviews/?expand=title&fields=id,author',
+    '/api/v1/titles/{title}/reviews/?pagination=cursor',
+    '/api/v1/titles/{title}/reviews/{review}/comments/',
+    '/api/v1/titles/{title}/reviews/{review}/comments/?expand=review',
+)
+
+
+@pytest.fixture
+def slow_path(monkeypatch):
+    """Отключает быстрые сериализаторы и рендерер у вьюсетов."""
+    from api.v1.views import CommentViewSet, ReviewViewSet, TitleViewSet
+    from rest_framework.renderers import JSONRenderer
+
+    def disable():
+        for viewset in (TitleViewSet, ReviewViewSet, CommentViewSet):
+            monkeypatch.setattr(viewset, 'values_serializer_class', None)
+            monkeypatch.setattr(viewset, 'renderer_classes', [JSONRenderer])
+
+    return disable
+
+
+@pytest.mark.django_db
+class TestValuesSerializers:
+
+    def make_data(self, make_catalog, size):
+        from reviews.models import Title
+
+        title, review = make_catalog(size)
+        Title.objects.create(name=TRICKY_TEXT, year=1999, description=None)
+        review.text = TRICKY_TEXT
+        review.save()
+        return {'title': title.id, 'review': review.id}
+
+    def fetch(self, client, urls):
+        from django.core.cache import cache
+
+        contents = []
+        for url in urls:
+            cache.clear()
+            response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+            )
+            contents.append(response.content)
+        return contents
+
+    def test_byte_identical(self, guest_client, make_catalog, slow_path):
+        ids = self.make_data(make_catalog, 7)
+        urls = [url.format(**ids) for url in URLS]
+        fast = self.fetch(guest_client, urls)
+        slow_path()
+        slow = self.fetch(guest_client, urls)
+        for url, fast_content, slow_content in zip(urls, fast, slow):
+            assert fast_content == slow_content, (
+                f'Проверьте, что ответ `{url}` не изменился: '
+                f'{fast_content!r} != {slow_content!r}'
+            )
+
+    def test_unsupported_fields_use_drf(self):
+        from api.v1.serializers import TitleValuesSerializer
+
+        assert TitleValuesSerializer.compile(
+            None, {'stats'}, ('id',)
+        ) is None, (
+            'Проверьте, что поля без колонок отдаёт сериализатор DRF'
+        )
+        plan = TitleValuesSerializer.compile({'name'}, set(), ('id', 'name'))
+        assert plan is TitleValuesSerializer.compile(
+            {'name'}, set(), ('id', 'name')
+        ), 'Проверьте, что план набора полей строится один раз'
+        assert plan.paths == ('id', 'name')
+
+    def test_without_drf_fields(self, make_catalog, monkeypatch):
+        """
+        Сериализация 60 произведений: ответ совпадает побайтно, быстрый
+        путь не вызывает полей DRF. Время сравнивает benchmark_api
+        с --no-fastpath.
+        """
+        from api.v1.renderers import FastJSONRenderer
+        from api.v1.serializers import TitleSerializer, TitleValuesSerializer
+        from api.v1.views import TitleViewSet
+        from rest_framework import serializers
+        from rest_framework.renderers import JSONRenderer
+
+        make_catalog(60)
+        queryset = TitleViewSet.queryset.all()
+        plan = TitleValuesSerializer.compile(None, set(), ('id', 'name'))
+        calls = []
+        to_representation = serializers.Serializer.to_representation
+        monkeypatch.setattr(
+            serializers.Serializer, 'to_representation',
+            lambda self, instance: calls.append(self) or to_representation(
+                self, instance
+            )
+        )
+
+        data = TitleSerializer(queryset.all(), many=True).data
+        slow_content = render(JSONRenderer, data)
+        assert len(calls) >= 60
+        calls.clear()
+        data = plan.serialize(queryset.values(*plan.paths))
+        assert render(FastJSONRenderer, data) == slow_content
+        assert calls == [], (
+            'Проверьте, что быстрый путь не вызывает сериализаторы DRF'
+        )
+
+    def test_fastpath_setting(self, guest_client, make_catalog, settings,
+                              monkeypatch):
+        from api.v1.cache import invalidate_catalog_cache
+        from api.v1.serializers import TitleValuesSerializer
+
+        make_catalog(3)
+        fast = guest_client.get('/api/v1/titles/').content
+        settings.VALUES_FASTPATH = False
+        monkeypatch.setattr(TitleValuesSerializer, 'compile', pytest.fail)
+        invalidate_catalog_cache()
+        assert guest_client.get('/api/v1/titles/').content == fast, (
+            'Проверьте, что VALUES_FASTPATH=False отдаёт тот же ответ '
+            'через DRF'
+        )
@@ -0,0 +1,100 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+        )
+        return response.json(), [query['sql'] for query in context]
+
+    def test_titles_fields(self, guest_client, make_catalog):
+        make_catalog(3)
+        data, queries = self.get(guest_client, '/api/v1/titles/?fields=id,name')
+        assert set(data['results'][0]) == {'id', 'name'}, (
+            'Проверьте, что ?fields= оставляет в ответе только нужные поля'
+        )
+        assert len(queries) == 2, (
+            'Проверьте, что жанры не загружаются, если они не запрошены'
+        )
+        select = queries[-1]
+        assert '"description"' not in select, (
+            'Проверьте, что незапрошенные столбцы не выбираются из БД'
+        )
+        assert 'JOIN' not in select
+
+    def test_titles_default_unchanged(self, guest_client, make_catalog):
+        make_catalog(2)
+        data, _ = self.get(guest_client, '/api/v1/titles/')
+        assert set(data['results'][0]) == {
+            'id', 'name', 'description', 'year', 'category', 'genre',
+            'rating',
+        }
+
+    def test_titles_nested_fields(self, guest_client, make_catalog):
+        title, _ = make_catalog(2)
+        data, queries = self.get(
+            guest_client,
+            f'/api/v1/titles/{title.id}/?fields=name,category,genre,rating'
+        )
+        assert data == {
+            'name': title.name,
+            'category': {'name': 'Категория 0', 'slug': 'category-0'},
+            'genre': [{'name': 'Жанр 0', 'slug': 'genre-0'},
+                      {'name': 'Жанр 1', 'slug': 'genre-1'}],
+            'rating': 5.0,
+        }
+        assert len(queries) == 2
+        assert '"year"' not in queries[0]
+
+    def test_titles_cursor_with_fields(self, django_assert_num_queries,
+                                       guest_client, make_catalog):
+        make_catalog(12)
+        url = '/api/v1/titles/?pagination=cursor&fields=id'
+        next_url = guest_client.get(url).json()['next']
+        with django_assert_num_queries(1):
+            response = guest_client.get(next_url)
+        assert set(response.json()['results'][0]) == {'id'}
+
+    def test_reviews_fields_and_expand(self, guest_client, make_catalog):
+        title, _ = make_catalog(3)
+        data, queries = self.get(
+            guest_client,
+            f'/api/v1/titles/{title.id}/reviews/?fields=id,score&expand=title'
+        )
+        assert data['results'][0]['title'] == {
+            'id': title.id, 'name': title.name
+        }
+        assert set(data['results'][0]) == {'id', 'score', 'title'}
+        assert len(queries) == 2
+        assert '"reviews_user"' not in queries[-1], (
+            'Проверьте, что автор не загружается, если он не запрошен'
+        )
+
+    def test_comments_expand(self, guest_client, make_catalog):
+        title, review = make_catalog(2)
+        data, queries = self.get(
+            guest_client,
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            '?expand=review'
+        )
+        assert data['results'][0]['review'] == {
+            'id': review.id, 'text': review.text, 'score': review.score
+        }
+        assert 'author' in data['results'][0]
+        assert len(queries) == 2
+
+    def test_unknown_fields(self, guest_client, make_catalog):
+        title, _ = make_catalog(2)
+        for url in ('/api/v1/titles/?fields=id,secret',
+                    f'/api/v1/titles/{title.id}/reviews/?expand=author'):
+            response = guest_client.get(url)
+            assert response.status_code == 400, (
+                f'Проверьте, что `{url}` с неизвестным полем возвращает 400'
+            )
@@ -0,0 +1,73 @@
+import os
+import runpy
+
+import pytest
+
+CONF = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'api_yamdb', 'gunicorn.conf.py'
+)
+
+
+def load_conf(monkeypatch, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(CONF)
+
+
+class TestGunicornConf:
+
+    def test_size_workers(self, monkeypatch):
+        size_workers = load_conf(monkeypatch)['size_workers']
+        mb = 1024 * 1024
+        assert size_workers(2, None, 150 * mb) == (5, 1)
+        assert size_workers(4, 8192 * mb, 150 * mb) == (9, 1)
+        assert size_workers(4, 512 * mb, 150 * mb) == (3, 3), (
+            'Проверьте, что при нехватке памяти воркеров меньше, '
+            'а потоков больше'
+        )
+        assert size_workers(16, 100 * mb, 150 * mb) == (1, 8)
+
+    def test_cpu_quota(self, monkeypatch, tmp_path):
+        cpu_max = tmp_path / 'cpu.max'
+        conf = load_conf(monkeypatch)
+        monkeypatch.setitem(conf['cpu_quota'].__globals__,
+                            'CGROUP_CPU_MAX', str(cpu_max))
+        cpu_max.write_text('150000 100000\n')
+        assert conf['cpu_quota']() == 2, (
+            'Проверьте, что учитывается квота процессора cgroup'
+        )
+        cpu_max.write_text('max 100000\n')
+        assert conf['cpu_quota']() is None
+
+    def test_env(self, monkeypatch):
+        conf = load_conf(
+            monkeypatch, GUNICORN_WORKERS='7', GUNICORN_THREADS='',
+            GUNICORN_PRELOAD='False', GUNICORN_KEEPALIVE='90'
+        )
+        assert conf['workers'] == 7
+        assert conf['threads'] == conf['auto_threads']
+        assert conf['preload_app'] is False
+        assert conf['keepalive'] == 90
+        assert conf['worker_class'] == 'gthread', (
+            'Проверьте, что по умолчанию воркер gthread: sync не держит '
+            'постоянные соединения с nginx'
+        )
+
+
+@pytest.mark.django_db
+def test_warm_up(django_assert_num_queries):
+    from api.v1.serializers import TitleValuesSerializer
+    from api.warmup import warm_up
+    from reviews.models import Title
+
+    TitleValuesSerializer._compile.cache_clear()
+    Title._meta._expire_cache()
+    with django_assert_num_queries(0):
+        warm_up()
+    assert TitleValuesSerializer._compile.cache_info().currsize, (
+        'Проверьте, что план списка произведений строится при прогреве'
+    )
+    assert 'related_objects' in vars(Title._meta), (
+        'Проверьте, что метаданные моделей заполняются при прогреве'
+    )
@@ -0,0 +1,60 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def page_query(client, url, table):
+    """SQL выборки страницы из table, выполненный при GET-запросе к url."""
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    queries = [
+        query['sql'] for query in context.captured_queries
+        if f'FROM "{table}"' in query['sql'] and 'LIMIT' in query['sql']
+    ]
+    assert queries, f'Проверьте, что `{url}` выбирает строки из {table}'
+    return queries[0]
+
+
+@pytest.mark.django_db
+class TestQueryIndexes:
+
+    def test_reviews_by_title(self, guest_client, make_catalog,
+                              assert_uses_index):
+        title, _ = make_catalog(3)
+        sql = page_query(guest_client, f'/api/v1/titles/{title.id}/reviews/',
+                         'reviews_review')
+        assert_uses_index(sql, 'review_title_id_idx')
+
+    def test_comments_by_review(self, guest_client, make_catalog,
+                                assert_uses_index):
+        title, review = make_catalog(3)
+        sql = page_query(
+            guest_client,
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            'reviews_comment'
+        )
+        assert_uses_index(sql, 'comment_review_id_idx')
+
+    def test_titles_by_year(self, guest_client, make_catalog,
+                            assert_uses_index):
+        make_catalog(3)
+        sql = page_query(guest_client, '/api/v1/titles/?year=2001',
+                         'reviews_title')
+        assert_uses_index(sql, 'title_year_name_idx')
+
+    def test_titles_by_genre(self, guest_client, make_catalog,
+                             assert_uses_index):
+        make_catalog(3)
+        sql = page_query(guest_client, '/api/v1/titles/?genre=genre-1',
+                         'reviews_title')
+        assert_uses_index(sql, 'titlegenre_genre_title_idx')
+
+    def test_queryset_plan(self, make_catalog, assert_uses_index):
+        from reviews.models import Review
+
+        title, _ = make_catalog(2)
+        assert_uses_index(
+            Review.objects.filter(title=title).order_by('-id')[:5],
+            'review_title_id_idx'
+        )
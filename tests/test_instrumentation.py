@@ -0,0 +1,106 @@
+import json
+import logging
+
+import pytest
+
+
+def test_fingerprint():
+    from api.instrumentation import fingerprint
+
+    assert fingerprint('SELECT 1 WHERE id IN (%s, %s, %s)') == (
+        fingerprint('SELECT 1 WHERE id IN (%s, %s)')
+    ), 'Проверьте, что списки параметров разной длины дают один отпечаток'
+    assert fingerprint('SELECT 1 WHERE id = %s') != (
+        fingerprint('SELECT 1 WHERE id IN (%s, %s)')
+    )
+
+
+def test_all_views_have_query_budget():
+    from api.instrumentation import QueryBudgetMixin
+    from api.v1.urls import v1_router
+    from api.v1.views import SignUpView, TokenObtainPairView
+
+    views = [viewset for _, viewset, _ in v1_router.registry]
+    views += [SignUpView, TokenObtainPairView]
+    for view in views:
+        assert issubclass(view, QueryBudgetMixin), (
+            f'Проверьте, что для {view.__name__} задан бюджет SQL-запросов'
+        )
+
+
+@pytest.fixture
+def sql_log(caplog, monkeypatch):
+    """Записи лога api.sql: у логгера свой обработчик без propagate."""
+    monkeypatch.setattr(logging.getLogger('api.sql'), 'propagate', True)
+    caplog.set_level(logging.INFO, logger='api.sql')
+    return caplog
+
+
+@pytest.mark.django_db
+class TestSqlInstrumentation:
+
+    def test_server_timing(self, guest_client, make_catalog):
+        title, _ = make_catalog(2)
+        response = guest_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200
+        assert response['Server-Timing'].startswith('db;dur='), (
+            'Проверьте, что ответ содержит заголовок Server-Timing'
+        )
+        assert 'desc="2 queries"' in response['Server-Timing']
+
+    def test_structured_log(self, guest_client, make_catalog, sql_log):
+        title, _ = make_catalog(2)
+        guest_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        record = json.loads(sql_log.records[-1].getMessage())
+        assert record['view'] == 'ReviewViewSet'
+        assert record['queries'] == 2
+        assert record['budget'] == 2
+        assert record['duplicates'] == {}
+
+    def test_disabled_log(self, guest_client, make_catalog, monkeypatch,
+                          caplog):
+        from api import instrumentation
+
+        title, _ = make_catalog(2)
+        monkeypatch.setattr(instrumentation, 'json', None)
+        caplog.set_level(logging.WARNING, logger='api.sql')
+        response = guest_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200, (
+            'Проверьте, что запись лога не собирается при отключённом уровне'
+        )
+
+    def test_budget_exceeded(self, guest_client, make_catalog, monkeypatch):
+        from api.instrumentation import QueryBudgetExceeded
+        from api.v1.views import ReviewViewSet
+
+        title, _ = make_catalog(2)
+        monkeypatch.setattr(ReviewViewSet, 'query_budget', {'list': 1})
+        with pytest.raises(QueryBudgetExceeded):
+            guest_client.get(f'/api/v1/titles/{title.id}/reviews/')
+
+    def test_budget_warning(self, guest_client, make_catalog, monkeypatch,
+                            settings, sql_log):
+        from api.v1.views import ReviewViewSet
+
+        settings.QUERY_BUDGET_STRICT = False
+        title, _ = make_catalog(2)
+        monkeypatch.setattr(ReviewViewSet, 'query_budget', {'list': 1})
+        response = guest_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200
+        assert sql_log.records[-1].levelno == logging.WARNING, (
+            'Проверьте, что превышение бюджета пишется в лог предупреждением'
+        )
+
+    def test_duplicates(self, make_catalog):
+        from api.instrumentation import QueryStats
+        from django.db import connection
+        from reviews.models import Review
+
+        make_catalog(3)
+        stats = QueryStats()
+        with connection.execute_wrapper(stats):
+            [review.author.username for review in Review.objects.all()]
+        assert stats.count == 4
+        assert list(stats.duplicates.values()) == [3], (
+            'Проверьте, что повторяющиеся запросы N+1 обнаруживаются'
+        )
@@ -0,0 +1,241 @@
+import csv
+import os
+
+import pytest
+from django.core.management import call_command
+
+
+def count_rows(filename):
+    from reviews.csv_tables import DATA_DIR
+
+    with open(os.path.join(DATA_DIR, filename), encoding='utf-8',
+              newline='') as csv_file:
+        return sum(1 for _ in csv.DictReader(csv_file))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestLoadDataFromCsv:
+
+    def test_loads_all_tables(self):
+        from django.db.models import Avg
+        from reviews.csv_tables import CSV_TABLES
+        from reviews.models import Title, TitleStats
+
+        call_command('load_data_from_csv', batch_size=10)
+
+        for table in CSV_TABLES:
+            assert table.model.objects.count() == count_rows(
+                table.filename
+            ), f'Проверьте, что из {table.filename} загружены все строки'
+        for title in Title.objects.annotate(avg=Avg('reviews__score')):
+            assert title.rating == title.avg, (
+                'Проверьте, что после загрузки пересчитывается рейтинг'
+            )
+            stats = TitleStats.objects.get(title=title)
+            assert stats.review_count == title.reviews.count(), (
+                'Проверьте, что после загрузки пересчитывается статистика'
+            )
+
+    def test_sequences_are_reset(self):
+        from reviews.models import Comment, Title
+
+        call_command('load_data_from_csv')
+        title = Title.objects.create(name='Новое', year=2000)
+        assert title.id > count_rows('titles.csv')
+        assert Comment.objects.order_by('-id').first().id == max(
+            Comment.objects.values_list('id', flat=True)
+        )
+
+    def test_queries_do_not_depend_on_rows(self, django_assert_max_num_queries):
+        # Пачка размером 10: на 72 отзыва — 8 вставок, без запросов
+        # на каждую строку.
+        with django_assert_max_num_queries(60):
+            call_command('load_data_from_csv', batch_size=10)
+
+    def test_reload_replaces_data(self, admin):
+        from reviews.models import User
+
+        call_command('load_data_from_csv')
+        call_command('load_data_from_csv')
+        assert User.objects.count() == count_rows('users.csv')
+
+    def test_copy_mode_matches_orm_mode(self):
+        from reviews.csv_tables import CSV_TABLES
+
+        def snapshot():
+            return {
+                table.filename: list(
+                    table.model.objects.order_by('pk').values_list(
+                        *table.columns.values()
+                    )
+                )
+                for table in CSV_TABLES
+            }
+
+        call_command('load_data_from_csv')
+        orm_data = snapshot()
+        call_command('load_data_from_csv', copy=True)
+        assert snapshot() == orm_data, (
+            'Проверьте, что загрузка через COPY даёт те же данные, '
+            'что и пакетная загрузка через ORM'
+        )
+
+    @pytest.mark.parametrize('copy', (False, True))
+    def test_keeps_pub_date(self, copy):
+        from reviews.models import Review
+
+        call_command('load_data_from_csv', copy=copy)
+        assert Review.objects.filter(pub_date__year=2019).exists(), (
+            'Проверьте, что даты публикации берутся из CSV'
+        )
+        assert Review.objects.create(
+            title_id=1, author_id=104, text='Новый отзыв', score=1
+        ).id > Review.objects.exclude(text='Новый отзыв').order_by(
+            '-id').first().id
+
+
+@pytest.mark.django_db(transaction=True)
+class TestIncrementalLoad:
+
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        import shutil
+
+        from reviews.csv_tables import CSV_TABLES, DATA_DIR
+
+        for table in CSV_TABLES:
+            shutil.copy(os.path.join(DATA_DIR, table.filename), tmp_path)
+        call_command('load_data_from_csv', path=str(tmp_path))
+        return tmp_path
+
+    def rewrite(self, data_dir, filename, change):
+        path = os.path.join(data_dir, filename)
+        with open(path, encoding='utf-8', newline='') as csv_file:
+            csv_reader = csv.DictReader(csv_file)
+            fieldnames = csv_reader.fieldnames
+            rows = change(list(csv_reader))
+        with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def test_unchanged_data_writes_nothing(self, data_dir):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as context:
+            call_command(
+                'load_data_from_csv', path=str(data_dir), incremental=True
+            )
+        writes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        assert writes == [], (
+            'Проверьте, что повторная загрузка неизменённых данных '
+            'не изменяет строки в БД'
+        )
+
+    def test_applies_inserts_updates_and_deletes(self, data_dir):
+        from django.db.models import Avg
+        from reviews.models import Comment, Genre, Review, Title
+
+        def change_reviews(rows):
+            rows[0]['score'] = '1'
+            return rows
+
+        def add_genre(rows):
+            return rows + [{'id': '100', 'name': 'Новый', 'slug': 'new'}]
+
+        self.rewrite(data_dir, 'review.csv', change_reviews)
+        self.rewrite(data_dir, 'genre.csv', add_genre)
+        self.rewrite(data_dir, 'comments.csv', lambda rows: rows[1:])
+        first_comment = Comment.objects.order_by('id').first().id
+
+        call_command('load_data_from_csv', path=str(data_dir),
+                     incremental=True)
+
+        review = Review.objects.get(pk=1)
+        assert review.score == 1
+        assert Genre.objects.filter(pk=100, slug='new').exists()
+        assert not Comment.objects.filter(pk=first_comment).exists()
+        title = Title.objects.annotate(avg=Avg('reviews__score')).get(
+            pk=review.title_id
+        )
+        assert title.rating == title.avg, (
+            'Проверьте, что рейтинг изменённых произведений пересчитан'
+        )
+        assert title.stats.scores[1] == title.reviews.filter(
+            score=1
+        ).count(), 'Проверьте, что статистика изменённых произведений пересчитана'
+        assert Genre.objects.create(name='Ещё', slug='more').id > 100
+
+    def test_keeps_fields_missing_in_csv(self, data_dir):
+        from reviews.models import User
+
+        User.objects.filter(pk=100).update(password='secret')
+        self.rewrite(
+            data_dir, 'users.csv',
+            lambda rows: [dict(row, bio='Новое био') for row in rows]
+        )
+        call_command('load_data_from_csv', path=str(data_dir),
+                     incremental=True)
+        user = User.objects.get(pk=100)
+        assert user.bio == 'Новое био'
+        assert user.password == 'secret', (
+            'Проверьте, что обновление не затирает поля, которых нет в CSV'
+        )
+
+    def drop_last_column(self, data_dir, filename):
+        path = os.path.join(data_dir, filename)
+        with open(path, encoding='utf-8', newline='') as csv_file:
+            rows = list(csv.reader(csv_file))
+        with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+            csv.writer(csv_file).writerows(row[:-1] for row in rows)
+
+    @pytest.mark.parametrize('options', (
+        {}, {'copy': True}, {'incremental': True}
+    ))
+    def test_old_titles_header(self, data_dir, options):
+        from reviews.models import Title
+
+        Title.objects.filter(pk=1).update(description='Описание')
+        self.drop_last_column(data_dir, 'titles.csv')
+        call_command('load_data_from_csv', path=str(data_dir), **options)
+        assert Title.objects.count() == count_rows('titles.csv'), (
+            'Проверьте, что загружается titles.csv без столбца description'
+        )
+        if options.get('incremental'):
+            assert Title.objects.get(pk=1).description == 'Описание', (
+                'Проверьте, что сверка не затирает описание, '
+                'которого нет в CSV'
+            )
+
+    @pytest.mark.parametrize('options', (
+        {}, {'copy': True}, {'incremental': True}
+    ))
+    def test_missing_pub_date(self, data_dir, options):
+        from django.utils import timezone
+        from reviews.models import Comment
+
+        dates = dict(Comment.objects.values_list('pk', 'pub_date'))
+        self.drop_last_column(data_dir, 'comments.csv')
+        started = timezone.now()
+        call_command('load_data_from_csv', path=str(data_dir), **options)
+        loaded = dict(Comment.objects.values_list('pk', 'pub_date'))
+        if options.get('incremental'):
+            assert loaded == dates, (
+                'Проверьте, что сверка не затирает даты, которых нет в CSV'
+            )
+        else:
+            assert min(loaded.values()) >= started, (
+                'Проверьте, что без столбца pub_date комментарии получают '
+                'время загрузки'
+            )
+
+    def test_missing_required_column(self, data_dir):
+        from django.core.management import CommandError
+
+        self.drop_last_column(data_dir, 'genre.csv')
+        with pytest.raises(CommandError, match='slug'):
+            call_command('load_data_from_csv', path=str(data_dir))
@@ -0,0 +1,88 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestNestedRoutes:
+
+    def test_missing_parent(self, guest_client, make_catalog):
+        title, review = make_catalog(2)
+        for url in (
+            '/api/v1/titles/0/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/0/comments/',
+            f'/api/v1/titles/0/reviews/{review.id}/comments/',
+        ):
+            assert guest_client.get(url).status_code == 404, (
+                f'Проверьте, что `{url}` возвращает 404 без родителя'
+            )
+
+    def test_empty_list(self, django_assert_num_queries, guest_client,
+                        make_catalog):
+        from reviews.models import Title
+
+        make_catalog(2)
+        title = Title.objects.last()
+        # Пустой подсчёт отзывов и проверка, что произведение существует.
+        with django_assert_num_queries(2):
+            response = guest_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200, (
+            'Проверьте, что у произведения без отзывов список пуст, а не 404'
+        )
+        assert response.json()['results'] == []
+
+    def test_comment_of_other_title(self, guest_client, make_catalog):
+        from reviews.models import Title
+
+        _, review = make_catalog(2)
+        other = Title.objects.exclude(pk=review.title_id).first()
+        comment = review.comments.first()
+        url = (f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/'
+               f'{comment.id}/')
+        assert guest_client.get(url).status_code == 404
+
+    def test_create_review(self, django_assert_num_queries, user_client,
+                           make_catalog):
+        from reviews.models import Title
+
+        make_catalog(2)
+        title = Title.objects.last()
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        data = {'text': 'Отзыв', 'score': 7}
+        # Произведение, пользователь из БД в холодном кеше, вставка отзыва,
+        # обновление рейтинга и статистики; SAVEPOINT и RELEASE — тестовая
+        # транзакция.
+        with django_assert_num_queries(7):
+            response = user_client.post(url, data=data)
+        assert response.status_code == 201
+
+        response = user_client.post(url, data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что второй отзыв на произведение запрещён'
+        )
+        assert response.json() == {
+            'non_field_errors': ['Вы уже оставляли отзыв!']
+        }
+
+    def test_other_integrity_errors(self, user, make_catalog):
+        from api.v1.serializers import ReviewSerializer
+        from django.db import IntegrityError, transaction
+
+        title, _ = make_catalog(2)
+        with pytest.raises(IntegrityError), transaction.atomic():
+            ReviewSerializer().create({
+                'text': None, 'score': 7, 'title': title, 'author': user
+            })
+
+    def test_create_comment(self, django_assert_num_queries, user_client,
+                            make_catalog):
+        title, review = make_catalog(2)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        user_client.get('/api/v1/users/me/')
+        # Отзыв и вставка комментария.
+        with django_assert_num_queries(2):
+            response = user_client.post(url, data={'text': 'Комментарий'})
+        assert response.status_code == 201
+        response = user_client.post(
+            f'/api/v1/titles/0/reviews/{review.id}/comments/',
+            data={'text': 'Комментарий'}
+        )
+        assert response.status_code == 404
@@ -0,0 +1,180 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+
+class FailingEmailBackend(EmailBackend):
+    """Почтовый бэкенд, который не может доставить ни одного письма."""
+
+    def send_messages(self, messages):
+        raise ConnectionRefusedError('SMTP недоступен')
+
+
+class CountingEmailBackend(EmailBackend):
+    """Почтовый бэкенд, считающий открытые соединения."""
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return super().open()
+
+
+class LeaseCheckingEmailBackend(EmailBackend):
+    """
+    Почтовый бэкенд, запоминающий глубину транзакций и статусы писем
+    в БД в момент отправки.
+    """
+    seen = []
+
+    def send_messages(self, messages):
+        from django.db import connection
+        from reviews.models import OutgoingEmail
+
+        LeaseCheckingEmailBackend.seen.append((
+            len(connection.savepoint_ids),
+            list(OutgoingEmail.objects.values_list('status', 'leased_until')),
+        ))
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def signup(self, client, username):
+        return client.post('/api/v1/auth/signup/', data={
+            'username': username, 'email': f'{username}@yamdb.fake'
+        })
+
+    def test_signup_queues_email(self, guest_client):
+        from reviews.models import ConfirmationCode, OutgoingEmail
+
+        response = self.signup(guest_client, 'newuser')
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что при регистрации письмо не отправляется '
+            'в обработчике запроса'
+        )
+        email = OutgoingEmail.objects.get()
+        code = ConfirmationCode.objects.get(user__username='newuser')
+        assert email.recipient == 'newuser@yamdb.fake'
+        assert email.body == code.token, (
+            'Проверьте, что в очередь ставится письмо с кодом подтверждения'
+        )
+
+    def test_send_emails(self, guest_client, settings):
+        from reviews.models import OutgoingEmail
+
+        settings.EMAIL_BACKEND = 'tests.test_outbox.CountingEmailBackend'
+        CountingEmailBackend.opened = 0
+        for number in range(3):
+            self.signup(guest_client, f'user{number}')
+
+        call_command('send_emails', batch_size=10)
+
+        assert len(mail.outbox) == 3
+        assert CountingEmailBackend.opened == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение'
+        )
+        assert not OutgoingEmail.objects.filter(sent_at__isnull=True).exists()
+        assert set(OutgoingEmail.objects.values_list(
+            'status', 'leased_until'
+        )) == {(OutgoingEmail.SENT, None)}
+
+        call_command('send_emails')
+        assert len(mail.outbox) == 3, (
+            'Проверьте, что отправленные письма не отправляются повторно'
+        )
+
+    def test_send_emails_retry(self, guest_client, settings):
+        from reviews.models import OutgoingEmail
+
+        self.signup(guest_client, 'newuser')
+        settings.EMAIL_BACKEND = 'tests.test_outbox.FailingEmailBackend'
+        started = timezone.now()
+        call_command('send_emails')
+
+        email = OutgoingEmail.objects.get()
+        assert email.sent_at is None
+        assert email.status == OutgoingEmail.FAILED
+        assert email.leased_until is None
+        assert email.attempts == 1
+        assert 'SMTP недоступен' in email.last_error
+        assert email.next_attempt_at >= started + timedelta(seconds=30), (
+            'Проверьте, что повторная попытка откладывается'
+        )
+
+        call_command('send_emails')
+        assert OutgoingEmail.objects.get().attempts == 1, (
+            'Проверьте, что письмо не отправляется до времени '
+            'следующей попытки'
+        )
+
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_emails')
+        email = OutgoingEmail.objects.get()
+        assert email.sent_at is not None
+        assert email.attempts == 2
+        assert len(mail.outbox) == 1
+
+    def test_send_emails_max_attempts(self, guest_client, settings):
+        from reviews.models import OutgoingEmail
+
+        self.signup(guest_client, 'newuser')
+        OutgoingEmail.objects.update(attempts=5)
+        call_command('send_emails', max_attempts=5)
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что после исчерпания попыток письмо не отправляется'
+        )
+
+    def test_send_outside_transaction(self, guest_client, settings):
+        from django.db import connection
+        from reviews.models import OutgoingEmail
+
+        settings.EMAIL_BACKEND = 'tests.test_outbox.LeaseCheckingEmailBackend'
+        LeaseCheckingEmailBackend.seen = []
+        self.signup(guest_client, 'newuser')
+        started = timezone.now()
+        depth = len(connection.savepoint_ids)
+        call_command('send_emails', lease=60)
+
+        [(send_depth, rows)] = LeaseCheckingEmailBackend.seen
+        assert send_depth == depth, (
+            'Проверьте, что письма отправляются вне транзакции'
+        )
+        [(status, leased_until)] = rows
+        assert status == OutgoingEmail.SENDING, (
+            'Проверьте, что перед отправкой письмо помечается отправляемым'
+        )
+        assert leased_until >= started + timedelta(seconds=60)
+        assert OutgoingEmail.objects.get().status == OutgoingEmail.SENT
+
+    def test_expired_lease(self, guest_client):
+        from reviews.models import OutgoingEmail
+
+        self.signup(guest_client, 'newuser')
+        OutgoingEmail.objects.update(
+            status=OutgoingEmail.SENDING, attempts=1,
+            leased_until=timezone.now() + timedelta(minutes=5)
+        )
+        call_command('send_emails')
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что письмо, занятое другим отправителем, '
+            'не отправляется повторно'
+        )
+
+        OutgoingEmail.objects.update(leased_until=timezone.now())
+        call_command('send_emails')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что письмо упавшего отправителя возвращается '
+            'в очередь после срока аренды'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.status == OutgoingEmail.SENT
+        assert email.attempts == 2
@@ -0,0 +1,103 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def walk(self, client, url, link='next'):
+        items, pages = [], 0
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в курсорном режиме не считается '
+                'общее количество записей'
+            )
+            items.extend(data['results'])
+            url = data[link]
+            pages += 1
+        return items, pages
+
+    def test_reviews_cursor_with_equal_pub_date(self, guest_client,
+                                                make_catalog):
+        from django.utils import timezone
+        from reviews.models import Review
+
+        title, _ = make_catalog(12)
+        Review.objects.update(pub_date=timezone.now())
+        expected = list(
+            Review.objects.filter(title=title)
+            .order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+
+        items, pages = self.walk(
+            guest_client,
+            f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        )
+        assert [item['id'] for item in items] == expected, (
+            'Проверьте, что курсорная пагинация отзывов проходит все записи '
+            'по одному разу в порядке (-pub_date, -id)'
+        )
+        assert pages == 3
+
+    def test_reviews_cursor_previous_link(self, guest_client,
+                                          make_catalog):
+        title, _ = make_catalog(12)
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        first_page = guest_client.get(url).json()
+        assert first_page['previous'] is None
+        second_page = guest_client.get(first_page['next']).json()
+        back = guest_client.get(second_page['previous']).json()
+        assert back['results'] == first_page['results'], (
+            'Проверьте, что ссылка previous возвращает предыдущую страницу'
+        )
+
+    def test_titles_cursor_order(self, guest_client, make_catalog):
+        from reviews.models import Title
+
+        make_catalog(7)
+        Title.objects.update(name='Одинаковое название')
+        items, _ = self.walk(guest_client, '/api/v1/titles/?pagination=cursor')
+        assert [item['id'] for item in items] == sorted(
+            Title.objects.values_list('id', flat=True)
+        ), 'Проверьте, что курсор произведений упорядочен по (name, id)'
+
+    def test_comments_cursor_queries(self, django_assert_num_queries,
+                                     guest_client, make_catalog):
+        title, review = make_catalog(12)
+        url = (f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+               '?pagination=cursor')
+        next_url = guest_client.get(url).json()['next']
+        with django_assert_num_queries(1):
+            response = guest_client.get(next_url)
+        assert len(response.json()['results']) == 5
+
+    def test_page_number_mode_by_default(self, guest_client, make_catalog):
+        title, _ = make_catalog(6)
+        data = guest_client.get(f'/api/v1/titles/{title.id}/reviews/').json()
+        assert data['count'] == 6, (
+            'Проверьте, что без параметра pagination=cursor используется '
+            'пагинация по номеру страницы'
+        )
+
+    def test_invalid_cursor(self, guest_client, make_catalog):
+        from base64 import b64encode
+
+        title, _ = make_catalog(2)
+        response = guest_client.get(
+            f'/api/v1/titles/{title.id}/reviews/?cursor=bad'
+        )
+        assert response.status_code == 404
+        for query in ('r=0&p=garbage&i=1', 'r=0&p=&i=1',
+                      'r=0&p=2022-01-01T00:00:00Z&i=x'):
+            cursor = b64encode(query.encode()).decode()
+            response = guest_client.get(
+                f'/api/v1/titles/{title.id}/reviews/?cursor={cursor}'
+            )
+            assert response.status_code == 404, (
+                f'Проверьте, что подделанный курсор `{query}` '
+                'возвращает статус 404'
+            )
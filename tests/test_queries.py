@@ -0,0 +1,127 @@
+import pytest
+
+# Размеры набора данных: меньше страницы и больше страницы (PAGE_SIZE = 5).
+SIZES = (2, 6)
+
+
+@pytest.mark.django_db
+class TestQueryCount:
+    """
+    Количество запросов к БД на каждый маршрут api/v1 не должно
+    зависеть от количества объектов на странице.
+    """
+
+    def assert_queries(self, django_assert_num_queries, client, url,
+                       expected):
+        with django_assert_num_queries(expected):
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+        )
+        return response
+
+    @pytest.mark.parametrize('size', SIZES)
+    def test_users_list(self, django_assert_num_queries, admin_client,
+                        make_catalog, size):
+        make_catalog(size)
+        self.assert_queries(
+            django_assert_num_queries, admin_client, '/api/v1/users/', 2
+        )
+
+    def test_users_detail(self, django_assert_num_queries, admin_client,
+                          user):
+        self.assert_queries(
+            django_assert_num_queries, admin_client,
+            f'/api/v1/users/{user.username}/', 1
+        )
+
+    def test_users_me(self, django_assert_num_queries, user_client):
+        # Полная строка пользователя читается один раз и кешируется.
+        self.assert_queries(
+            django_assert_num_queries, user_client, '/api/v1/users/me/', 1
+        )
+        self.assert_queries(
+            django_assert_num_queries, user_client, '/api/v1/users/me/', 0
+        )
+
+    @pytest.mark.parametrize('size', SIZES)
+    @pytest.mark.parametrize('url', ('/api/v1/categories/',
+                                     '/api/v1/genres/'))
+    def test_categories_genres_list(self, django_assert_num_queries,
+                                    guest_client, make_catalog, size, url):
+        make_catalog(size)
+        self.assert_queries(django_assert_num_queries, guest_client, url, 2)
+
+    @pytest.mark.parametrize('size', SIZES)
+    def test_titles_list(self, django_assert_num_queries, guest_client,
+                         make_catalog, size):
+        make_catalog(size)
+        response = self.assert_queries(
+            django_assert_num_queries, guest_client, '/api/v1/titles/', 3
+        )
+        assert len(response.json()['results']) == min(size, 5)
+
+    def test_titles_detail(self, django_assert_num_queries, guest_client,
+                           make_catalog):
+        title, _ = make_catalog(2)
+        self.assert_queries(
+            django_assert_num_queries, guest_client,
+            f'/api/v1/titles/{title.id}/', 2
+        )
+
+    @pytest.mark.parametrize('size', SIZES)
+    def test_reviews_list(self, django_assert_num_queries, guest_client,
+                          make_catalog, size):
+        title, _ = make_catalog(size)
+        response = self.assert_queries(
+            django_assert_num_queries, guest_client,
+            f'/api/v1/titles/{title.id}/reviews/', 2
+        )
+        assert len(response.json()['results']) == min(size, 5)
+
+    def test_reviews_detail(self, django_assert_num_queries, guest_client,
+                            make_catalog):
+        title, review = make_catalog(2)
+        self.assert_queries(
+            django_assert_num_queries, guest_client,
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/', 1
+        )
+
+    @pytest.mark.parametrize('size', SIZES)
+    def test_comments_list(self, django_assert_num_queries, guest_client,
+                           make_catalog, size):
+        title, review = make_catalog(size)
+        response = self.assert_queries(
+            django_assert_num_queries, guest_client,
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/', 2
+        )
+        assert len(response.json()['results']) == min(size, 5)
+
+    def test_comments_detail(self, django_assert_num_queries, guest_client,
+                             make_catalog):
+        title, review = make_catalog(2)
+        comment = review.comments.first()
+        self.assert_queries(
+            django_assert_num_queries, guest_client,
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            f'{comment.id}/', 1
+        )
+
+    def test_auth_signup(self, django_assert_num_queries, guest_client):
+        data = {'username': 'newuser', 'email': 'newuser@yamdb.fake'}
+        # Две проверки уникальности и три вставки; SAVEPOINT и RELEASE
+        # появляются вместо BEGIN и COMMIT внутри тестовой транзакции.
+        with django_assert_num_queries(7):
+            response = guest_client.post('/api/v1/auth/signup/', data=data)
+        assert response.status_code == 200
+
+    def test_auth_token(self, django_assert_num_queries, guest_client,
+                        user):
+        from reviews.models import ConfirmationCode
+
+        ConfirmationCode.objects.create(user=user, token='code')
+        data = {'username': user.username, 'confirmation_code': 'code'}
+        # Пользователь вместе с кодом и удаление кода.
+        with django_assert_num_queries(4):
+            response = guest_client.post('/api/v1/auth/token/', data=data)
+        assert response.status_code == 200
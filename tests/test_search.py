@@ -0,0 +1,88 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestFullTextSearch:
+
+    @pytest.fixture
+    def titles(self):
+        from reviews.models import Title
+
+        return [
+            Title.objects.create(
+                name='Властелин колец', year=2001,
+                description='Фильм о кольце всевластья'
+            ),
+            Title.objects.create(
+                name='The Lord of the Rings', year=1954,
+                description='A book about the One Ring'
+            ),
+            Title.objects.create(
+                name='Матрица', year=1999,
+                description='Нео узнаёт правду о кольцах матрицы'
+            ),
+        ]
+
+    def search_ids(self, client, url):
+        response = client.get(url)
+        assert response.status_code == 200
+        return [item['id'] for item in response.json()['results']]
+
+    def test_titles_russian_morphology(self, guest_client, titles):
+        ids = self.search_ids(guest_client, '/api/v1/titles/?search=кольцо')
+        assert ids == [titles[0].id, titles[2].id], (
+            'Проверьте, что поиск учитывает словоформы и ставит совпадения '
+            'в названии выше совпадений в описании'
+        )
+
+    def test_titles_english(self, guest_client, titles):
+        ids = self.search_ids(guest_client, '/api/v1/titles/?search=rings')
+        assert ids == [titles[1].id]
+
+    def test_titles_all_words_required(self, guest_client, titles):
+        ids = self.search_ids(
+            guest_client, '/api/v1/titles/?search=матрица нео'
+        )
+        assert ids == [titles[2].id]
+
+    def test_search_follows_updates(self, guest_client, titles):
+        titles[1].name = 'Хоббит'
+        titles[1].save()
+        assert self.search_ids(
+            guest_client, '/api/v1/titles/?search=хоббит'
+        ) == [titles[1].id]
+
+    def test_titles_search_queries(self, django_assert_num_queries,
+                                   guest_client, titles):
+        with django_assert_num_queries(3):
+            guest_client.get('/api/v1/titles/?search=кольцо')
+
+    def test_reviews_and_comments(self, guest_client, make_catalog, user):
+        from reviews.models import Comment, Review
+
+        title, review = make_catalog(3)
+        found = Review.objects.create(
+            title=title, author=user, score=9,
+            text='Отличная режиссура и актёрская игра'
+        )
+        comment = Comment.objects.create(
+            review=review, author=user, text='Согласен насчёт режиссёра'
+        )
+        assert self.search_ids(
+            guest_client,
+            f'/api/v1/titles/{title.id}/reviews/?search=режиссуры'
+        ) == [found.id]
+        assert self.search_ids(
+            guest_client,
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            '?search=режиссёр'
+        ) == [comment.id]
+
+    def test_search_operators(self, guest_client, titles):
+        assert self.search_ids(
+            guest_client, '/api/v1/titles/?search=кольцо -матрица'
+        ) == [titles[0].id], (
+            'Проверьте, что поддерживается исключение слов через минус'
+        )
+        response = guest_client.get('/api/v1/titles/?search="(&|!')
+        assert response.status_code == 200
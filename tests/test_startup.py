@@ -0,0 +1,155 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api_yamdb'
+)
+SETUP = (
+    'import os\n'
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')\n"
+    'import django\n'
+    'django.setup()\n'
+)
+# Холодный старт воркера: приложение и маршруты, как после прогрева.
+WORKER = (
+    SETUP
+    + 'from django.core.wsgi import get_wsgi_application\n'
+    'get_wsgi_application()\n'
+    'from django.urls import get_resolver\n'
+    'get_resolver().reverse_dict\n'
+)
+API_ONLY_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'api.instrumentation.SqlInstrumentationMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+
+def import_times(code, **env):
+    """
+    Запуск code под python -X importtime. Возвращает отчёт: модуль ->
+    суммарное время импорта с вложенными модулями в микросекундах, и
+    время модулей верхнего уровня, а также множество загруженных модулей.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         code + "import sys\nprint('\\n'.join(sys.modules))\n"],
+        cwd=PROJECT_DIR, env={**os.environ, **env},
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True,
+    )
+    times, total = {}, 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        times[module.strip()] = int(cumulative)
+        if module[1] != ' ':
+            total += int(cumulative)
+    return times, total, set(result.stdout.split())
+
+
+def print_report(title, times, total, count=10):
+    print(f'\n{title}: {len(times)} модулей, {total / 1000:.0f} мс')
+    for module, cumulative in sorted(
+        times.items(), key=lambda item: -item[1]
+    )[:count]:
+        print(f'  {cumulative / 1000:8.1f} мс  {module}')
+
+
+class TestImportTime:
+
+    def test_setup_is_lazy(self):
+        times, total, modules = import_times(SETUP, API_ONLY='False')
+        print_report('django.setup()', times, total)
+        for module in ('rest_framework_simplejwt', 'rest_framework.response'):
+            assert module not in modules, (
+                f'Проверьте, что `{module}` не импортируется при запуске '
+                'команд manage.py'
+            )
+
+    def test_api_only_worker(self):
+        times, total, full = import_times(WORKER, API_ONLY='False')
+        print_report('Воркер', times, total)
+        times, total, api_only = import_times(WORKER, API_ONLY='True')
+        print_report('Воркер API_ONLY', times, total)
+        for module in ('django.contrib.sessions.middleware',
+                       'django.contrib.sessions.backends.base',
+                       'django.contrib.messages.middleware'):
+            assert module in full
+            assert module not in api_only, (
+                f'Проверьте, что воркер API_ONLY не загружает `{module}`'
+            )
+        assert len(api_only) < len(full)
+
+
+def make_client(settings, middleware, credentials=None):
+    """Клиент, обработчик которого собирает цепочку из middleware."""
+    from rest_framework.test import APIClient
+
+    settings.MIDDLEWARE = middleware
+    client = APIClient()
+    client.credentials(**(credentials or {}))
+    client.get('/api/v1/categories/')
+    return client
+
+
+@pytest.mark.django_db
+class TestApiOnlyMiddleware:
+
+    def test_settings(self):
+        result = subprocess.run(
+            [sys.executable, '-c', SETUP + (
+                'from django.conf import settings\n'
+                'print(settings.MIDDLEWARE)\n'
+                "print('django.contrib.admin' in settings.INSTALLED_APPS)\n"
+                'print(settings.ROOT_URLCONF)\n'
+            )],
+            cwd=PROJECT_DIR, env={**os.environ, 'API_ONLY': 'True'},
+            stdout=subprocess.PIPE, universal_newlines=True, check=True,
+        )
+        assert result.stdout.splitlines() == [
+            str(API_ONLY_MIDDLEWARE), 'False', 'api_yamdb.api_urls'
+        ], 'Проверьте состав приложений и middleware воркера API_ONLY'
+
+    def test_same_responses(self, user_client, settings, make_catalog):
+        from api.v1.cache import invalidate_catalog_cache
+
+        title, _ = make_catalog(3)
+        urls = ('/api/v1/titles/', f'/api/v1/titles/{title.id}/reviews/',
+                '/api/v1/users/me/')
+        expected = []
+        for url in urls:
+            invalidate_catalog_cache()
+            expected.append(user_client.get(url).content)
+        client = make_client(settings, API_ONLY_MIDDLEWARE,
+                             user_client._credentials)
+        for url, content in zip(urls, expected):
+            invalidate_catalog_cache()
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.content == content, (
+                f'Проверьте, что ответ `{url}` без лишних middleware '
+                'не меняется'
+            )
+
+    def test_request_skips_middleware(self, settings, make_catalog):
+        """
+        Запрос через набор API_ONLY не проходит сессии и сообщения.
+        Время запроса сравнивает benchmark_api с API_ONLY=True и False.
+        """
+        make_catalog(1)
+        url = '/api/v1/categories/'
+        full = make_client(settings, settings.MIDDLEWARE).get(url)
+        api_only = make_client(settings, API_ONLY_MIDDLEWARE).get(url)
+        assert full.content == api_only.content
+        for attr in ('session', '_messages'):
+            assert hasattr(full.wsgi_request, attr)
+            assert not hasattr(api_only.wsgi_request, attr), (
+                'Проверьте, что запрос без лишних middleware не создаёт '
+                f'`request.{attr}`'
+            )
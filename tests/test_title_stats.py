@@ -0,0 +1,160 @@
+import pytest
+
+
+def expected_stats(title):
+    """Статистика произведения, посчитанная агрегацией по отзывам."""
+    from django.db.models import Max
+    from reviews.models import Review
+
+    reviews = Review.objects.filter(title=title)
+    scores = {score: 0 for score in range(1, 11)}
+    for score in reviews.values_list('score', flat=True):
+        scores[score] += 1
+    return {
+        'review_count': reviews.count(),
+        'scores': scores,
+        'latest_review_date': reviews.aggregate(
+            latest=Max('pub_date')
+        )['latest'],
+    }
+
+
+def actual_stats(title):
+    from reviews.models import TitleStats
+
+    stats = TitleStats.objects.get(title=title)
+    return {
+        'review_count': stats.review_count,
+        'scores': stats.scores,
+        'latest_review_date': stats.latest_review_date,
+    }
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def test_incremental_updates(self, make_catalog):
+        from reviews.models import Review, Title
+
+        title, review = make_catalog(4)
+        other = Title.objects.exclude(pk=title.pk).first()
+        assert actual_stats(title) == expected_stats(title)
+        assert actual_stats(title)['scores'][5] == 4
+
+        review.score = 9
+        review.save()
+        assert actual_stats(title) == expected_stats(title), (
+            'Проверьте, что смена оценки переносит отзыв в распределении'
+        )
+
+        latest = Review.objects.filter(title=title).latest('pub_date')
+        latest.delete()
+        assert actual_stats(title) == expected_stats(title), (
+            'Проверьте, что удаление отзыва обновляет количество '
+            'и дату последнего отзыва'
+        )
+
+        review.title = other
+        review.save()
+        assert actual_stats(title) == expected_stats(title)
+        assert actual_stats(other) == expected_stats(other), (
+            'Проверьте, что перенос отзыва обновляет оба произведения'
+        )
+
+    def test_new_title(self, admin_client):
+        from reviews.models import Category, Genre, TitleStats
+
+        Category.objects.create(name='Фильм', slug='movie')
+        Genre.objects.create(name='Драма', slug='drama')
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Новое', 'year': 2000, 'category': 'movie',
+            'genre': ['drama'],
+        })
+        assert response.status_code == 201
+        stats = TitleStats.objects.get(title_id=response.json()['id'])
+        assert stats.review_count == 0
+
+    def test_rebuild_command(self, make_catalog):
+        from django.core.management import call_command
+        from reviews.models import Title, TitleStats
+
+        title, _ = make_catalog(3)
+        TitleStats.objects.all().delete()
+        call_command('rebuild_title_stats', batch_size=2)
+        assert TitleStats.objects.count() == Title.objects.count()
+        for title in Title.objects.all():
+            assert actual_stats(title) == expected_stats(title)
+
+    def test_api_expand(self, django_assert_num_queries, guest_client,
+                        make_catalog):
+        title, review = make_catalog(3)
+        data = guest_client.get(f'/api/v1/titles/{title.id}/').json()
+        assert 'stats' not in data, (
+            'Проверьте, что статистика выводится только по запросу'
+        )
+
+        with django_assert_num_queries(3):
+            response = guest_client.get('/api/v1/titles/?expand=stats')
+        results = {item['id']: item for item in response.json()['results']}
+        stats = results[title.id]['stats']
+        assert stats['review_count'] == 3
+        assert stats['scores']['5'] == 3
+        assert stats['scores']['1'] == 0
+        assert stats['latest_review_date'] is not None
+
+    def test_cascade_delete(self, django_assert_max_num_queries,
+                            make_catalog):
+        from reviews.models import Review, Title, TitleStats, User
+
+        title, review = make_catalog(3)
+        others = list(Title.objects.exclude(pk=title.pk))
+        author = review.author
+        for other in others:
+            Review.objects.create(title=other, author=author, text='Отзыв',
+                                  score=8)
+        queries = {}
+        for size in (3, 30):
+            extra = Title.objects.create(name=f'Лишнее {size}', year=2000)
+            Review.objects.bulk_create(
+                Review(title=extra, author=user, text='Отзыв', score=3)
+                for user in User.objects.bulk_create(
+                    User(username=f'u{size}-{i}', email=f'u{size}-{i}@x.fake')
+                    for i in range(size)
+                )
+            )
+            with django_assert_max_num_queries(20) as context:
+                extra.delete()
+            queries[size] = len(context.captured_queries)
+        assert queries[3] == queries[30], (
+            'Проверьте, что удаление произведения не пересчитывает рейтинг '
+            'на каждый отзыв'
+        )
+        assert not TitleStats.objects.filter(title__name__startswith='Лишнее')
+
+        with django_assert_max_num_queries(20):
+            author.delete()
+        for changed in [title, *others]:
+            changed.refresh_from_db()
+            assert actual_stats(changed) == expected_stats(changed), (
+                'Проверьте, что удаление пользователя пересчитывает '
+                'статистику произведений с его отзывами'
+            )
+            reviews = Review.objects.filter(title=changed)
+            assert changed.rating_count == reviews.count()
+            assert changed.rating_sum == sum(
+                reviews.values_list('score', flat=True)
+            )
+
+    def test_admin_read_only(self, client, admin_user, make_catalog):
+        title, _ = make_catalog(2)
+        client.force_login(admin_user)
+        url = f'/admin/reviews/titlestats/{title.pk}/change/'
+        response = client.get(url)
+        assert response.status_code == 200
+        assert not response.context['has_change_permission']
+        assert client.post(url, data={'review_count': 100}).status_code == 403
+        assert client.get('/admin/reviews/titlestats/add/').status_code == 403
+        title.stats.refresh_from_db()
+        assert actual_stats(title) == expected_stats(title), (
+            'Проверьте, что статистику нельзя изменить в админке'
+        )